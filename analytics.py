@@ -0,0 +1,263 @@
+"""
+Interview Analytics Rollups
+Maintains hourly/daily aggregate tables so admin dashboards never have to
+scan interview_sessions or tracking_events directly
+"""
+
+import sqlite3
+import threading
+import time
+
+from tracking_schema import EVENT_TYPES
+
+# Sessions keep changing (completed, terminated, tab switches) for a while
+# after they start, so buckets inside this window are recomputed every run
+ROLLUP_LOOKBACK_HOURS = 6
+ROLLUP_INTERVAL_SECONDS = 300
+
+DIMENSIONS = ('role', 'category', 'difficulty')
+GRANULARITIES = {
+    'hourly': 'analytics_hourly',
+    'daily': 'analytics_daily'
+}
+METRICS = (
+    'sessions_started',
+    'sessions_completed',
+    'sessions_terminated',
+    'tab_switches',
+    'sessions_with_tab_switch',
+    'tracking_events'
+)
+
+
+def init_rollup_tables(conn):
+    """Create rollup tables and the indexes the incremental refresh relies on"""
+    c = conn.cursor()
+
+    for table in GRANULARITIES.values():
+        c.execute(f'''
+            CREATE TABLE IF NOT EXISTS {table} (
+                bucket TEXT NOT NULL,
+                role TEXT NOT NULL,
+                category TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                sessions_started INTEGER DEFAULT 0,
+                sessions_completed INTEGER DEFAULT 0,
+                sessions_terminated INTEGER DEFAULT 0,
+                tab_switches INTEGER DEFAULT 0,
+                sessions_with_tab_switch INTEGER DEFAULT 0,
+                tracking_events INTEGER DEFAULT 0,
+                PRIMARY KEY (bucket, role, category, difficulty)
+            )
+        ''')
+
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS analytics_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+
+    # Refresh only touches recent sessions; their events are found through
+    # the (session_id, event_code) index on tracking_events
+    c.execute('CREATE INDEX IF NOT EXISTS idx_sessions_start_time ON interview_sessions(start_time)')
+
+    conn.commit()
+
+
+def _get_state(c, key):
+    c.execute('SELECT value FROM analytics_state WHERE key = ?', (key,))
+    row = c.fetchone()
+    return row[0] if row else None
+
+
+def refresh_rollups(db_path, min_age=None):
+    """Recompute the rollup buckets touched since the last refresh
+
+    The first run backfills everything; later runs only rebuild buckets
+    that start inside the lookback window before the previous refresh.
+    With min_age, a refresh less than min_age seconds after the previous
+    one is skipped, so several server processes can each run a
+    RollupWorker without repeating each other's work. Returns the bucket
+    the refresh started from, or None when skipped.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        return refresh_rollup_tables(conn, min_age)
+    finally:
+        conn.close()
+
+
+def refresh_rollup_tables(conn, min_age=None):
+    """refresh_rollups on an open connection (committed, not closed)"""
+    c = conn.cursor()
+
+    try:
+        c.execute('SELECT datetime(\'now\')')
+        refresh_started = c.fetchone()[0]
+
+        last_refresh = _get_state(c, 'last_refresh')
+        if last_refresh:
+            c.execute(
+                'SELECT strftime(\'%Y-%m-%d %H:00:00\', ?, ?)',
+                (last_refresh, f'-{ROLLUP_LOOKBACK_HOURS} hours')
+            )
+            window_start = c.fetchone()[0]
+        else:
+            window_start = '0000-00-00 00:00:00'
+        day_start = window_start[:10] + ' 00:00:00'
+
+        c.execute('BEGIN IMMEDIATE')
+
+        if min_age and last_refresh:
+            # Checked under the write lock: another process may have just finished
+            c.execute(
+                'SELECT value > datetime(\'now\', ?) FROM analytics_state WHERE key = \'last_refresh\'',
+                (f'-{int(min_age)} seconds',)
+            )
+            if c.fetchone()[0]:
+                conn.rollback()
+                return None
+
+        c.execute('DELETE FROM analytics_hourly WHERE bucket >= ?', (window_start,))
+        c.execute('''
+            INSERT INTO analytics_hourly
+            (bucket, role, category, difficulty, sessions_started, sessions_completed,
+             sessions_terminated, tab_switches, sessions_with_tab_switch, tracking_events)
+            SELECT strftime('%Y-%m-%d %H:00:00', s.start_time) AS bucket,
+                   s.role, s.category, COALESCE(s.difficulty, 'mixed') AS difficulty,
+                   COUNT(*),
+                   SUM(CASE WHEN s.completed THEN 1 ELSE 0 END),
+                   SUM(CASE WHEN s.terminated THEN 1 ELSE 0 END),
+                   SUM(COALESCE(e.tab_switches, 0)),
+                   SUM(CASE WHEN COALESCE(e.tab_switches, 0) > 0 THEN 1 ELSE 0 END),
+                   SUM(COALESCE(e.events, 0))
+            FROM interview_sessions s
+            LEFT JOIN (
+                SELECT session_id,
+                       COUNT(*) AS events,
+                       SUM(CASE WHEN event_code = ? THEN 1 ELSE 0 END) AS tab_switches
+                FROM tracking_events
+                WHERE session_id IN (
+                    SELECT session_id FROM interview_sessions WHERE start_time >= ?
+                )
+                GROUP BY session_id
+            ) e ON e.session_id = s.session_id
+            WHERE s.start_time >= ?
+            GROUP BY bucket, s.role, s.category, COALESCE(s.difficulty, 'mixed')
+        ''', (EVENT_TYPES['tab_switch'][0], window_start, window_start))
+
+        # Daily buckets are derived from the hourly rollup, never from raw rows
+        c.execute('DELETE FROM analytics_daily WHERE bucket >= ?', (day_start,))
+        c.execute(f'''
+            INSERT INTO analytics_daily
+            (bucket, role, category, difficulty, {', '.join(METRICS)})
+            SELECT substr(bucket, 1, 10) || ' 00:00:00' AS day, role, category, difficulty,
+                   {', '.join(f'SUM({m})' for m in METRICS)}
+            FROM analytics_hourly
+            WHERE bucket >= ?
+            GROUP BY day, role, category, difficulty
+        ''', (day_start,))
+
+        c.execute(
+            'INSERT OR REPLACE INTO analytics_state (key, value) VALUES (\'last_refresh\', ?)',
+            (refresh_started,)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return window_start
+
+
+def query_rollups(db_path, granularity='daily', group_by=None, since=None, until=None):
+    """Read aggregated interview metrics from the rollup tables
+
+    group_by is any subset of DIMENSIONS; since/until bound the bucket
+    timestamp (UTC, 'YYYY-MM-DD[ HH:MM:SS]').
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+
+    group_by = list(group_by or [])
+    unknown = [d for d in group_by if d not in DIMENSIONS]
+    if unknown:
+        raise ValueError(f"Cannot group by {', '.join(unknown)}")
+
+    columns = ['bucket'] + group_by
+    where = []
+    params = []
+    if since:
+        where.append('bucket >= ?')
+        params.append(since)
+    if until:
+        where.append('bucket < ?')
+        params.append(until)
+
+    sql = f'''
+        SELECT {', '.join(columns)}, {', '.join(f'SUM({m})' for m in METRICS)}
+        FROM {GRANULARITIES[granularity]}
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        GROUP BY {', '.join(columns)}
+        ORDER BY {', '.join(columns)}
+    '''
+
+    conn = sqlite3.connect(db_path, timeout=30)
+    c = conn.cursor()
+    c.execute(sql, params)
+    rows = c.fetchall()
+    last_refresh = _get_state(c, 'last_refresh')
+    conn.close()
+
+    results = []
+    for row in rows:
+        entry = dict(zip(columns + list(METRICS), row))
+        started = entry['sessions_started'] or 0
+        entry['completion_rate'] = round(entry['sessions_completed'] / started * 100, 1) if started else 0.0
+        entry['termination_rate'] = round(entry['sessions_terminated'] / started * 100, 1) if started else 0.0
+        entry['tab_switch_rate'] = round(entry['sessions_with_tab_switch'] / started * 100, 1) if started else 0.0
+        entry['avg_tab_switches'] = round(entry['tab_switches'] / started, 2) if started else 0.0
+        results.append(entry)
+
+    return {
+        'granularity': granularity,
+        'group_by': group_by,
+        'last_refresh': last_refresh,
+        'rows': results
+    }
+
+
+class RollupWorker:
+    """Background thread that keeps the rollup tables up to date
+
+    Start it in each serving process (not in a pre-fork master, whose
+    threads don't survive the fork); with several processes only one of
+    them refreshes per interval.
+    """
+
+    def __init__(self, db_path, interval=ROLLUP_INTERVAL_SECONDS):
+        self.db_path = db_path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start refreshing in the background (no-op if already running)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the background refresh loop"""
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.time()
+            try:
+                refresh_rollups(self.db_path, min_age=self.interval / 2)
+            except Exception as e:
+                print(f"[WARNING] Analytics rollup failed: {e}")
+            self._stop.wait(max(0, self.interval - (time.time() - started)))
@@ -20,9 +20,11 @@ import secrets
 from flask import send_file
 from report_generator import InterviewReportGenerator
 import io
+from analytics import init_rollup_tables, query_rollups, RollupWorker, ROLLUP_INTERVAL_SECONDS
+from tracking_schema import init_tracking_table, parse_event, insert_event, EventValidationError, EVENT_TYPES
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
-app.secret_key = secrets.token_hex(32)
+app.secret_key = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
 CORS(app)
 
 # Google OAuth Configuration
@@ -46,6 +48,9 @@ google = oauth.register(
 # Database setup
 DB_PATH = 'interview_system.db'
 
+# Usernames allowed to read the admin analytics endpoints (comma-separated)
+ADMIN_USERNAMES = {u.strip() for u in os.environ.get('ADMIN_USERNAMES', '').split(',') if u.strip()}
+
 def init_db():
     """Initialize the database"""
     conn = sqlite3.connect(DB_PATH)
@@ -86,6 +91,7 @@ def init_db():
             warning_count INTEGER DEFAULT 0,
             start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             end_time TIMESTAMP,
+            questions TEXT,
             FOREIGN KEY (user_id) REFERENCES users(id)
         )
     ''')
@@ -102,17 +108,14 @@ def init_db():
         )
     ''')
     
-    # Tracking events table (NEW)
-    c.execute('''
-        CREATE TABLE IF NOT EXISTS tracking_events (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            session_id TEXT NOT NULL,
-            event_type TEXT NOT NULL,
-            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            details TEXT,
-            FOREIGN KEY (session_id) REFERENCES interview_sessions(session_id)
-        )
-    ''')
+    # Questions are persisted so any worker can resume a session (older databases lack the column)
+    c.execute('PRAGMA table_info(interview_sessions)')
+    if 'questions' not in {row[1] for row in c.fetchall()}:
+        c.execute('ALTER TABLE interview_sessions ADD COLUMN questions TEXT')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_answers_session ON answers(session_id)')
+    
+    # Tracking events table (typed layout, migrates legacy free-text rows)
+    init_tracking_table(conn)
     
     # User violations table (NEW)
     c.execute('''
@@ -126,12 +129,30 @@ def init_db():
         )
     ''')
     
+    # Analytics rollup tables (served to dashboards instead of the tables above)
+    init_rollup_tables(conn)
+    
     conn.commit()
     conn.close()
 
 # Initialize database
 init_db()
 
+# Keep analytics rollups fresh in the background (set ANALYTICS_ROLLUP_INTERVAL=0 to disable)
+rollup_interval = int(os.environ.get('ANALYTICS_ROLLUP_INTERVAL', ROLLUP_INTERVAL_SECONDS))
+rollup_worker = RollupWorker(DB_PATH, interval=rollup_interval)
+
+
+def start_background_tasks():
+    """Start this process's background threads
+
+    Called by serve.py in each worker after the app is loaded (a thread
+    started at import would run in the preloading master only) and by
+    the dev server below.
+    """
+    if rollup_interval > 0:
+        rollup_worker.start()
+
 # Initialize model
 model = InterviewModel()
 try:
@@ -144,6 +165,11 @@ except Exception as e:
 # Store active interview sessions
 interview_sessions = {}
 
+# Where live interview state is read from: 'memory' keeps it in this process
+# (fast, single worker); 'db' reloads it from SQLite on every request so any
+# worker process can serve any candidate (see serve.py)
+SESSION_STORE = os.environ.get('INTERVIEW_SESSION_STORE', 'memory')
+
 def hash_password(password):
     """Hash a password for storing"""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -226,26 +252,376 @@ def can_start_interview(user_id):
         'remaining_total': max(0, 5 - total)
     }
 
+def load_interview_session(session_id):
+    """Rebuild live interview state from the database (None if unknown)"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('''
+        SELECT user_id, role, category, difficulty, questions, tab_switches, warning_count,
+               posture_violations, eye_tracking_score, focus_percentage, terminated,
+               terminated_reason, datetime(start_time, 'localtime')
+        FROM interview_sessions WHERE session_id = ?
+    ''', (session_id,))
+    row = c.fetchone()
+    
+    # Sessions started before questions were persisted cannot be resumed
+    if not row or row[4] is None:
+        conn.close()
+        return None
+    
+    c.execute('''
+        SELECT question, answer, datetime(timestamp, 'localtime')
+        FROM answers WHERE session_id = ? ORDER BY id
+    ''', (session_id,))
+    answers = [
+        {'question': q, 'answer': a, 'timestamp': datetime.fromisoformat(ts).isoformat()}
+        for q, a, ts in c.fetchall()
+    ]
+    conn.close()
+    
+    return {
+        'user_id': row[0],
+        'role': row[1],
+        'category': row[2],
+        'difficulty': None if row[3] == 'mixed' else row[3],
+        'questions': json.loads(row[4]),
+        'current_index': len(answers),
+        'answers': answers,
+        'tab_switches': row[5] or 0,
+        'warning_count': row[6] or 0,
+        'posture_violations': row[7] or 0,
+        'eye_tracking_score': row[8] or 0,
+        'focus_percentage': row[9] or 0,
+        'terminated': bool(row[10]),
+        'terminated_reason': row[11],
+        'start_time': datetime.fromisoformat(row[12]).isoformat()
+    }
+
+def get_interview_session(session_id):
+    """Live interview state for a session, or None if it does not exist"""
+    if SESSION_STORE == 'memory' and session_id in interview_sessions:
+        return interview_sessions[session_id]
+    
+    sess = load_interview_session(session_id)
+    if sess is not None and SESSION_STORE == 'memory':
+        # e.g. after a restart; keep serving it from memory from now on
+        interview_sessions[session_id] = sess
+    return sess
+
 def terminate_interview(session_id, reason):
     """Terminate an interview session"""
-    if session_id in interview_sessions:
-        sess = interview_sessions[session_id]
+    sess = get_interview_session(session_id)
+    if sess is not None:
         sess['terminated'] = True
         sess['terminated_reason'] = reason
         
-        # Update database
+        # Update database (counters are kept by their own increments)
         conn = sqlite3.connect(DB_PATH)
         c = conn.cursor()
         c.execute('''
             UPDATE interview_sessions 
-            SET terminated = 1, terminated_reason = ?, end_time = ?,
-                tab_switches = ?, warning_count = ?
+            SET terminated = 1, terminated_reason = ?, end_time = ?
             WHERE session_id = ?
-        ''', (reason, datetime.now(), sess.get('tab_switches', 0), 
-              sess.get('warning_count', 0), session_id))
+        ''', (reason, datetime.now(), session_id))
         conn.commit()
         conn.close()
 
+def upsert_google_user(uid, email, display_name, photo_url):
+    """Find or create the user for a Google account; returns (user_id, username, existed)"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    # Check if user exists with this Google UID
+    c.execute('SELECT id, username FROM users WHERE google_id = ?', (uid,))
+    user = c.fetchone()
+    
+    if user:
+        conn.close()
+        return user[0], user[1], True
+    
+    # Check if email already exists
+    c.execute('SELECT id, username FROM users WHERE email = ?', (email,))
+    existing = c.fetchone()
+    
+    if existing:
+        # Link Google account to existing user
+        user_id, username = existing
+        c.execute('''
+            UPDATE users 
+            SET google_id = ?, profile_picture = ?, auth_provider = 'google'
+            WHERE id = ?
+        ''', (uid, photo_url, user_id))
+    else:
+        # Create new user
+        # Generate username from display name or email
+        if display_name:
+            base_username = display_name.replace(' ', '_').lower()
+        else:
+            base_username = email.split('@')[0]
+        
+        username = base_username
+        counter = 1
+        while True:
+            c.execute('SELECT id FROM users WHERE username = ?', (username,))
+            if not c.fetchone():
+                break
+            username = f"{base_username}_{counter}"
+            counter += 1
+        
+        c.execute('''
+            INSERT INTO users (username, email, google_id, profile_picture, auth_provider)
+            VALUES (?, ?, ?, ?, 'google')
+        ''', (username, email, uid, photo_url))
+        user_id = c.lastrowid
+    
+    conn.commit()
+    conn.close()
+    return user_id, username, False
+
+def create_user(username, email, password):
+    """Create a local user; raises sqlite3.IntegrityError on duplicates"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    password_hash = hash_password(password)
+    c.execute('''
+        INSERT INTO users (username, email, password_hash)
+        VALUES (?, ?, ?)
+    ''', (username, email, password_hash))
+    
+    conn.commit()
+    user_id = c.lastrowid
+    conn.close()
+    return user_id
+
+def get_user_by_username(username):
+    """Return (id, username, password_hash) or None"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('SELECT id, username, password_hash FROM users WHERE username = ?', (username,))
+    user = c.fetchone()
+    conn.close()
+    return user
+
+def get_username(user_id):
+    """Return the username for a user id, or None"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute('SELECT username FROM users WHERE id = ?', (user_id,))
+    user = c.fetchone()
+    conn.close()
+    return user[0] if user else None
+
+def select_questions(role, category, difficulty, num_questions):
+    """Pick interview questions from the model, with a fallback if it is unavailable"""
+    try:
+        return model.get_questions(
+            role=role,
+            category=category,
+            difficulty=difficulty,
+            num_questions=num_questions
+        )
+    except Exception as model_error:
+        print(f"[WARNING] Model error: {model_error}")
+        print("[INFO] Using fallback questions")
+        # Fallback questions
+        if category.lower() == "technical":
+            all_questions = [
+                "Explain the difference between var, let, and const in JavaScript.",
+                "What is the difference between == and === in JavaScript?",
+                "Explain the concept of closures in JavaScript.",
+                "What is the event loop in JavaScript?",
+                "Explain promises in JavaScript and how they work.",
+                "Explain the concept of REST APIs.",
+                "What is the difference between HTTP and HTTPS?",
+                "Explain the MVC architecture pattern.",
+                "What is the difference between SQL and NoSQL databases?",
+                "Explain object-oriented programming concepts."
+            ]
+        else:
+            all_questions = [
+                "Tell me about a challenging problem you solved at work.",
+                "Describe working with a difficult team member.",
+                "Tell me about a project you are proud of.",
+                "How do you handle tight deadlines and pressure?",
+                "Describe learning a new technology quickly."
+            ]
+        return all_questions[:min(num_questions, len(all_questions))]
+
+def record_interview_start(user_id, session_id, role, category, difficulty, questions):
+    """Insert the interview session row and bump the user's interview count"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('''
+        INSERT INTO interview_sessions 
+        (user_id, session_id, role, category, difficulty, total_questions, questions)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (user_id, session_id, role, category, difficulty or 'mixed', len(questions), json.dumps(questions)))
+    
+    # Update user's total interviews
+    c.execute('UPDATE users SET total_interviews = total_interviews + 1 WHERE id = ?', (user_id,))
+    
+    conn.commit()
+    conn.close()
+
+def store_answer(session_id, question, answer):
+    """Persist a submitted answer"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('''
+        INSERT INTO answers (session_id, question, answer)
+        VALUES (?, ?, ?)
+    ''', (session_id, question, answer))
+    
+    conn.commit()
+    conn.close()
+
+def mark_interview_completed(session_id):
+    """Mark an interview session as completed"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute('''
+        UPDATE interview_sessions 
+        SET completed = 1, end_time = ?
+        WHERE session_id = ?
+    ''', (datetime.now(), session_id))
+    conn.commit()
+    conn.close()
+
+def log_tab_switch(session_id):
+    """Count a tab switch and a warning against the session and log the event
+    
+    The counters are incremented in SQL and read back in the same
+    transaction, so concurrent reports from any worker each get their own
+    count. Returns (tab_switches, warning_count) after this switch.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute('''
+        UPDATE interview_sessions
+        SET tab_switches = COALESCE(tab_switches, 0) + 1, warning_count = COALESCE(warning_count, 0) + 1
+        WHERE session_id = ?
+    ''', (session_id,))
+    # The UPDATE holds the write lock until commit, so this reads our own values
+    c.execute('SELECT tab_switches, warning_count FROM interview_sessions WHERE session_id = ?',
+              (session_id,))
+    tab_switches, warning_count = c.fetchone()
+    insert_event(c, session_id, EVENT_TYPES['tab_switch'][0], value_int=tab_switches)
+    conn.commit()
+    conn.close()
+    return tab_switches, warning_count
+
+def increment_posture_violations(session_id):
+    """Count a posture violation against the session; returns the new total"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute('''
+        UPDATE interview_sessions SET posture_violations = COALESCE(posture_violations, 0) + 1
+        WHERE session_id = ?
+    ''', (session_id,))
+    c.execute('SELECT posture_violations FROM interview_sessions WHERE session_id = ?', (session_id,))
+    posture_violations = c.fetchone()[0]
+    conn.commit()
+    conn.close()
+    return posture_violations
+
+def log_tracking_event(session_id, event):
+    """Store a typed tracking event (see tracking_schema.parse_event)"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    insert_event(c, session_id, *event)
+    conn.commit()
+    conn.close()
+
+def ban_user(user_id, violation_type, hours=24):
+    """Record a violation that bans the user for the given number of hours"""
+    ban_until = datetime.now() + timedelta(hours=hours)
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute('''
+        INSERT INTO user_violations (user_id, violation_type, ban_until)
+        VALUES (?, ?, ?)
+    ''', (user_id, violation_type, ban_until))
+    conn.commit()
+    conn.close()
+    return ban_until
+
+def count_completed_interviews(user_id):
+    """Number of completed interviews for a user"""
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    
+    c.execute('''
+        SELECT COUNT(*) FROM interview_sessions 
+        WHERE user_id = ? AND completed = 1
+    ''', (user_id,))
+    completed = c.fetchone()[0]
+    
+    conn.close()
+    return completed
+
+def save_tracking_metrics(session_id, eye_tracking_score, focus_percentage):
+    """Persist the latest tracking metrics for a session
+    
+    posture_violations is left alone: increment_posture_violations owns it.
+    """
+    conn = sqlite3.connect(DB_PATH)
+    c = conn.cursor()
+    c.execute('''
+        UPDATE interview_sessions 
+        SET eye_tracking_score = ?, focus_percentage = ?
+        WHERE session_id = ?
+    ''', (eye_tracking_score, focus_percentage, session_id))
+    conn.commit()
+    conn.close()
+
+def build_report_data(sess, username):
+    """Prepare session data for the PDF report"""
+    report_data = {
+        'username': username or 'Unknown',
+        'role': sess['role'],
+        'category': sess['category'],
+        'total_questions': len(sess['questions']),
+        'questions': sess['questions'],
+        'answers': sess['answers'],
+        'scores': [],
+        'duration': 0,
+        'tracking_data': {
+            'posture_score': sess.get('posture_score', 0),
+            'eye_contact': sess.get('eye_contact', 0),
+            'focus': sess.get('focus', 0),
+            'tab_switches': sess.get('tab_switches', 0)
+        }
+    }
+    
+    # Calculate duration
+    if 'start_time' in sess:
+        start = datetime.fromisoformat(sess['start_time'])
+        end = datetime.now()
+        duration_minutes = (end - start).total_seconds() / 60
+        report_data['duration'] = round(duration_minutes, 1)
+    
+    return report_data
+
+def render_report_pdf(report_data, user_id, reports_dir='reports'):
+    """Render the PDF report to disk and return its path"""
+    generator = InterviewReportGenerator()
+    
+    # Create reports directory
+    if not os.path.exists(reports_dir):
+        os.makedirs(reports_dir)
+    
+    # Generate PDF file
+    filename = f"interview_report_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+    filepath = os.path.join(reports_dir, filename)
+    
+    generator.generate_pdf_report(report_data, filepath)
+    return filepath
+
 
 @app.route('/')
 def index():
@@ -278,76 +654,18 @@ def google_auth():
         return jsonify({'error': 'Invalid Google authentication data'}), 400
     
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
+        user_id, username, existed = upsert_google_user(uid, email, display_name, photo_url)
         
-        # Check if user exists with this Google UID
-        c.execute('SELECT id, username FROM users WHERE google_id = ?', (uid,))
-        user = c.fetchone()
+        # Set session
+        session['user_id'] = user_id
+        session['username'] = username
+        session['auth_provider'] = 'google'
         
-        if user:
-            # User exists, log them in
-            user_id, username = user
-            session['user_id'] = user_id
-            session['username'] = username
-            session['auth_provider'] = 'google'
-            
-            conn.close()
-            
-            return jsonify({
-                'success': True,
-                'message': 'Login successful',
-                'user': {'id': user_id, 'username': username}
-            })
-        else:
-            # Check if email already exists
-            c.execute('SELECT id, username FROM users WHERE email = ?', (email,))
-            existing = c.fetchone()
-            
-            if existing:
-                # Link Google account to existing user
-                user_id, username = existing
-                c.execute('''
-                    UPDATE users 
-                    SET google_id = ?, profile_picture = ?, auth_provider = 'google'
-                    WHERE id = ?
-                ''', (uid, photo_url, user_id))
-            else:
-                # Create new user
-                # Generate username from display name or email
-                if display_name:
-                    base_username = display_name.replace(' ', '_').lower()
-                else:
-                    base_username = email.split('@')[0]
-                
-                username = base_username
-                counter = 1
-                while True:
-                    c.execute('SELECT id FROM users WHERE username = ?', (username,))
-                    if not c.fetchone():
-                        break
-                    username = f"{base_username}_{counter}"
-                    counter += 1
-                
-                c.execute('''
-                    INSERT INTO users (username, email, google_id, profile_picture, auth_provider)
-                    VALUES (?, ?, ?, ?, 'google')
-                ''', (username, email, uid, photo_url))
-                user_id = c.lastrowid
-            
-            conn.commit()
-            conn.close()
-            
-            # Set session
-            session['user_id'] = user_id
-            session['username'] = username
-            session['auth_provider'] = 'google'
-            
-            return jsonify({
-                'success': True,
-                'message': 'Registration/Login successful',
-                'user': {'id': user_id, 'username': username}
-            })
+        return jsonify({
+            'success': True,
+            'message': 'Login successful' if existed else 'Registration/Login successful',
+            'user': {'id': user_id, 'username': username}
+        })
             
     except Exception as e:
         print(f"Google auth error: {e}")
@@ -369,18 +687,7 @@ def register():
         return jsonify({'error': 'Password must be at least 6 characters'}), 400
     
     try:
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        
-        password_hash = hash_password(password)
-        c.execute('''
-            INSERT INTO users (username, email, password_hash)
-            VALUES (?, ?, ?)
-        ''', (username, email, password_hash))
-        
-        conn.commit()
-        user_id = c.lastrowid
-        conn.close()
+        user_id = create_user(username, email, password)
         
         session['user_id'] = user_id
         session['username'] = username
@@ -404,12 +711,7 @@ def login():
     if not username or not password:
         return jsonify({'error': 'Username and password required'}), 400
     
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    c.execute('SELECT id, username, password_hash FROM users WHERE username = ?', (username,))
-    user = c.fetchone()
-    conn.close()
+    user = get_user_by_username(username)
     
     if not user or not verify_password(user[2], password):
         return jsonify({'error': 'Invalid username or password'}), 401
@@ -546,68 +848,24 @@ def start_interview():
     
     
     # Get questions - with fallback if model not available
-    try:
-        questions = model.get_questions(
-            role=role,
-            category=category,
-            difficulty=difficulty,
-            num_questions=num_questions
-        )
-    except Exception as model_error:
-        print(f"[WARNING] Model error: {model_error}")
-        print("[INFO] Using fallback questions")
-        # Fallback questions
-        if category.lower() == "technical":
-            all_questions = [
-                "Explain the difference between var, let, and const in JavaScript.",
-                "What is the difference between == and === in JavaScript?",
-                "Explain the concept of closures in JavaScript.",
-                "What is the event loop in JavaScript?",
-                "Explain promises in JavaScript and how they work.",
-                "Explain the concept of REST APIs.",
-                "What is the difference between HTTP and HTTPS?",
-                "Explain the MVC architecture pattern.",
-                "What is the difference between SQL and NoSQL databases?",
-                "Explain object-oriented programming concepts."
-            ]
-        else:
-            all_questions = [
-                "Tell me about a challenging problem you solved at work.",
-                "Describe working with a difficult team member.",
-                "Tell me about a project you are proud of.",
-                "How do you handle tight deadlines and pressure?",
-                "Describe learning a new technology quickly."
-            ]
-        questions = all_questions[:min(num_questions, len(all_questions))]
+    questions = select_questions(role, category, difficulty, num_questions)
     
     # Store in database
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    c.execute('''
-        INSERT INTO interview_sessions 
-        (user_id, session_id, role, category, difficulty, total_questions)
-        VALUES (?, ?, ?, ?, ?, ?)
-    ''', (user_id, session_id, role, category, difficulty or 'mixed', len(questions)))
-    
-    # Update user's total interviews
-    c.execute('UPDATE users SET total_interviews = total_interviews + 1 WHERE id = ?', (user_id,))
-    
-    conn.commit()
-    conn.close()
+    record_interview_start(user_id, session_id, role, category, difficulty, questions)
     
     # Store session in memory
-    interview_sessions[session_id] = {
-        'user_id': user_id,
-        'role': role,
-        'category': category,
-        'difficulty': difficulty,
-        'questions': questions,
-        'current_index': 0,
-        'answers': [],
-        'tab_switches': 0,
-        'start_time': datetime.now().isoformat()
-    }
+    if SESSION_STORE == 'memory':
+        interview_sessions[session_id] = {
+            'user_id': user_id,
+            'role': role,
+            'category': category,
+            'difficulty': difficulty,
+            'questions': questions,
+            'current_index': 0,
+            'answers': [],
+            'tab_switches': 0,
+            'start_time': datetime.now().isoformat()
+        }
     
     return jsonify({
         'session_id': session_id,
@@ -621,11 +879,10 @@ def get_question(session_id):
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
     
-    if session_id not in interview_sessions:
+    sess = get_interview_session(session_id)
+    if sess is None:
         return jsonify({'error': 'Session not found'}), 404
     
-    sess = interview_sessions[session_id]
-    
     # Verify session belongs to user
     if sess['user_id'] != session['user_id']:
         return jsonify({'error': 'Unauthorized'}), 403
@@ -651,26 +908,17 @@ def submit_answer(session_id):
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
     
-    if session_id not in interview_sessions:
+    sess = get_interview_session(session_id)
+    if sess is None:
         return jsonify({'error': 'Session not found'}), 404
     
     data = request.json
     answer = data.get('answer', '')
     
-    sess = interview_sessions[session_id]
     idx = sess['current_index']
     
     # Store answer in database
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
-    c.execute('''
-        INSERT INTO answers (session_id, question, answer)
-        VALUES (?, ?, ?)
-    ''', (session_id, sess['questions'][idx], answer))
-    
-    conn.commit()
-    conn.close()
+    store_answer(session_id, sess['questions'][idx], answer)
     
     # Store answer in memory
     sess['answers'].append({
@@ -685,15 +933,7 @@ def submit_answer(session_id):
     # Check if interview is complete
     if sess['current_index'] >= len(sess['questions']):
         # Mark as completed
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('''
-            UPDATE interview_sessions 
-            SET completed = 1, end_time = ?, tab_switches = ?
-            WHERE session_id = ?
-        ''', (datetime.now(), sess['tab_switches'], session_id))
-        conn.commit()
-        conn.close()
+        mark_interview_completed(session_id)
         
         return jsonify({
             'completed': True,
@@ -717,22 +957,13 @@ def report_tab_switch(session_id):
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
     
-    if session_id not in interview_sessions:
+    sess = get_interview_session(session_id)
+    if sess is None:
         return jsonify({'error': 'Session not found'}), 404
     
-    sess = interview_sessions[session_id]
-    sess['tab_switches'] += 1
-    sess['warning_count'] = sess.get('warning_count', 0) + 1
-    
-    # Log the event
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO tracking_events (session_id, event_type, details)
-        VALUES (?, 'tab_switch', ?)
-    ''', (session_id, f"Tab switch #{sess['tab_switches']}"))
-    conn.commit()
-    conn.close()
+    # Counted in the database, so reports served by different workers
+    # can't overwrite each other's increments
+    sess['tab_switches'], sess['warning_count'] = log_tab_switch(session_id)
     
     warning_count = sess['warning_count']
     
@@ -742,15 +973,7 @@ def report_tab_switch(session_id):
         terminate_interview(session_id, 'Too many tab switches (3 strikes)')
         
         # Ban user for 24 hours
-        ban_until = datetime.now() + timedelta(hours=24)
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('''
-            INSERT INTO user_violations (user_id, violation_type, ban_until)
-            VALUES (?, 'tab_switching', ?)
-        ''', (sess['user_id'], ban_until))
-        conn.commit()
-        conn.close()
+        ban_until = ban_user(sess['user_id'], 'tab_switching', hours=24)
         
         return jsonify({
             'terminated': True,
@@ -775,11 +998,10 @@ def get_results(session_id):
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
     
-    if session_id not in interview_sessions:
+    sess = get_interview_session(session_id)
+    if sess is None:
         return jsonify({'error': 'Session not found'}), 404
     
-    sess = interview_sessions[session_id]
-    
     # Generate dynamic report based on answers
     report = generate_dynamic_report(sess)
     
@@ -893,17 +1115,8 @@ def user_stats():
     user_id = session['user_id']
     limits = can_start_interview(user_id)
     
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    
     # Get completed interviews
-    c.execute('''
-        SELECT COUNT(*) FROM interview_sessions 
-        WHERE user_id = ? AND completed = 1
-    ''', (user_id,))
-    completed = c.fetchone()[0]
-    
-    conn.close()
+    completed = count_completed_interviews(user_id)
     
     return jsonify({
         'username': session['username'],
@@ -921,27 +1134,25 @@ def track_event(session_id):
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
     
-    if session_id not in interview_sessions:
+    sess = get_interview_session(session_id)
+    if sess is None:
         return jsonify({'error': 'Session not found'}), 404
     
     data = request.json
-    event_type = data.get('event_type')  # 'posture_violation', 'eye_wander', 'focus_loss', etc.
-    details = data.get('details', '')
+    
+    try:
+        event = parse_event(data)
+    except EventValidationError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    event_type = data['event_type']  # 'posture_violation', 'eye_wander', 'focus_loss', etc.
     
     # Log to database
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
-        INSERT INTO tracking_events (session_id, event_type, details)
-        VALUES (?, ?, ?)
-    ''', (session_id, event_type, details))
-    conn.commit()
-    conn.close()
+    log_tracking_event(session_id, event)
     
     # Update session metrics
-    sess = interview_sessions[session_id]
     if event_type == 'posture_violation':
-        sess['posture_violations'] = sess.get('posture_violations', 0) + 1
+        sess['posture_violations'] = increment_posture_violations(session_id)
     
     return jsonify({'success': True, 'event_logged': event_type})
 
@@ -951,32 +1162,50 @@ def update_tracking_metrics(session_id):
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
     
-    if session_id not in interview_sessions:
+    sess = get_interview_session(session_id)
+    if sess is None:
         return jsonify({'error': 'Session not found'}), 404
     
     data = request.json
     eye_tracking_score = data.get('eye_tracking_score', 0)
     focus_percentage = data.get('focus_percentage', 0)
     
-    # Update in-memory session
-    sess = interview_sessions[session_id]
+    # Update session state
     sess['eye_tracking_score'] = eye_tracking_score
     sess['focus_percentage'] = focus_percentage
     
     # Update database
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute('''
-        UPDATE interview_sessions 
-        SET eye_tracking_score = ?, focus_percentage = ?, posture_violations = ?
-        WHERE session_id = ?
-    ''', (eye_tracking_score, focus_percentage, sess.get('posture_violations', 0), session_id))
-    conn.commit()
-    conn.close()
+    save_tracking_metrics(session_id, eye_tracking_score, focus_percentage)
     
     return jsonify({'success': True})
 
 
+@app.route('/api/admin/analytics', methods=['GET'])
+def admin_analytics():
+    """Aggregated interview metrics served from the rollup tables"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+    
+    if session.get('username') not in ADMIN_USERNAMES:
+        return jsonify({'error': 'Unauthorized'}), 403
+    
+    granularity = request.args.get('granularity', 'daily')
+    group_by = [d for d in request.args.get('group_by', '').split(',') if d]
+    
+    try:
+        result = query_rollups(
+            DB_PATH,
+            granularity=granularity,
+            group_by=group_by,
+            since=request.args.get('since'),
+            until=request.args.get('until')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(result)
+
+
 @app.route('/api/generate-report/<session_id>', methods=['GET'])
 def generate_report(session_id):
     """Generate and download PDF report"""
@@ -985,60 +1214,19 @@ def generate_report(session_id):
     
     try:
         # Get session data
-        if session_id not in interview_sessions:
+        sess = get_interview_session(session_id)
+        if sess is None:
             return jsonify({'error': 'Session not found'}), 404
         
-        sess = interview_sessions[session_id]
-        
         # Verify session belongs to user
         if sess['user_id'] != session['user_id']:
             return jsonify({'error': 'Unauthorized'}), 403
         
-        # Get user info
-        conn = sqlite3.connect(DB_PATH)
-        c = conn.cursor()
-        c.execute('SELECT username FROM users WHERE id = ?', (sess['user_id'],))
-        user = c.fetchone()
-        conn.close()
-        
         # Prepare session data for report
-        report_data = {
-            'username': user[0] if user else 'Unknown',
-            'role': sess['role'],
-            'category': sess['category'],
-            'total_questions': len(sess['questions']),
-            'questions': sess['questions'],
-            'answers': sess['answers'],
-            'scores': [],
-            'duration': 0,
-            'tracking_data': {
-                'posture_score': sess.get('posture_score', 0),
-                'eye_contact': sess.get('eye_contact', 0),
-                'focus': sess.get('focus', 0),
-                'tab_switches': sess.get('tab_switches', 0)
-            }
-        }
-        
-        # Calculate duration
-        if 'start_time' in sess:
-            start = datetime.fromisoformat(sess['start_time'])
-            end = datetime.now()
-            duration_minutes = (end - start).total_seconds() / 60
-            report_data['duration'] = round(duration_minutes, 1)
+        report_data = build_report_data(sess, get_username(sess['user_id']))
         
         # Generate PDF
-        generator = InterviewReportGenerator()
-        
-        # Create reports directory
-        reports_dir = 'reports'
-        if not os.path.exists(reports_dir):
-            os.makedirs(reports_dir)
-        
-        # Generate PDF file
-        filename = f"interview_report_{session['user_id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-        filepath = os.path.join(reports_dir, filename)
-        
-        generator.generate_pdf_report(report_data, filepath)
+        filepath = render_report_pdf(report_data, session['user_id'])
         
         # Send file
         return send_file(
@@ -1071,4 +1259,8 @@ if __name__ == '__main__':
     print("   [OK] Dynamic Report Generation")
     print("\n" + "=" * 60 + "\n")
     
+    # The reloader's watcher process imports the app too; only the
+    # process serving requests runs the background threads
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_tasks()
     app.run(debug=True, port=5000, host='0.0.0.0')
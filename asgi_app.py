@@ -0,0 +1,487 @@
+"""
+Asynchronous Interview System Server (ASGI)
+Serves the same /api/* routes as app.py on Quart. Blocking SQLite calls run
+in a thread pool and PDF rendering runs in a process pool, so the event loop
+keeps answering the frequent small polls candidates make during long
+interview sessions.
+
+Run with:
+    hypercorn asgi_app:app --bind 0.0.0.0:5000 --workers 1
+    python asgi_app.py
+
+Shares the database, model and interview session store with app.py; set
+INTERVIEW_SESSION_STORE=db before running more than one worker.
+The browser redirect Google OAuth flow (/api/auth/google) stays on the Flask
+app; /api/google-auth (Firebase sign-in) is served here.
+"""
+
+import asyncio
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+
+from quart import Quart, request, jsonify, session, send_file
+from quart_cors import cors
+
+import app as core
+from tracking_schema import parse_event, EventValidationError
+from analytics import query_rollups
+
+app = Quart(__name__)
+app.secret_key = core.app.secret_key
+app = cors(app)
+
+# Thread pool for blocking SQLite work, process pool for CPU-bound PDF rendering
+DB_THREADS = int(os.environ.get('ASGI_DB_THREADS', 16))
+REPORT_PROCESSES = int(os.environ.get('ASGI_REPORT_PROCESSES', 2))
+
+db_executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix='db')
+report_executor = None
+
+# Same dict as app.py so both front ends see the same live sessions in-process
+interview_sessions = core.interview_sessions
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking database helper without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, partial(func, *args, **kwargs))
+
+
+async def run_report(func, *args):
+    """Render a report in a worker process"""
+    global report_executor
+    if report_executor is None:
+        report_executor = ProcessPoolExecutor(max_workers=REPORT_PROCESSES)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(report_executor, func, *args)
+
+
+async def get_session_state(session_id):
+    """Live interview state, skipping the thread hop when it is already in memory"""
+    if core.SESSION_STORE == 'memory' and session_id in interview_sessions:
+        return interview_sessions[session_id]
+    return await run_db(core.get_interview_session, session_id)
+
+
+@app.after_serving
+async def shutdown_executors():
+    db_executor.shutdown(wait=False)
+    if report_executor is not None:
+        report_executor.shutdown(wait=False)
+
+
+@app.route('/api/google-auth', methods=['POST'])
+async def google_auth():
+    """Handle Google authentication (login/register)"""
+    data = await request.get_json()
+    uid = data.get('uid')
+    email = data.get('email')
+    display_name = data.get('displayName')
+    photo_url = data.get('photoURL')
+
+    if not uid or not email:
+        return jsonify({'error': 'Invalid Google authentication data'}), 400
+
+    try:
+        user_id, username, existed = await run_db(
+            core.upsert_google_user, uid, email, display_name, photo_url
+        )
+
+        session['user_id'] = user_id
+        session['username'] = username
+        session['auth_provider'] = 'google'
+
+        return jsonify({
+            'success': True,
+            'message': 'Login successful' if existed else 'Registration/Login successful',
+            'user': {'id': user_id, 'username': username}
+        })
+
+    except Exception as e:
+        print(f"Google auth error: {e}")
+        return jsonify({'error': 'Authentication failed'}), 500
+
+
+@app.route('/api/register', methods=['POST'])
+async def register():
+    """Register a new user"""
+    data = await request.get_json()
+    username = data.get('username', '').strip()
+    email = data.get('email', '').strip()
+    password = data.get('password', '')
+
+    if not username or not email or not password:
+        return jsonify({'error': 'All fields are required'}), 400
+
+    if len(password) < 6:
+        return jsonify({'error': 'Password must be at least 6 characters'}), 400
+
+    try:
+        user_id = await run_db(core.create_user, username, email, password)
+    except sqlite3.IntegrityError:
+        return jsonify({'error': 'Username or email already exists'}), 400
+
+    session['user_id'] = user_id
+    session['username'] = username
+
+    return jsonify({
+        'success': True,
+        'message': 'Registration successful',
+        'user': {'id': user_id, 'username': username}
+    })
+
+
+@app.route('/api/login', methods=['POST'])
+async def login():
+    """Login user"""
+    data = await request.get_json()
+    username = data.get('username', '').strip()
+    password = data.get('password', '')
+
+    if not username or not password:
+        return jsonify({'error': 'Username and password required'}), 400
+
+    user = await run_db(core.get_user_by_username, username)
+
+    if not user or not core.verify_password(user[2], password):
+        return jsonify({'error': 'Invalid username or password'}), 401
+
+    session['user_id'] = user[0]
+    session['username'] = user[1]
+
+    return jsonify({
+        'success': True,
+        'message': 'Login successful',
+        'user': {'id': user[0], 'username': user[1]}
+    })
+
+
+@app.route('/api/logout', methods=['POST'])
+async def logout():
+    """Logout user"""
+    session.clear()
+    return jsonify({'success': True, 'message': 'Logged out successfully'})
+
+
+@app.route('/api/check-limits', methods=['GET'])
+async def check_limits():
+    """Check if user can start interview"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    limits = await run_db(core.can_start_interview, session['user_id'])
+    return jsonify(limits)
+
+
+@app.route('/api/start-interview', methods=['POST'])
+async def start_interview():
+    """Start a new interview session"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    user_id = session['user_id']
+
+    limits = await run_db(core.can_start_interview, user_id)
+    if not limits['can_start']:
+        return jsonify({
+            'error': 'Interview limit reached',
+            'limits': limits
+        }), 403
+
+    data = await request.get_json()
+    role = data.get('role', 'Software Engineer')
+    category = data.get('category', 'Technical')
+    difficulty = data.get('difficulty', None)
+    num_questions = data.get('num_questions', 5)
+
+    session_id = f"session_{user_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+
+    # Question selection runs the TF-IDF model, so keep it off the loop too
+    questions = await run_db(core.select_questions, role, category, difficulty, num_questions)
+    await run_db(core.record_interview_start, user_id, session_id, role, category, difficulty, questions)
+
+    if core.SESSION_STORE == 'memory':
+        interview_sessions[session_id] = {
+            'user_id': user_id,
+            'role': role,
+            'category': category,
+            'difficulty': difficulty,
+            'questions': questions,
+            'current_index': 0,
+            'answers': [],
+            'tab_switches': 0,
+            'start_time': datetime.now().isoformat()
+        }
+
+    return jsonify({
+        'session_id': session_id,
+        'total_questions': len(questions),
+        'first_question': questions[0] if questions else None
+    })
+
+
+@app.route('/api/get-question/<session_id>', methods=['GET'])
+async def get_question(session_id):
+    """Get the current question for a session"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    sess = await get_session_state(session_id)
+    if sess is None:
+        return jsonify({'error': 'Session not found'}), 404
+
+    if sess['user_id'] != session['user_id']:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    idx = sess['current_index']
+
+    if idx >= len(sess['questions']):
+        return jsonify({
+            'completed': True,
+            'message': 'Interview completed!'
+        })
+
+    return jsonify({
+        'question': sess['questions'][idx],
+        'question_number': idx + 1,
+        'total_questions': len(sess['questions']),
+        'completed': False
+    })
+
+
+@app.route('/api/submit-answer/<session_id>', methods=['POST'])
+async def submit_answer(session_id):
+    """Submit an answer and get the next question"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    sess = await get_session_state(session_id)
+    if sess is None:
+        return jsonify({'error': 'Session not found'}), 404
+
+    data = await request.get_json()
+    answer = data.get('answer', '')
+
+    idx = sess['current_index']
+
+    await run_db(core.store_answer, session_id, sess['questions'][idx], answer)
+
+    sess['answers'].append({
+        'question': sess['questions'][idx],
+        'answer': answer,
+        'timestamp': datetime.now().isoformat()
+    })
+    sess['current_index'] += 1
+
+    if sess['current_index'] >= len(sess['questions']):
+        await run_db(core.mark_interview_completed, session_id)
+
+        return jsonify({
+            'completed': True,
+            'message': 'Interview completed!',
+            'total_answered': len(sess['answers'])
+        })
+
+    return jsonify({
+        'completed': False,
+        'next_question': sess['questions'][sess['current_index']],
+        'question_number': sess['current_index'] + 1,
+        'total_questions': len(sess['questions'])
+    })
+
+
+@app.route('/api/report-tab-switch/<session_id>', methods=['POST'])
+async def report_tab_switch(session_id):
+    """Report that user switched tabs - implements 3-strike system"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    sess = await get_session_state(session_id)
+    if sess is None:
+        return jsonify({'error': 'Session not found'}), 404
+
+    sess['tab_switches'], sess['warning_count'] = await run_db(core.log_tab_switch, session_id)
+
+    warning_count = sess['warning_count']
+
+    if warning_count >= 3:
+        await run_db(core.terminate_interview, session_id, 'Too many tab switches (3 strikes)')
+        ban_until = await run_db(core.ban_user, sess['user_id'], 'tab_switching', hours=24)
+
+        return jsonify({
+            'terminated': True,
+            'reason': 'Too many tab switches',
+            'ban_until': ban_until.isoformat(),
+            'message': 'Interview terminated. You are banned from taking interviews for 24 hours.'
+        }), 403
+
+    return jsonify({
+        'success': True,
+        'warning': True,
+        'warning_count': warning_count,
+        'total_switches': sess['tab_switches'],
+        'remaining_warnings': 3 - warning_count,
+        'message': f"Warning {warning_count}/3: Please stay focused on the interview. {3 - warning_count} warning(s) remaining."
+    })
+
+
+@app.route('/api/get-results/<session_id>', methods=['GET'])
+async def get_results(session_id):
+    """Get interview results with dynamic report"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    sess = await get_session_state(session_id)
+    if sess is None:
+        return jsonify({'error': 'Session not found'}), 404
+
+    report = core.generate_dynamic_report(sess)
+
+    return jsonify({
+        'role': sess['role'],
+        'category': sess['category'],
+        'difficulty': sess['difficulty'],
+        'total_questions': len(sess['questions']),
+        'total_answered': len(sess['answers']),
+        'tab_switches': sess['tab_switches'],
+        'answers': sess['answers'],
+        'start_time': sess['start_time'],
+        'report': report
+    })
+
+
+@app.route('/api/user-stats', methods=['GET'])
+async def user_stats():
+    """Get user statistics"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    user_id = session['user_id']
+    limits = await run_db(core.can_start_interview, user_id)
+    completed = await run_db(core.count_completed_interviews, user_id)
+
+    return jsonify({
+        'username': session['username'],
+        'total_interviews': limits['total_interviews'],
+        'completed_interviews': completed,
+        'interviews_last_24h': limits['interviews_last_24h'],
+        'remaining_24h': limits['remaining_24h'],
+        'remaining_total': limits['remaining_total'],
+        'can_start': limits['can_start']
+    })
+
+
+@app.route('/api/track-event/<session_id>', methods=['POST'])
+async def track_event(session_id):
+    """Track various monitoring events (posture, eye movement, etc.)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    sess = await get_session_state(session_id)
+    if sess is None:
+        return jsonify({'error': 'Session not found'}), 404
+
+    data = await request.get_json()
+
+    try:
+        event = parse_event(data)
+    except EventValidationError as e:
+        return jsonify({'error': str(e)}), 400
+
+    event_type = data['event_type']
+    await run_db(core.log_tracking_event, session_id, event)
+
+    if event_type == 'posture_violation':
+        sess['posture_violations'] = await run_db(core.increment_posture_violations, session_id)
+
+    return jsonify({'success': True, 'event_logged': event_type})
+
+
+@app.route('/api/update-tracking-metrics/<session_id>', methods=['POST'])
+async def update_tracking_metrics(session_id):
+    """Update tracking metrics (eye tracking score, focus percentage)"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    sess = await get_session_state(session_id)
+    if sess is None:
+        return jsonify({'error': 'Session not found'}), 404
+
+    data = await request.get_json()
+    eye_tracking_score = data.get('eye_tracking_score', 0)
+    focus_percentage = data.get('focus_percentage', 0)
+
+    sess['eye_tracking_score'] = eye_tracking_score
+    sess['focus_percentage'] = focus_percentage
+
+    await run_db(core.save_tracking_metrics, session_id, eye_tracking_score, focus_percentage)
+
+    return jsonify({'success': True})
+
+
+@app.route('/api/admin/analytics', methods=['GET'])
+async def admin_analytics():
+    """Aggregated interview metrics served from the rollup tables"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    if session.get('username') not in core.ADMIN_USERNAMES:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    try:
+        result = await run_db(
+            query_rollups,
+            core.DB_PATH,
+            granularity=request.args.get('granularity', 'daily'),
+            group_by=[d for d in request.args.get('group_by', '').split(',') if d],
+            since=request.args.get('since'),
+            until=request.args.get('until')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify(result)
+
+
+@app.route('/api/generate-report/<session_id>', methods=['GET'])
+async def generate_report(session_id):
+    """Generate and download PDF report"""
+    if 'user_id' not in session:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    sess = await get_session_state(session_id)
+    if sess is None:
+        return jsonify({'error': 'Session not found'}), 404
+
+    if sess['user_id'] != session['user_id']:
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    try:
+        username = await run_db(core.get_username, sess['user_id'])
+        report_data = core.build_report_data(sess, username)
+        filepath = await run_report(core.render_report_pdf, report_data, session['user_id'])
+
+        return await send_file(
+            filepath,
+            mimetype='application/pdf',
+            as_attachment=True,
+            attachment_filename=f"Interview_Report_{report_data['username']}.pdf"
+        )
+
+    except Exception as e:
+        print(f"[ERROR] Report generation failed: {e}")
+        return jsonify({'error': f'Failed to generate report: {str(e)}'}), 500
+
+
+if __name__ == '__main__':
+    print("\n" + "=" * 60)
+    print("ENHANCED INTERVIEW SYSTEM SERVER (ASYNC)")
+    print("=" * 60)
+    print("\nServer starting on http://localhost:5000")
+    print(f"   DB threads: {DB_THREADS}, report processes: {REPORT_PROCESSES}")
+    print("\n" + "=" * 60 + "\n")
+
+    app.run(port=5000, host='0.0.0.0')
@@ -0,0 +1,306 @@
+"""
+Columnar Export of Interview Data
+Streams tracking_events, answers and interview_sessions out of SQLite in
+fixed-size chunks and writes typed Parquet/Arrow files partitioned by day
+
+Usage:
+    python export_tracking.py --out exports
+    python export_tracking.py --out exports --format arrow --since 2024-01-01
+
+Requires pyarrow (pip install pyarrow)
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+from tracking_schema import EVENT_NAMES
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+DEFAULT_DB_PATH = 'interview_system.db'
+DEFAULT_CHUNK_SIZE = 10000
+
+# Row filter on each table's time column; tracking_events stores epoch seconds
+TIME_FILTERS = {
+    'tracking_events': "ts {op} CAST(strftime('%s', ?) AS INTEGER)",
+    'answers': 'timestamp {op} ?',
+    'interview_sessions': 'start_time {op} ?'
+}
+
+
+def _parse_timestamp(value):
+    """Parse SQLite TEXT timestamps ('YYYY-MM-DD HH:MM:SS[.ffffff]')"""
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+def _event_row(row):
+    row['timestamp'] = datetime.fromtimestamp(row['ts'], tz=timezone.utc).replace(tzinfo=None)
+    row['event_type'] = EVENT_NAMES.get(row['event_code'], 'other')
+    if row['event_type'] == 'other' and row['payload']:
+        # Migrated rows keep their original free-text type in the payload
+        row['event_type'] = json.loads(row['payload']).get('event_type', 'other')
+    return row
+
+
+def _answer_row(row):
+    row['timestamp'] = _parse_timestamp(row['timestamp'])
+    answer = row['answer'] or ''
+    row['skipped'] = answer == '[Skipped]'
+    row['answer_length'] = 0 if row['skipped'] else len(answer)
+    return row
+
+
+def _session_row(row):
+    for key in ('start_time', 'end_time'):
+        if key in row:
+            row[key] = _parse_timestamp(row[key])
+    for key in ('completed', 'terminated'):
+        if key in row and row[key] is not None:
+            row[key] = bool(row[key])
+    return row
+
+
+# table -> (partition timestamp, row transform, derived columns, typed columns)
+# The typed columns are built lazily because pyarrow is optional
+def _export_specs():
+    return {
+        'tracking_events': ('timestamp', _event_row, {'timestamp', 'event_type'}, [
+            ('id', pa.int64()),
+            ('session_id', pa.dictionary(pa.int32(), pa.string())),
+            ('event_code', pa.int8()),
+            ('event_type', pa.dictionary(pa.int8(), pa.string())),
+            ('ts', pa.int64()),
+            ('timestamp', pa.timestamp('us')),
+            ('value_int', pa.int32()),
+            ('value_real', pa.float32()),
+            ('payload', pa.string())
+        ]),
+        'answers': ('timestamp', _answer_row, {'answer_length', 'skipped'}, [
+            ('id', pa.int64()),
+            ('session_id', pa.dictionary(pa.int32(), pa.string())),
+            ('question', pa.string()),
+            ('answer', pa.string()),
+            ('answer_length', pa.int32()),
+            ('skipped', pa.bool_()),
+            ('timestamp', pa.timestamp('us'))
+        ]),
+        'interview_sessions': ('start_time', _session_row, set(), [
+            ('id', pa.int64()),
+            ('user_id', pa.int64()),
+            ('session_id', pa.string()),
+            ('role', pa.dictionary(pa.int16(), pa.string())),
+            ('category', pa.dictionary(pa.int8(), pa.string())),
+            ('difficulty', pa.dictionary(pa.int8(), pa.string())),
+            ('total_questions', pa.int16()),
+            ('completed', pa.bool_()),
+            ('tab_switches', pa.int16()),
+            ('posture_violations', pa.int32()),
+            ('eye_tracking_score', pa.float32()),
+            ('focus_percentage', pa.float32()),
+            ('terminated', pa.bool_()),
+            ('terminated_reason', pa.string()),
+            ('warning_count', pa.int16()),
+            ('start_time', pa.timestamp('us')),
+            ('end_time', pa.timestamp('us'))
+        ])
+    }
+
+
+def _plain_schema(schema):
+    """schema with dictionary columns stored as their plain value type"""
+    return pa.schema([
+        pa.field(field.name, field.type.value_type) if pa.types.is_dictionary(field.type) else field
+        for field in schema
+    ])
+
+
+class PartitionedWriter:
+    """Writes record batches into per-day files under <out>/<table>/date=<day>/
+
+    Rows arrive in id order, which is roughly time order, so a day's file is
+    closed as soon as a later day starts and only a couple of files are open
+    at a time. A straggler row for a day already closed goes into a further
+    file in that day's directory (data-1.parquet, ...).
+
+    The Arrow IPC file format can't replace a dictionary between batches,
+    so dictionary columns are written as plain strings there.
+    """
+
+    def __init__(self, out_dir, table, schema, file_format='parquet'):
+        self.out_dir = out_dir
+        self.table = table
+        self.schema = schema if file_format == 'parquet' else _plain_schema(schema)
+        self.file_format = file_format
+        self.writers = {}
+        self.files = {}  # day -> files opened so far
+        self.rows_written = 0
+
+    def _writer_for(self, day):
+        if day not in self.writers:
+            # Dates sort as strings; 'unknown' sorts after them and stays open
+            for earlier in [open_day for open_day in self.writers if open_day < day]:
+                self.writers.pop(earlier).close()
+
+            partition = os.path.join(self.out_dir, self.table, f'date={day}')
+            os.makedirs(partition, exist_ok=True)
+            part = self.files.get(day, 0)
+            self.files[day] = part + 1
+            name = 'data' if not part else f'data-{part}'
+            if self.file_format == 'parquet':
+                path = os.path.join(partition, f'{name}.parquet')
+                self.writers[day] = pq.ParquetWriter(path, self.schema, compression='zstd')
+            else:
+                path = os.path.join(partition, f'{name}.arrow')
+                self.writers[day] = pa.ipc.new_file(path, self.schema)
+        return self.writers[day]
+
+    def write(self, day, rows):
+        columns = {
+            field.name: [row.get(field.name) for row in rows]
+            for field in self.schema
+        }
+        batch = pa.RecordBatch.from_pydict(columns, schema=self.schema)
+        writer = self._writer_for(day)
+        if self.file_format == 'parquet':
+            writer.write_batch(batch)
+        else:
+            writer.write(batch)
+        self.rows_written += len(rows)
+
+    def close(self):
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+
+def export_table(conn, table, out_dir, file_format='parquet', chunk_size=DEFAULT_CHUNK_SIZE,
+                 since=None, until=None):
+    """Stream one table into day-partitioned columnar files
+
+    Only chunk_size rows are held in memory at a time. Returns the number
+    of rows written.
+    """
+    time_column, transform, derived, typed_columns = _export_specs()[table]
+
+    # Older databases may predate some columns; export whatever exists
+    c = conn.cursor()
+    c.execute(f'PRAGMA table_info({table})')
+    existing = {row[1] for row in c.fetchall()}
+    if not existing:
+        return 0
+    if table == 'tracking_events' and 'event_code' not in existing:
+        raise RuntimeError("tracking_events uses the legacy layout; run 'python tracking_schema.py' first")
+
+    fields = [pa.field(name, dtype) for name, dtype in typed_columns
+              if name in existing or name in derived]
+    columns = [name for name, _ in typed_columns if name in existing and name not in derived]
+    schema = pa.schema(fields)
+
+    where = []
+    params = []
+    if since:
+        where.append(TIME_FILTERS[table].format(op='>='))
+        params.append(since)
+    if until:
+        where.append(TIME_FILTERS[table].format(op='<'))
+        params.append(until)
+
+    c.execute(f'''
+        SELECT {', '.join(columns)} FROM {table}
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY id
+    ''', params)
+
+    writer = PartitionedWriter(out_dir, table, schema, file_format)
+    try:
+        while True:
+            chunk = c.fetchmany(chunk_size)
+            if not chunk:
+                break
+
+            by_day = {}
+            for values in chunk:
+                row = transform(dict(zip(columns, values)))
+                stamp = row.get(time_column)
+                day = stamp.strftime('%Y-%m-%d') if stamp else 'unknown'
+                by_day.setdefault(day, []).append(row)
+
+            for day, rows in sorted(by_day.items()):
+                writer.write(day, rows)
+    finally:
+        writer.close()
+
+    return writer.rows_written
+
+
+def export_all(db_path=DEFAULT_DB_PATH, out_dir='exports', file_format='parquet',
+               chunk_size=DEFAULT_CHUNK_SIZE, since=None, until=None, tables=None):
+    """Export every supported table; returns {table: rows_written}"""
+    if pa is None:
+        raise RuntimeError("pyarrow is required for columnar export (pip install pyarrow)")
+
+    conn = sqlite3.connect(db_path)
+    try:
+        results = {}
+        for table in tables or _export_specs().keys():
+            results[table] = export_table(
+                conn, table, out_dir,
+                file_format=file_format,
+                chunk_size=chunk_size,
+                since=since,
+                until=until
+            )
+        return results
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export interview data to Parquet/Arrow')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help='SQLite database path')
+    parser.add_argument('--out', default='exports', help='Output directory')
+    parser.add_argument('--format', choices=['parquet', 'arrow'], default='parquet')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help='Rows held in memory per chunk')
+    parser.add_argument('--since', help='Only rows at or after this date (YYYY-MM-DD)')
+    parser.add_argument('--until', help='Only rows before this date (YYYY-MM-DD)')
+    parser.add_argument('--tables', nargs='+', choices=['tracking_events', 'answers', 'interview_sessions'])
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("INTERVIEW DATA EXPORT")
+    print("=" * 60)
+
+    results = export_all(
+        db_path=args.db,
+        out_dir=args.out,
+        file_format=args.format,
+        chunk_size=args.chunk_size,
+        since=args.since,
+        until=args.until,
+        tables=args.tables
+    )
+
+    for table, rows in results.items():
+        print(f"[OK] {table}: {rows} rows")
+    print(f"\nFiles written to {os.path.abspath(args.out)}")
+
+
+if __name__ == '__main__':
+    main()
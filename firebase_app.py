@@ -17,7 +17,7 @@ from train_model import InterviewModel
 import secrets
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
-app.secret_key = secrets.token_hex(32)
+app.secret_key = os.environ.get('SECRET_KEY') or secrets.token_hex(32)
 CORS(app)
 
 # Initialize Firebase Admin SDK
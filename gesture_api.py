@@ -4,115 +4,507 @@ Provides REST endpoints for the interview system to access gesture data
 """
 
 from flask import Flask, Response, jsonify, request
-import cv2
 import json
+import os
 import threading
 import time
-from gesture_recognition import GestureRecognizer
+from gesture_recognition import (GestureRecognizer, DEFAULT_DETECTOR_PROFILE, DEFAULT_INFERENCE_WIDTH,
+                                 DETECTOR_PROFILES, parse_detector_intervals)
+from gesture_pipeline import FramePool, FrameRateGovernor, FrameRing, StageStats, VersionedBuffer
+from gesture_sessions import (GestureSessionManager, SessionLimitError, SessionModeError,
+                              MAX_SESSIONS, SESSION_CPU_BUDGET, SESSION_IDLE_SECONDS)
+from gesture_workers import ProcessInferenceBackend
+from gesture_landmarks import decode_frames, LandmarkFormatError
+from gesture_events import live_state
+from gesture_imports import lazy_import
+from werkzeug.utils import secure_filename
+import struct
 import base64
 import numpy as np
 
+# Loaded when the camera starts or the first frame is decoded, so the
+# server and its health/stats endpoints come up without it
+cv2 = lazy_import('cv2')
+
+
+# Keep rendering overlays this long after the last /frame snapshot request
+SNAPSHOT_RENDER_SECONDS = 5.0
+
+# Frames buffered between pipeline stages before the oldest is dropped
+PIPELINE_RING_SIZE = 2
+
+# Share of one core the camera recognizer may spend on inference before the
+# governor lowers its frame rate and then its inference width (0 = no limit)
+CAMERA_CPU_BUDGET = 1.0
+
+# Highest inference rate the governor allows, camera and sessions alike
+GOVERNOR_MAX_FPS = 30.0
+
+# Most state events per second sent to each /events subscriber; changes in
+# between are coalesced into the latest state
+STATE_EVENTS_MAX_RATE = 5.0
+
+# Comment line sent on idle /events streams so proxies keep them open
+SSE_KEEPALIVE_SECONDS = 15.0
+
+# How long stop_camera waits for each pipeline thread to exit
+PIPELINE_JOIN_SECONDS = 2.0
+
+# Largest single uploaded frame accepted by the session endpoints
+MAX_UPLOAD_FRAME_BYTES = 2 * 1024 * 1024
+LANDMARKS_ONLY_MESSAGE = "Session was created with mode 'landmarks'; POST to /landmarks instead of frames"
+
+# Directory for per-frame gesture timeline files; unset keeps timelines
+# in memory only (the most recent frames of each recognizer)
+GESTURE_TIMELINE_DIR = os.environ.get('GESTURE_TIMELINE_DIR')
+
+
+def timeline_path(name):
+    """Timeline file for a recognizer, or None when not persisting timelines"""
+    if not GESTURE_TIMELINE_DIR:
+        return None
+    os.makedirs(GESTURE_TIMELINE_DIR, exist_ok=True)
+    return os.path.join(GESTURE_TIMELINE_DIR, f'{secure_filename(name) or "session"}.timeline')
+
+
+def recognizer_options(**options):
+    """GestureRecognizer arguments with defaults from GESTURE_* variables"""
+    options.setdefault('detector_intervals',
+                       parse_detector_intervals(os.environ.get('GESTURE_DETECTOR_INTERVALS')))
+    options.setdefault('inference_width',
+                       int(os.environ.get('GESTURE_INFERENCE_WIDTH', DEFAULT_INFERENCE_WIDTH)))
+    options.setdefault('profile', os.environ.get('GESTURE_DETECTOR_PROFILE', DEFAULT_DETECTOR_PROFILE))
+    options.setdefault('face_roi', os.environ.get('GESTURE_FACE_ROI', '0') == '1')
+    return options
+
+
+def create_recognizer(**options):
+    """GestureRecognizer configured from the GESTURE_* environment variables"""
+    return GestureRecognizer(**recognizer_options(**options))
+
+
+class CameraBusyError(RuntimeError):
+    """Raised when the camera is started while the last pipeline is still exiting"""
+
 
 class GestureAPI:
-    """API wrapper for gesture recognition system"""
+    """API wrapper for gesture recognition system
     
-    def __init__(self):
-        self.recognizer = GestureRecognizer()
+    Frames flow through three threads connected by drop-oldest rings:
+    capture (read + mirror) -> inference (gestures + overlays) -> encode
+    (JPEG for the video feed). A slow stage drops frames instead of
+    letting them queue up, which keeps end-to-end latency bounded.
+    
+    Frames live in buffers from a shared FramePool: capture mirrors into a
+    pooled buffer, inference draws into it in place, and it returns to the
+    pool once it is encoded (or dropped) and no longer the current frame.
+    
+    A FrameRateGovernor paces the inference stage to stay within
+    GESTURE_CPU_BUDGET, lowering the frame rate (and then inference width)
+    under load instead of falling behind the camera.
+    """
+    
+    def __init__(self, render_mode=None, ring_size=None):
+        # A new timeline file per server start; a fixed name would be resumed
+        # and grow across restarts
+        self.recognizer = create_recognizer(timeline_path=timeline_path(time.strftime('camera-%Y%m%d-%H%M%S')))
         self.camera = None
         self.is_running = False
         self.current_frame = None
-        self.current_gestures = {}
         self.lock = threading.Lock()
         
-    def start_camera(self, camera_index=0):
-        """Start camera capture"""
+        # Each rendered frame is JPEG-encoded once and shared by every
+        # video_feed stream and /frame snapshot
+        self.jpeg_buffer = VersionedBuffer()
+        # Gesture/warning state, versioned only when it changes, for /events
+        self.live_state = VersionedBuffer()
+        self._snapshot_cache = (0, None)
+        
+        # 'auto' draws landmarks/indicators only while someone is watching
+        # (a video_feed client or recent /frame snapshots); 'always' and
+        # 'never' force it on or off
+        self.render_mode = render_mode or os.environ.get('GESTURE_RENDER', 'auto')
+        if self.render_mode not in ('auto', 'always', 'never'):
+            raise ValueError("render_mode must be 'auto', 'always' or 'never'")
+        self.viewers = 0
+        self.last_snapshot_request = 0.0
+        
+        # Pipeline stages
+        ring_size = ring_size or int(os.environ.get('GESTURE_RING_SIZE', PIPELINE_RING_SIZE))
+        self.frame_pool = FramePool()
+        self.capture_ring = FrameRing(ring_size, on_drop=self._release_item)
+        self.encode_ring = FrameRing(ring_size, on_drop=self._release_item)
+        self.stage_stats = {
+            'capture': StageStats(),
+            'inference': StageStats(),
+            'encode': StageStats(),
+            'end_to_end': StageStats()
+        }
+        self.governor = FrameRateGovernor(
+            budget=float(os.environ.get('GESTURE_CPU_BUDGET', CAMERA_CPU_BUDGET)),
+            max_fps=float(os.environ.get('GESTURE_MAX_FPS', GOVERNOR_MAX_FPS)),
+            inference_width=self.recognizer.inference_width
+        )
+        self._threads = []
+        
+    def start_camera(self, camera_index=0, profile=None):
+        """Start camera capture, optionally switching detector profile first"""
+        # A second pipeline must never share the recognizer with a stuck one
+        if self._threads and not self._join_threads(PIPELINE_JOIN_SECONDS):
+            raise CameraBusyError('The previous camera pipeline is still stopping; try again shortly')
+        if not self.is_running and self.camera is not None:
+            # Left open by a stop that timed out waiting for the capture thread
+            self.camera.release()
+            self.camera = None
+        if profile is not None and profile != self.recognizer.profile:
+            if self.is_running:
+                raise RuntimeError(f"Camera is running with the '{self.recognizer.profile}' profile; stop it first")
+            self.recognizer.set_profile(profile)
         if self.camera is None or not self.camera.isOpened():
             self.camera = cv2.VideoCapture(camera_index)
             self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
             self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
             self.camera.set(cv2.CAP_PROP_FPS, 30)
+            # Don't let the driver queue stale frames; the capture ring
+            # decides what gets dropped
+            self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
             
             if self.camera.isOpened():
                 self.is_running = True
-                # Start processing thread
-                threading.Thread(target=self._process_frames, daemon=True).start()
+                self.capture_ring.reset()
+                self.encode_ring.reset()
+                self.jpeg_buffer.reopen()
+                self.live_state.reopen()
+                
+                # Start pipeline threads
+                self._threads = [
+                    threading.Thread(target=target, name=f'gesture-{name}', daemon=True)
+                    for name, target in (
+                        ('capture', self._capture_frames),
+                        ('inference', self._process_frames),
+                        ('encode', self._encode_frames)
+                    )
+                ]
+                for thread in self._threads:
+                    thread.start()
                 return True
         return False
     
     def stop_camera(self):
         """Stop camera capture"""
         self.is_running = False
+        self.capture_ring.close()
+        self.encode_ring.close()
+        self.jpeg_buffer.close()
+        self.live_state.close()
+        
+        # Let the capture thread finish its read before releasing the device
+        if not self._join_threads(PIPELINE_JOIN_SECONDS):
+            # A stage stuck in MediaPipe or a camera read still holds the
+            # recognizer and device; start_camera waits for it to exit
+            print(f"[WARNING] Camera pipeline threads still running: {', '.join(t.name for t in self._threads)}")
+            return
+        
         if self.camera:
             self.camera.release()
             self.camera = None
     
-    def _process_frames(self):
-        """Process frames in background thread"""
-        while self.is_running and self.camera and self.camera.isOpened():
-            ret, frame = self.camera.read()
+    def _join_threads(self, timeout):
+        """Join the pipeline threads; True once none of them is running"""
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout=timeout)
+        self._threads = [thread for thread in self._threads
+                         if thread.is_alive() and thread is not threading.current_thread()]
+        return not self._threads
+    
+    def should_render(self):
+        """Whether the current frame needs landmarks and indicators drawn"""
+        if self.render_mode != 'auto':
+            return self.render_mode == 'always'
+        return self.viewers > 0 or time.time() - self.last_snapshot_request < SNAPSHOT_RENDER_SECONDS
+    
+    def _release_item(self, item):
+        """Return a (frame, captured_at) item's buffer to the pool"""
+        self.frame_pool.release(item[0])
+    
+    def _capture_frames(self):
+        """Capture stage: read and mirror camera frames"""
+        camera = self.camera
+        raw = None  # the driver decodes into the same buffer every frame
+        while self.is_running and camera.isOpened():
+            with self.stage_stats['capture'].time():
+                ret, raw = camera.read(raw)
+                captured_at = time.perf_counter()
+                if ret:
+                    # Mirror frame
+                    frame = self.frame_pool.acquire(raw.shape)
+                    cv2.flip(raw, 1, dst=frame)
             
             if ret:
-                # Mirror frame
-                frame = cv2.flip(frame, 1)
-                
+                self.capture_ring.put((frame, captured_at))
+            else:
+                time.sleep(0.01)
+    
+    def _process_frames(self):
+        """Inference stage: detect gestures on the freshest captured frame"""
+        # Build the MediaPipe graphs here, not in the request that started
+        # the camera; frames captured meanwhile are dropped by the ring
+        self.recognizer.load_detectors()
+        while self.is_running:
+            # Frames captured while waiting for the governor's next slot
+            # are dropped by the ring
+            delay = self.governor.wait_time()
+            if delay > 0:
+                time.sleep(min(delay, 0.5))
+                continue
+            
+            item = self.capture_ring.get(timeout=0.5, latest=True)
+            if item is None:
+                continue
+            frame, captured_at = item
+            
+            started = time.perf_counter()
+            with self.stage_stats['inference'].time():
                 # Process with gesture recognition
-                processed_frame, gestures = self.recognizer.process_frame(frame)
-                
-                # Draw indicators
-                display_frame = self.recognizer.draw_gesture_indicators(
-                    processed_frame, gestures
-                )
+                render = self.should_render()
+                processed_frame, gestures = self.recognizer.process_frame(frame, draw=render)
                 
-                # Update shared state
-                with self.lock:
-                    self.current_frame = display_frame
-                    self.current_gestures = gestures
+                # Draw indicators (in place)
+                if render:
+                    self.recognizer.draw_gesture_indicators(processed_frame, gestures)
+            self.governor.record(time.perf_counter() - started, started)
+            self.recognizer.inference_width = self.governor.inference_width
+            
+            # Update shared state; current_frame holds its own reference.
+            # Gestures and stats are read from the recognizer's snapshot.
+            self.frame_pool.retain(frame)
+            with self.lock:
+                previous = self.current_frame
+                self.current_frame = frame
+            if previous is not None:
+                self.frame_pool.release(previous)
+            self.live_state.update(live_state(gestures, self.recognizer.events))
             
-            time.sleep(0.01)  # ~100 FPS max
+            if render:
+                # The encode stage releases the capture reference
+                self.encode_ring.put((frame, captured_at))
+            else:
+                self.frame_pool.release(frame)
+                self.stage_stats['end_to_end'].record(time.perf_counter() - captured_at)
+    
+    def _encode_frames(self):
+        """Encode stage: JPEG-encode rendered frames for the video feed"""
+        while self.is_running:
+            item = self.encode_ring.get(timeout=0.5, latest=True)
+            if item is None:
+                continue
+            frame, captured_at = item
+            
+            with self.stage_stats['encode'].time():
+                ret, buffer = cv2.imencode('.jpg', frame)
+            self.frame_pool.release(frame)
+            
+            if ret:
+                self.jpeg_buffer.publish(buffer.tobytes())
+                self.stage_stats['end_to_end'].record(time.perf_counter() - captured_at)
     
-    def get_current_frame(self):
-        """Get current processed frame"""
+    def get_pipeline_stats(self):
+        """Per-stage latency, ring depth, dropped frame and buffer counts"""
+        return {
+            'stages': {name: stats.summary() for name, stats in self.stage_stats.items()},
+            'capture_ring': {
+                'depth': len(self.capture_ring),
+                'frames': self.capture_ring.put_count,
+                'dropped': self.capture_ring.dropped
+            },
+            'encode_ring': {
+                'depth': len(self.encode_ring),
+                'frames': self.encode_ring.put_count,
+                'dropped': self.encode_ring.dropped
+            },
+            'frame_pool': self.frame_pool.stats()
+        }
+    
+    def get_current_frame(self, out=None):
+        """Get current processed frame
+        
+        The pipeline reuses its buffers, so this returns a copy; pass out
+        (an array of the frame's shape) to copy into it instead of
+        allocating a new one.
+        """
         with self.lock:
-            return self.current_frame.copy() if self.current_frame is not None else None
+            if self.current_frame is None:
+                return None
+            if out is None:
+                return self.current_frame.copy()
+            np.copyto(out, self.current_frame)
+            return out
     
     def get_current_gestures(self):
-        """Get current gesture data"""
-        with self.lock:
-            return self.current_gestures.copy()
+        """Get current gesture data (lock-free, from the recognizer snapshot)"""
+        return dict(self.recognizer.snapshot.gestures)
     
     def get_session_stats(self):
-        """Get session statistics"""
+        """Get session statistics (lock-free, from the recognizer snapshot)"""
         return self.recognizer.get_session_stats()
     
+    def get_snapshot(self, timeout=1.0):
+        """Latest JPEG as base64 for /frame, or None if nothing is rendered
+        
+        If frames weren't being rendered before this request, waits for the
+        encode stage to publish a fresh one rather than returning a stale
+        JPEG. The base64 text is computed once per frame version.
+        """
+        was_rendering = self.should_render()
+        self.last_snapshot_request = time.time()
+        
+        version, jpeg = self.jpeg_buffer.latest()
+        if not was_rendering or jpeg is None:
+            version, jpeg = self.jpeg_buffer.wait_newer(version, timeout)
+            if jpeg is None:
+                return None
+        
+        with self.lock:
+            cached_version, encoded = self._snapshot_cache
+            if cached_version != version:
+                encoded = base64.b64encode(jpeg).decode('utf-8')
+                self._snapshot_cache = (version, encoded)
+        return encoded
+    
     def generate_frames(self):
         """Generate frames for video streaming"""
-        while self.is_running:
-            frame = self.get_current_frame()
-            
-            if frame is not None:
-                # Encode frame as JPEG
-                ret, buffer = cv2.imencode('.jpg', frame)
+        # Counted as a viewer until the client disconnects and the
+        # server closes this generator
+        with self.lock:
+            self.viewers += 1
+        
+        try:
+            version = 0
+            while self.is_running:
+                # Sleep until the encode stage publishes a newer frame
+                new_version, frame_bytes = self.jpeg_buffer.wait_newer(version, timeout=1.0)
+                if new_version == version or frame_bytes is None:
+                    continue
+                version = new_version
                 
-                if ret:
-                    frame_bytes = buffer.tobytes()
-                    yield (b'--frame\r\n'
-                           b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            
-            time.sleep(0.033)  # ~30 FPS
+                # Yield the shared bytes as-is rather than concatenating a copy
+                yield b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+                yield frame_bytes
+                yield b'\r\n'
+        finally:
+            with self.lock:
+                self.viewers -= 1
+
+
+def state_events(buffer, alive, max_rate=STATE_EVENTS_MAX_RATE):
+    """Server-Sent Events for a live state buffer
+    
+    Sends the current state, then one 'state' event per change, at most
+    max_rate per second: changes arriving faster are coalesced and only
+    the newest is sent. Idle streams get keep-alive comments. Ends once
+    alive() returns False.
+    """
+    def event(version, state):
+        return f'id: {version}\nevent: state\ndata: {json.dumps(state)}\n\n'
+    
+    interval = 1 / max_rate
+    # Reconnect hint; also flushes the response headers straight away
+    yield 'retry: 3000\n\n'
+    version, state = buffer.latest()
+    if state is not None:
+        yield event(version, state)
+    sent_at = time.perf_counter()
+    
+    while alive():
+        new_version, state = buffer.wait_newer(version, timeout=SSE_KEEPALIVE_SECONDS)
+        if new_version == version:
+            yield ': keep-alive\n\n'
+            continue
+        
+        delay = sent_at + interval - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+            new_version, state = buffer.latest()
+        version = new_version
+        sent_at = time.perf_counter()
+        yield event(version, state)
+
+
+def event_stream_response(buffer, alive):
+    """text/event-stream Response; ?max_rate= lowers the update rate"""
+    max_rate = min(request.args.get('max_rate', STATE_EVENTS_MAX_RATE, type=float) or STATE_EVENTS_MAX_RATE,
+                   STATE_EVENTS_MAX_RATE)
+    return Response(
+        state_events(buffer, alive, max(max_rate, 0.1)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 
 # Create Flask app
 app = Flask(__name__)
 gesture_api = GestureAPI()
 
+# Where uploaded-session inference runs: 'thread' (this process) or
+# 'process' (gesture_workers pool, one process per core by default)
+GESTURE_BACKEND = os.environ.get('GESTURE_BACKEND', 'thread')
+_process_backend = None
+_process_backend_lock = threading.Lock()
+
+
+def create_session_recognizer(session_id, **options):
+    """Recognizer for an uploaded-frame session on the configured backend"""
+    global _process_backend
+    options.setdefault('timeline_path', timeline_path(session_id))
+    options = recognizer_options(**options)
+    if GESTURE_BACKEND != 'process' or options['profile'] == 'landmarks':
+        return GestureRecognizer(headless=True, **options)
+    
+    # Started on first use: spawned workers re-import this module, and must
+    # not start pools of their own
+    with _process_backend_lock:
+        if _process_backend is None:
+            _process_backend = ProcessInferenceBackend(
+                processes=int(os.environ.get('GESTURE_PROCESSES', 0)) or None
+            )
+    return _process_backend.create_recognizer(session_id, **options)
+
+
+# Server-side analysis of frames uploaded by candidates' browsers, one
+# headless recognizer per interview session
+session_manager = GestureSessionManager(
+    create_session_recognizer,
+    workers=int(os.environ.get('GESTURE_WORKERS', (os.cpu_count() or 4) * (2 if GESTURE_BACKEND == 'process' else 1))),
+    max_sessions=int(os.environ.get('GESTURE_MAX_SESSIONS', MAX_SESSIONS)),
+    idle_timeout=int(os.environ.get('GESTURE_SESSION_IDLE_SECONDS', SESSION_IDLE_SECONDS)),
+    session_cpu_budget=float(os.environ.get('GESTURE_SESSION_CPU_BUDGET', SESSION_CPU_BUDGET)),
+    cpu_budget=float(os.environ.get('GESTURE_SERVER_CPU_BUDGET', os.cpu_count() or 4)),
+    max_fps=float(os.environ.get('GESTURE_MAX_FPS', GOVERNOR_MAX_FPS))
+)
+
 
 @app.route('/api/gesture/start', methods=['POST'])
 def start_gesture_recognition():
     """Start gesture recognition"""
     try:
-        camera_index = request.json.get('camera_index', 0) if request.json else 0
+        data = request.get_json(silent=True) or {}
+        camera_index = data.get('camera_index', 0)
         
-        if gesture_api.start_camera(camera_index):
+        # Detector profile for this run; graphs outside it are never loaded
+        profile = data.get('profile')
+        if profile is not None and profile not in DETECTOR_PROFILES:
+            return jsonify({
+                'success': False,
+                'message': f"profile must be one of: {', '.join(DETECTOR_PROFILES)}"
+            }), 400
+        if profile is not None and gesture_api.is_running and profile != gesture_api.recognizer.profile:
+            return jsonify({
+                'success': False,
+                'message': f"Already running with the '{gesture_api.recognizer.profile}' profile; stop first"
+            }), 409
+        
+        if gesture_api.start_camera(camera_index, profile=profile):
             return jsonify({
                 'success': True,
                 'message': 'Gesture recognition started'
@@ -123,6 +515,9 @@ def start_gesture_recognition():
                 'message': 'Failed to start camera'
             }), 500
     
+    except CameraBusyError as e:
+        return jsonify({'success': False, 'message': str(e)}), 409
+    
     except Exception as e:
         return jsonify({
             'success': False,
@@ -157,6 +552,10 @@ def get_gesture_status():
         return jsonify({
             'success': True,
             'is_running': gesture_api.is_running,
+            'rendering': gesture_api.should_render(),
+            'viewers': gesture_api.viewers,
+            'pipeline': gesture_api.get_pipeline_stats(),
+            'governor': gesture_api.governor.get_state(),
             'current_gestures': gestures,
             'stats': stats
         })
@@ -194,25 +593,25 @@ def video_feed():
     )
 
 
+@app.route('/api/gesture/events')
+def stream_gesture_events():
+    """Server-Sent Events with the camera session's gesture and warning state"""
+    return event_stream_response(gesture_api.live_state, lambda: gesture_api.is_running)
+
+
 @app.route('/api/gesture/frame', methods=['GET'])
 def get_current_frame():
     """Get current frame as base64 encoded image"""
     try:
-        frame = gesture_api.get_current_frame()
+        # Reuses the JPEG encoded for the video feed
+        frame_base64 = gesture_api.get_snapshot()
         
-        if frame is not None:
-            # Encode frame as JPEG
-            ret, buffer = cv2.imencode('.jpg', frame)
-            
-            if ret:
-                # Convert to base64
-                frame_base64 = base64.b64encode(buffer).decode('utf-8')
-                
-                return jsonify({
-                    'success': True,
-                    'frame': frame_base64,
-                    'gestures': gesture_api.get_current_gestures()
-                })
+        if frame_base64 is not None:
+            return jsonify({
+                'success': True,
+                'frame': frame_base64,
+                'gestures': gesture_api.get_current_gestures()
+            })
         
         return jsonify({
             'success': False,
@@ -247,6 +646,264 @@ def save_session():
         }), 500
 
 
+@app.route('/api/gesture/sessions', methods=['POST'])
+def create_gesture_session():
+    """Register an interview session for uploaded-frame analysis"""
+    try:
+        data = request.get_json(silent=True) or {}
+        
+        # 'landmarks' sessions only receive client-side landmarks and never
+        # load MediaPipe graphs; frame sessions may pick a detector profile
+        mode = data.get('mode', 'frames')
+        if mode not in ('frames', 'landmarks'):
+            return jsonify({'success': False, 'message': "mode must be 'frames' or 'landmarks'"}), 400
+        options = {}
+        if mode == 'landmarks':
+            options['profile'] = 'landmarks'
+        elif data.get('profile') is not None:
+            if data['profile'] not in DETECTOR_PROFILES or data['profile'] == 'landmarks':
+                return jsonify({
+                    'success': False,
+                    'message': f"profile must be one of: {', '.join(p for p in DETECTOR_PROFILES if p != 'landmarks')}"
+                }), 400
+            options['profile'] = data['profile']
+        
+        session = session_manager.create_session(data.get('session_id'), **options)
+        
+        return jsonify({
+            'success': True,
+            'session_id': session.session_id
+        }), 201
+    
+    except SessionLimitError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 503
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+
+@app.route('/api/gesture/sessions', methods=['GET'])
+def list_gesture_sessions():
+    """Per-session stats for every active session"""
+    pool = session_manager.get_pool_stats()
+    pool['backend'] = GESTURE_BACKEND
+    if _process_backend is not None:
+        pool['processes'] = _process_backend.get_stats()
+    
+    return jsonify({
+        'success': True,
+        'pool': pool,
+        'sessions': session_manager.list_stats()
+    })
+
+
+@app.route('/api/gesture/sessions/<session_id>', methods=['GET'])
+def get_gesture_session(session_id):
+    """Latest gestures and stats for one session"""
+    session = session_manager.get_session(session_id)
+    if session is None:
+        return jsonify({'success': False, 'message': 'Session not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'current_gestures': session.get_current_gestures(),
+        'stats': session.get_stats()
+    })
+
+
+@app.route('/api/gesture/sessions/<session_id>', methods=['DELETE'])
+def close_gesture_session(session_id):
+    """Close a session and release its recognizer"""
+    stats = session_manager.close_session(session_id)
+    if stats is None:
+        return jsonify({'success': False, 'message': 'Session not found'}), 404
+    
+    return jsonify({
+        'success': True,
+        'stats': stats
+    })
+
+
+@app.route('/api/gesture/sessions/<session_id>/frame', methods=['POST'])
+def upload_gesture_frame(session_id):
+    """Upload one frame: a raw image/jpeg body or JSON {"frame": base64}
+    
+    Inference runs asynchronously; the response carries the gestures from
+    the most recently processed frame.
+    """
+    try:
+        if request.mimetype == 'application/json':
+            data = base64.b64decode((request.get_json(silent=True) or {}).get('frame', ''))
+        else:
+            data = request.get_data(cache=False)
+        
+        if not data:
+            return jsonify({'success': False, 'message': 'No frame data'}), 400
+        if len(data) > MAX_UPLOAD_FRAME_BYTES:
+            return jsonify({'success': False, 'message': 'Frame too large'}), 413
+        
+        session = session_manager.get_session(session_id)
+        if session is None:
+            return jsonify({'success': False, 'message': 'Session not found'}), 404
+        if not session.accepts_frames:
+            return jsonify({'success': False, 'message': LANDMARKS_ONLY_MESSAGE}), 409
+        
+        gestures = session_manager.submit_frame(session_id, data)
+        return jsonify({
+            'success': True,
+            'current_gestures': gestures
+        })
+    
+    except KeyError:
+        return jsonify({'success': False, 'message': 'Session not found'}), 404
+    
+    except SessionModeError:
+        return jsonify({'success': False, 'message': LANDMARKS_ONLY_MESSAGE}), 409
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+
+@app.route('/api/gesture/sessions/<session_id>/landmarks', methods=['POST'])
+def upload_gesture_landmarks(session_id):
+    """Upload packed landmark frames computed by client-side MediaPipe
+    
+    Body: one or more frames in the gesture_landmarks binary format
+    (float16 coordinates, capture time per frame). Gestures are computed
+    immediately and the result for the last frame is returned.
+    """
+    try:
+        data = request.get_data(cache=False)
+        if len(data) > MAX_UPLOAD_FRAME_BYTES:
+            return jsonify({'success': False, 'message': 'Payload too large'}), 413
+        
+        frames = decode_frames(data)
+        if not frames:
+            return jsonify({'success': False, 'message': 'No landmark frames'}), 400
+        
+        gestures = session_manager.submit_landmarks(session_id, frames)
+        return jsonify({
+            'success': True,
+            'frames': len(frames),
+            'current_gestures': gestures
+        })
+    
+    except LandmarkFormatError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    except KeyError:
+        return jsonify({'success': False, 'message': 'Session not found'}), 404
+    
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 500
+
+
+@app.route('/api/gesture/sessions/<session_id>/stream', methods=['POST'])
+def stream_gesture_frames(session_id):
+    """Long-lived chunked upload of frames for one session
+    
+    The body is a sequence of frames, each a 4-byte big-endian length
+    followed by that many bytes of JPEG. Frames are queued as they arrive;
+    the response is sent when the client ends the upload.
+    """
+    session = session_manager.get_session(session_id)
+    if session is None:
+        return jsonify({'success': False, 'message': 'Session not found'}), 404
+    if not session.accepts_frames:
+        return jsonify({'success': False, 'message': LANDMARKS_ONLY_MESSAGE}), 409
+    
+    stream = request.stream
+    received = 0
+    try:
+        while True:
+            header = stream.read(4)
+            if len(header) < 4:
+                break
+            (length,) = struct.unpack('>I', header)
+            if length > MAX_UPLOAD_FRAME_BYTES:
+                return jsonify({'success': False, 'message': 'Frame too large'}), 413
+            
+            data = stream.read(length)
+            if len(data) < length:
+                break
+            session_manager.submit_frame(session_id, data)
+            received += 1
+    
+    except KeyError:
+        return jsonify({'success': False, 'message': 'Session closed'}), 410
+    
+    except SessionModeError:
+        return jsonify({'success': False, 'message': LANDMARKS_ONLY_MESSAGE}), 409
+    
+    session = session_manager.get_session(session_id)
+    return jsonify({
+        'success': True,
+        'frames_received': received,
+        'current_gestures': session.get_current_gestures() if session else {}
+    })
+
+
+@app.route('/api/gesture/sessions/<session_id>/events')
+def session_events(session_id):
+    """Server-Sent Events with one session's gesture and warning state"""
+    session = session_manager.get_session(session_id)
+    if session is None:
+        return jsonify({'success': False, 'message': 'Session not found'}), 404
+    
+    return event_stream_response(session.live_state, lambda: not session.closed)
+
+
+def _timeline_query(timeline):
+    """Answer ?gesture=smile&start=0&end=60 (seconds since session start) from a timeline"""
+    gesture = request.args.get('gesture')
+    if not gesture:
+        return jsonify({'success': True, 'timeline': timeline.summary()})
+    
+    try:
+        start = request.args.get('start', type=float)
+        end = request.args.get('end', type=float)
+        result = timeline.query(gesture, start, end)
+    except KeyError:
+        return jsonify({'success': False, 'message': f'Unknown gesture {gesture!r}'}), 400
+    
+    return jsonify({'success': True, 'start_time': timeline.start_time, **result})
+
+
+@app.route('/api/gesture/timeline', methods=['GET'])
+def get_gesture_timeline():
+    """Per-frame timeline of the camera session: summary, or when a gesture was active"""
+    return _timeline_query(gesture_api.recognizer.timeline)
+
+
+@app.route('/api/gesture/sessions/<session_id>/timeline', methods=['GET'])
+def get_session_timeline(session_id):
+    """Timeline of an uploaded-frame session (see /api/gesture/timeline)"""
+    session = session_manager.get_session(session_id)
+    if session is None:
+        return jsonify({'success': False, 'message': 'Session not found'}), 404
+    
+    timeline = getattr(session.recognizer, 'timeline', None)
+    if timeline is None:
+        # Process-backend recognizers keep their timeline in the worker
+        return jsonify({
+            'success': False,
+            'message': 'Timeline not available for this backend; set GESTURE_TIMELINE_DIR to persist it'
+        }), 409
+    return _timeline_query(timeline)
+
+
 # Health check endpoint
 @app.route('/api/gesture/health', methods=['GET'])
 def health_check():
@@ -254,7 +911,12 @@ def health_check():
     return jsonify({
         'success': True,
         'status': 'healthy',
-        'is_running': gesture_api.is_running
+        'is_running': gesture_api.is_running,
+        'sessions': session_manager.get_pool_stats()['sessions'],
+        # Graphs are created when the camera starts, not at server start,
+        # and only those in the detector profile
+        'detector_profile': gesture_api.recognizer.profile,
+        'detectors_loaded': sorted(gesture_api.recognizer.detectors)
     })
 
 
@@ -269,8 +931,17 @@ if __name__ == '__main__':
     print("  GET    /api/gesture/status      - Get current status")
     print("  GET    /api/gesture/stats       - Get session statistics")
     print("  GET    /api/gesture/video_feed  - Video stream")
+    print("  GET    /api/gesture/events      - Live gesture/warning state (SSE)")
     print("  GET    /api/gesture/frame       - Get current frame")
     print("  POST   /api/gesture/save_session - Save session data")
+    print("  GET    /api/gesture/timeline    - Per-frame gesture timeline queries")
+    print("  POST   /api/gesture/sessions    - Register an uploaded-frame session")
+    print("  POST   /api/gesture/sessions/<id>/frame  - Upload one frame")
+    print("  POST   /api/gesture/sessions/<id>/stream - Chunked frame upload")
+    print("  POST   /api/gesture/sessions/<id>/landmarks - Client-side landmarks")
+    print("  GET    /api/gesture/sessions[/<id>]      - Session stats")
+    print("  GET    /api/gesture/sessions/<id>/timeline - Session timeline queries")
+    print("  GET    /api/gesture/sessions/<id>/events   - Live session state (SSE)")
     print("  GET    /api/gesture/health      - Health check")
     print("\n" + "=" * 60)
     
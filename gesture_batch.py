@@ -0,0 +1,341 @@
+"""
+Offline Gesture Analysis
+Runs GestureRecognizer headless over recorded interview videos, in
+parallel, and writes a per-frame gesture timeline plus a summary for each
+file - for re-scoring archived interviews after the detectors change
+
+Usage:
+    python gesture_batch.py interviews/*.mp4 --out gesture_results
+    python gesture_batch.py long_interview.mp4 --chunk-frames 3000 --format parquet
+
+Each file (or each chunk of --chunk-frames frames) is processed in its own
+worker process; no camera or display is needed. Chunks start a few frames
+early so the motion windows (nod, wave, nervous) are warm at the boundary.
+
+Outputs per video in --out:
+    <name>.gestures.json     summary and timeline (--format json)
+    <name>.timeline.parquet  timeline columns (--format parquet, needs pyarrow)
+    <name>.summary.json      summary (--format parquet)
+and batch_summary.json listing every file. Videos sharing a name get a
+short hash of their path appended (<name>-<hash>.gestures.json).
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from gesture_events import GestureEventTracker
+from gesture_recognition import (
+    DEFAULT_DETECTOR_INTERVALS, DEFAULT_DETECTOR_PROFILE, DEFAULT_INFERENCE_WIDTH, DETECTOR_PROFILES,
+    GESTURE_FLAGS, GestureRecognizer, parse_detector_intervals
+)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# Frames replayed before a chunk's first frame to fill the motion windows
+WARMUP_FRAMES = 10
+DEFAULT_FPS = 30.0
+
+
+def probe_video(path):
+    """(frame count, fps) of a video file"""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f'Could not open {path}')
+    frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or DEFAULT_FPS
+    cap.release()
+    return frames, fps
+
+
+def plan_chunks(frame_count, chunk_frames):
+    """[(start, stop)] frame ranges; one range for the whole file if not chunking"""
+    if not chunk_frames or frame_count <= 0 or frame_count <= chunk_frames:
+        return [(0, None)]
+    return [(start, min(start + chunk_frames, frame_count)) for start in range(0, frame_count, chunk_frames)]
+
+
+def analyze_range(path, start, stop, fps, detector_intervals=None, inference_width=DEFAULT_INFERENCE_WIDTH,
+                  mirror=False, profile=DEFAULT_DETECTOR_PROFILE):
+    """Process frames [start, stop) of a video in this process
+
+    Returns a dict of timeline columns plus the recognizer counters for the
+    range (warm-up frames excluded).
+    """
+    recognizer = GestureRecognizer(detector_intervals=detector_intervals, inference_width=inference_width,
+                                   headless=True, profile=profile)
+    cap = cv2.VideoCapture(path)
+    warmup = min(WARMUP_FRAMES, start)
+    if start - warmup:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start - warmup)
+
+    columns = {'frame': [], 'time_s': []}
+    columns.update({flag: [] for flag in GESTURE_FLAGS})
+    columns['posture'] = []
+    baseline = dict(recognizer.gestures_detected)
+    index = start - warmup
+    started = time.perf_counter()
+    # Decoded and mirrored frames reuse the same buffers throughout
+    frame = None
+    mirrored = None
+
+    try:
+        while stop is None or index < stop:
+            ret, frame = cap.read(frame)
+            if not ret:
+                break
+            if mirror:
+                if mirrored is None or mirrored.shape != frame.shape:
+                    mirrored = np.empty_like(frame)
+                cv2.flip(frame, 1, dst=mirrored)
+            if index == start:
+                # Counters from the warm-up frames belong to the previous chunk
+                baseline = dict(recognizer.gestures_detected)
+            # Media time, so the recognizer's timeline and events follow the video
+            _, gestures = recognizer.process_frame(mirrored if mirror else frame, draw=False,
+                                                   timestamp=recognizer.session_start + index / fps)
+
+            if index >= start:
+                columns['frame'].append(index)
+                columns['time_s'].append(round(index / fps, 3))
+                for flag in GESTURE_FLAGS:
+                    columns[flag].append(bool(gestures[flag]))
+                columns['posture'].append(gestures['posture'])
+            index += 1
+    finally:
+        cap.release()
+        recognizer.release()
+
+    return {
+        'start': start,
+        'columns': columns,
+        'counters': {key: value - baseline[key] for key, value in recognizer.gestures_detected.items()},
+        'processing_seconds': time.perf_counter() - started
+    }
+
+
+def merge_chunks(chunks):
+    """Concatenate chunk results in frame order"""
+    chunks = sorted(chunks, key=lambda chunk: chunk['start'])
+    columns = {name: [] for name in chunks[0]['columns']}
+    counters = {}
+    for chunk in chunks:
+        for name, values in chunk['columns'].items():
+            columns[name].extend(values)
+        for key, value in chunk['counters'].items():
+            counters[key] = counters.get(key, 0) + value
+    return columns, counters, sum(chunk['processing_seconds'] for chunk in chunks)
+
+
+def replay_events(columns):
+    """Debounced gesture events over the merged timeline (chunk boundaries included)"""
+    tracker = GestureEventTracker(0.0, max_events=None)
+    names = list(columns)
+    for values in zip(*columns.values()):
+        row = dict(zip(names, values))
+        tracker.update(row['time_s'], row)
+    tracker.close()
+    return tracker
+
+
+def summarize(path, columns, counters, fps, processing_seconds):
+    """Per-video summary: share of frames per gesture, posture mix, events and rates"""
+    frames = len(columns['frame'])
+    duration = frames / fps if fps else 0.0
+    minutes = duration / 60
+
+    postures = {}
+    for posture in columns['posture']:
+        postures[posture] = postures.get(posture, 0) + 1
+
+    events = replay_events(columns)
+
+    return {
+        'source': path,
+        'analyzed_at': datetime.now().isoformat(),
+        'frames': frames,
+        'video_fps': fps,
+        'duration_seconds': round(duration, 3),
+        'processing_seconds': round(processing_seconds, 3),
+        'processing_fps': round(frames / processing_seconds, 2) if processing_seconds > 0 else 0.0,
+        'gesture_frame_percentages': {
+            flag: round(sum(columns[flag]) / frames * 100, 2) if frames else 0.0
+            for flag in GESTURE_FLAGS
+        },
+        'posture_frames': postures,
+        'gestures_detected': dict(events.counts),
+        'dwell_seconds': events.dwell_seconds(),
+        'gesture_frames': counters,
+        'gesture_rates': {key: round(value / minutes, 2) if minutes else 0.0
+                          for key, value in events.counts.items()},
+        'events': events.recent_events()
+    }
+
+
+def _timeline_rows(columns):
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+
+def _timeline_schema():
+    fields = [('frame', pa.int32()), ('time_s', pa.float32())]
+    fields += [(flag, pa.bool_()) for flag in GESTURE_FLAGS]
+    fields.append(('posture', pa.dictionary(pa.int8(), pa.string())))
+    return pa.schema(fields)
+
+
+def output_names(paths):
+    """{path: output file name}; the file stem, unless several paths share it
+
+    Videos with the same stem from different directories (a/interview.mp4,
+    b/interview.mp4) get a short hash of their full path appended so their
+    outputs don't overwrite each other.
+    """
+    stems = {path: os.path.splitext(os.path.basename(path))[0] for path in paths}
+    taken = {}
+    for stem in stems.values():
+        taken[stem] = taken.get(stem, 0) + 1
+
+    names = {}
+    for path, stem in stems.items():
+        if taken[stem] > 1:
+            digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:8]
+            stem = f'{stem}-{digest}'
+        names[path] = stem
+    return names
+
+
+def write_results(out_dir, name, summary, columns, file_format='json'):
+    """Write one video's outputs under name; returns the paths written"""
+    os.makedirs(out_dir, exist_ok=True)
+
+    if file_format == 'parquet':
+        timeline_path = os.path.join(out_dir, f'{name}.timeline.parquet')
+        table = pa.Table.from_pydict(columns, schema=_timeline_schema())
+        pq.write_table(table, timeline_path, compression='zstd')
+        summary_path = os.path.join(out_dir, f'{name}.summary.json')
+        with open(summary_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        return [timeline_path, summary_path]
+
+    result_path = os.path.join(out_dir, f'{name}.gestures.json')
+    with open(result_path, 'w') as f:
+        json.dump({'summary': summary, 'timeline': _timeline_rows(columns)}, f)
+    return [result_path]
+
+
+def analyze_videos(paths, out_dir='gesture_results', file_format='json', workers=None, chunk_frames=0,
+                   detector_intervals=None, inference_width=DEFAULT_INFERENCE_WIDTH, mirror=False,
+                   profile=DEFAULT_DETECTOR_PROFILE):
+    """Analyze videos in parallel and write their results
+
+    Returns {path: summary} (or {'error': ...} for files that failed).
+    """
+    if file_format == 'parquet' and pa is None:
+        raise RuntimeError("pyarrow is required for Parquet output (pip install pyarrow)")
+
+    plans = {}
+    results = {}
+    for path in paths:
+        try:
+            frame_count, fps = probe_video(path)
+        except IOError as e:
+            results[path] = {'error': str(e)}
+            continue
+        plans[path] = (fps, plan_chunks(frame_count, chunk_frames))
+
+    chunks = {path: [] for path in plans}
+    names = output_names(plans)
+    workers = workers or multiprocessing.cpu_count()
+    # spawn: each worker builds its own MediaPipe graphs from a clean interpreter
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        futures = {
+            pool.submit(analyze_range, path, start, stop, fps, detector_intervals, inference_width, mirror,
+                        profile): path
+            for path, (fps, ranges) in plans.items()
+            for start, stop in ranges
+        }
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                chunks[path].append(future.result())
+            except Exception as e:
+                results[path] = {'error': repr(e)}
+                continue
+
+            if path not in results and len(chunks[path]) == len(plans[path][1]):
+                fps = plans[path][0]
+                columns, counters, seconds = merge_chunks(chunks.pop(path))
+                summary = summarize(path, columns, counters, fps, seconds)
+                summary['outputs'] = write_results(out_dir, names[path], summary, columns, file_format)
+                results[path] = summary
+                print(f"[OK] {path}: {summary['frames']} frames at {summary['processing_fps']} fps")
+
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, 'batch_summary.json'), 'w') as f:
+        json.dump(results, f, indent=2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Analyze gestures in recorded interview videos')
+    parser.add_argument('videos', nargs='+', help='Video files')
+    parser.add_argument('--out', default='gesture_results', help='Output directory')
+    parser.add_argument('--format', choices=['json', 'parquet'], default='json')
+    parser.add_argument('--workers', type=int, default=0, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-frames', type=int, default=0,
+                        help='Split files into chunks of this many frames processed in parallel')
+    parser.add_argument('--intervals', default=None,
+                        help='Detector cadence, e.g. face=1,hands=2,pose=3 (default: every frame)')
+    parser.add_argument('--inference-width', type=int, default=DEFAULT_INFERENCE_WIDTH,
+                        help='Downscale frames to this width for inference (0 = full resolution)')
+    parser.add_argument('--mirror', action='store_true',
+                        help='Flip frames horizontally, as the live camera view does')
+    parser.add_argument('--profile', default=DEFAULT_DETECTOR_PROFILE,
+                        choices=[name for name in DETECTOR_PROFILES if name != 'landmarks'],
+                        help='Detectors to run; gestures of the others stay off (default: full)')
+    args = parser.parse_args()
+
+    # Offline re-scoring defaults to running every detector on every frame
+    intervals = parse_detector_intervals(args.intervals) if args.intervals \
+        else {name: 1 for name in DEFAULT_DETECTOR_INTERVALS}
+
+    print("=" * 60)
+    print("OFFLINE GESTURE ANALYSIS")
+    print("=" * 60)
+
+    started = time.time()
+    results = analyze_videos(
+        args.videos,
+        out_dir=args.out,
+        file_format=args.format,
+        workers=args.workers or None,
+        chunk_frames=args.chunk_frames,
+        detector_intervals=intervals,
+        inference_width=args.inference_width or None,
+        mirror=args.mirror,
+        profile=args.profile
+    )
+
+    failed = [path for path, result in results.items() if 'error' in result]
+    for path in failed:
+        print(f"[ERROR] {path}: {results[path]['error']}")
+    print(f"\n{len(results) - len(failed)}/{len(results)} videos analyzed in {time.time() - started:.1f}s")
+    print(f"Results written to {os.path.abspath(args.out)}")
+
+
+if __name__ == '__main__':
+    main()
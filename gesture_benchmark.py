@@ -0,0 +1,726 @@
+"""
+Gesture Recognition Benchmark
+Replays recorded interview clips through GestureRecognizer at several
+inference resolutions and reports speed against agreement with the
+full-resolution result
+
+Usage:
+    python gesture_benchmark.py clip1.mp4 clip2.mp4 --widths full,960,640,480,320
+    python gesture_benchmark.py --synthetic 120 --json results.json
+    python gesture_benchmark.py --synthetic 120 --json after.json --compare before.json --memory
+    python gesture_benchmark.py --synthetic 120 --allocations
+    python gesture_benchmark.py clip.mp4 --profile proctoring
+    python gesture_benchmark.py clip.mp4 --widths full,640 --face-roi
+    python gesture_benchmark.py --detectors 5000
+    python gesture_benchmark.py --startup 5
+
+Accuracy columns compare each width with the full-resolution run on the
+same frames: gesture agreement over all current_gestures keys, face
+detection agreement, and mean face landmark error in display pixels.
+Synthetic frames contain no faces and are only useful for timing.
+
+Everything is replayed from memory, so no camera is needed and runs are
+reproducible (synthetic frames are seeded). The first --warmup frames of
+each run are left out of the timings. Per-stage percentiles come from
+GestureRecognizer.last_timings (prepare, face, hands, pose, draw,
+analyze). --memory adds a tracemalloc pass for the peak Python/NumPy
+allocation per run; --compare prints the change against an earlier
+--json file.
+
+--face-roi repeats every width with FaceMesh run on a window around the
+tracked face (GestureRecognizer(face_roi=True)); those rows, marked +roi,
+take their accuracy columns from the whole-frame run at the same width, and
+the share of FaceMesh runs that used the window is listed below the table.
+
+--allocations replays the camera path of gesture_api (mirror into a pooled
+frame buffer, inference with landmarks drawn, gesture indicators) under
+tracemalloc and reports, per stage, the transient bytes allocated per
+frame and that amount in full frames, plus how often the frame pool had to
+allocate rather than reuse a buffer.
+
+--detectors N times the gesture detectors alone on N random landmark
+frames, both as MediaPipe protobufs and as packed client keypoints: the
+scalar reference detectors defined here against the vectorized
+analyze_landmarks, which is also checked to give identical results.
+
+--startup N starts N fresh interpreters and times importing gesture_api
+(which builds the camera GestureAPI), the first /api/gesture/health
+response, and the first processed frame, which pays for importing
+OpenCV/MediaPipe and creating the graphs. cv2 and mediapipe import times
+are measured on their own for reference.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from gesture_landmarks import FACE_KEYPOINTS, HAND_KEYPOINTS, POSE_KEYPOINTS, decode_frames, encode_frame
+from gesture_pipeline import FramePool
+from gesture_recognition import (DEFAULT_DETECTOR_PROFILE, DETECTOR_PROFILES, GestureRecognizer, pack_gestures,
+                                 parse_detector_intervals)
+
+try:
+    from mediapipe.framework.formats import landmark_pb2
+except ImportError:
+    landmark_pb2 = None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STAGES = ('prepare', 'face', 'hands', 'pose', 'draw', 'analyze')
+ALLOCATION_STAGES = ('mirror', 'process', 'indicators')
+
+
+def load_clip(path, max_frames):
+    """Decode up to max_frames frames of a video file into memory"""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def synthetic_frames(count, width=1280, height=720, seed=0):
+    """Deterministic noise frames for camera-less timing runs"""
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def face_points(recognizer, width, height):
+    """Face landmarks of the last processed frame in display pixels, or None"""
+    results = recognizer.last_results.get('face')
+    if results is None or not results.multi_face_landmarks:
+        return None
+    landmarks = results.multi_face_landmarks[0].landmark
+    return np.array([(lm.x * width, lm.y * height) for lm in landmarks], dtype=np.float32)
+
+
+def run_width(frames, inference_width, intervals, headless=False, warmup=0, profile=DEFAULT_DETECTOR_PROFILE,
+              face_roi=False):
+    """Process every frame at one inference width
+
+    Latencies and stage timings skip the first `warmup` frames (graph
+    initialization); gestures and faces cover every frame.
+    """
+    recognizer = GestureRecognizer(detector_intervals=intervals, inference_width=inference_width,
+                                   headless=headless, profile=profile, face_roi=face_roi)
+    height, width = frames[0].shape[:2]
+    latencies = []
+    stages = {stage: [] for stage in STAGES}
+    gestures = []
+    faces = []
+
+    try:
+        for index, frame in enumerate(frames):
+            work = frame.copy()  # process_frame draws into its input
+            started = time.perf_counter()
+            _, current = recognizer.process_frame(work)
+            elapsed = time.perf_counter() - started
+            if index >= warmup:
+                latencies.append(elapsed)
+                for stage in STAGES:
+                    stages[stage].append(recognizer.last_timings[stage])
+            gestures.append(current)
+            faces.append(face_points(recognizer, width, height))
+        roi = recognizer.face_roi.get_state() if recognizer.face_roi is not None else None
+    finally:
+        recognizer.release()
+
+    return {'latencies': latencies, 'stages': stages, 'gestures': gestures, 'faces': faces, 'face_roi': roi}
+
+
+def measure_memory(frames, inference_width, intervals, headless=False, profile=DEFAULT_DETECTOR_PROFILE):
+    """Peak traced Python/NumPy allocation (MB) while processing the frames
+
+    A separate pass, since tracing slows everything down. Allocations made
+    inside MediaPipe's C++ graphs are not traced.
+    """
+    recognizer = GestureRecognizer(detector_intervals=intervals, inference_width=inference_width,
+                                   headless=headless, profile=profile)
+    tracemalloc.start()
+    try:
+        for frame in frames:
+            recognizer.process_frame(frame.copy())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        recognizer.release()
+    return peak / (1024 * 1024)
+
+
+def measure_allocations(frames, inference_width, intervals, warmup=0, profile=DEFAULT_DETECTOR_PROFILE):
+    """Transient allocations per frame along the rendered camera path
+
+    Each stage's cost is the traced peak above what was allocated when it
+    started (reset per stage), so buffers that are allocated and freed
+    within the stage still count. Returns, per stage, the mean KB and the
+    mean in full frames, plus the frame pool counters.
+    """
+    recognizer = GestureRecognizer(detector_intervals=intervals, inference_width=inference_width, profile=profile)
+    pool = FramePool()
+    frame_bytes = frames[0].nbytes
+    samples = {stage: [] for stage in ALLOCATION_STAGES}
+
+    def measured(stage, index, func, *args):
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        value = func(*args)
+        if index >= warmup:
+            samples[stage].append(tracemalloc.get_traced_memory()[1] - current)
+        return value
+
+    def mirror(frame):
+        buffer = pool.acquire(frame.shape)
+        cv2.flip(frame, 1, dst=buffer)
+        return buffer
+
+    tracemalloc.start()
+    try:
+        for index, frame in enumerate(frames):
+            buffer = measured('mirror', index, mirror, frame)
+            processed, gestures = measured('process', index, recognizer.process_frame, buffer)
+            measured('indicators', index, recognizer.draw_gesture_indicators, processed, gestures)
+            pool.release(buffer)
+    finally:
+        tracemalloc.stop()
+        recognizer.release()
+
+    result = {}
+    for stage, values in samples.items():
+        mean = float(np.mean(values)) if values else 0.0
+        result[stage] = {'kb': mean / 1024, 'frames': mean / frame_bytes}
+    result['pool'] = pool.stats()
+    return result
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process, where the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / 1024 if peak < 1 << 32 else peak / (1024 * 1024)
+
+
+def compare(run, baseline):
+    """Agreement of a run with the full-resolution baseline"""
+    matches = 0
+    total = 0
+    face_agree = 0
+    errors = []
+
+    for current, reference, face, ref_face in zip(run['gestures'], baseline['gestures'],
+                                                  run['faces'], baseline['faces']):
+        for key, value in reference.items():
+            matches += current[key] == value
+            total += 1
+        face_agree += (face is None) == (ref_face is None)
+        if face is not None and ref_face is not None:
+            errors.append(float(np.linalg.norm(face - ref_face, axis=1).mean()))
+
+    frames = len(baseline['gestures'])
+    return {
+        'gesture_agreement': matches / total * 100 if total else 0.0,
+        'face_agreement': face_agree / frames * 100 if frames else 0.0,
+        'landmark_error_px': float(np.mean(errors)) if errors else None
+    }
+
+
+def summarize(latencies):
+    ms = np.array(latencies) * 1000
+    return {
+        'frames': len(ms),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'p99_ms': float(np.percentile(ms, 99)),
+        'fps': float(1000 / ms.mean())
+    }
+
+
+def summarize_stages(stages):
+    """p50/p95 per stage in milliseconds"""
+    summary = {}
+    for stage, samples in stages.items():
+        ms = np.array(samples) * 1000
+        summary[stage] = {
+            'p50_ms': float(np.percentile(ms, 50)) if len(ms) else 0.0,
+            'p95_ms': float(np.percentile(ms, 95)) if len(ms) else 0.0
+        }
+    return summary
+
+
+def benchmark(name, frames, widths, intervals, headless=False, warmup=0, memory=False, allocations=False,
+              profile=DEFAULT_DETECTOR_PROFILE, face_roi=False):
+    """Run all widths on one clip; the first width is the accuracy baseline
+
+    With face_roi, every width is run again with FaceMesh cropping and
+    compared with the whole-frame run at the same width.
+    """
+    runs = {}
+    for width in widths:
+        runs[width] = run_width(frames, width, intervals, headless, warmup, profile)
+
+    baseline = runs[widths[0]]
+    results = []
+    for width in widths:
+        entry = {'clip': name, 'inference_width': width or 'full', 'profile': profile}
+        entry.update(summarize(runs[width]['latencies']))
+        entry['stages'] = summarize_stages(runs[width]['stages'])
+        entry.update(compare(runs[width], baseline))
+        if memory:
+            entry['alloc_peak_mb'] = measure_memory(frames, width, intervals, headless, profile)
+        if allocations:
+            entry['allocations'] = measure_allocations(frames, width, intervals, warmup, profile)
+        results.append(entry)
+
+    if face_roi:
+        for width in widths:
+            run = run_width(frames, width, intervals, headless, warmup, profile, face_roi=True)
+            entry = {'clip': name, 'inference_width': width or 'full', 'profile': profile, 'face_roi': True}
+            entry.update(summarize(run['latencies']))
+            entry['stages'] = summarize_stages(run['stages'])
+            entry.update(compare(run, runs[width]))
+            entry['roi'] = run['face_roi']
+            results.append(entry)
+    return results
+
+
+def width_label(entry):
+    """Width column text; cropped FaceMesh runs are marked +roi"""
+    return f"{entry['inference_width']}{'+roi' if entry.get('face_roi') else ''}"
+
+
+def compare_results(results, previous):
+    """Print the change of each (clip, width) against an earlier run"""
+    earlier = {(entry['clip'], width_label(entry)): entry for entry in previous}
+    print("\nChange vs. baseline file")
+    print(f"  {'clip':<24} {'width':>6} {'mean ms':>14} {'p95 ms':>14} {'fps':>14}")
+    for entry in results:
+        before = earlier.get((entry['clip'], width_label(entry)))
+        if before is None:
+            continue
+        cells = []
+        for key in ('mean_ms', 'p95_ms', 'fps'):
+            change = (entry[key] - before[key]) / before[key] * 100 if before[key] else 0.0
+            cells.append(f"{entry[key]:.1f} ({change:+.0f}%)")
+        print(f"  {entry['clip'][-24:]:<24} {width_label(entry):>6} "
+              f"{cells[0]:>14} {cells[1]:>14} {cells[2]:>14}")
+
+
+def random_landmark_frames(count, seed=0):
+    """Random-walk face/hand/pose landmark lists shaped like MediaPipe output"""
+    if landmark_pb2 is None:
+        raise RuntimeError('mediapipe is required for the detector benchmark')
+    rng = np.random.default_rng(seed)
+
+    def landmark_list(points):
+        message = landmark_pb2.NormalizedLandmarkList()
+        for x, y in points:
+            message.landmark.add(x=float(x), y=float(y))
+        return message
+
+    face = rng.random((478, 2))
+    hands = [rng.random((21, 2)), rng.random((21, 2))]
+    pose = rng.random((33, 2))
+    frames = []
+    for _ in range(count):
+        face += rng.normal(0, 0.01, face.shape)
+        pose += rng.normal(0, 0.01, pose.shape)
+        for hand in hands:
+            hand += rng.normal(0, 0.05, hand.shape)
+        hand_count = int(rng.integers(0, 3))
+        frames.append((
+            landmark_list(face) if rng.random() < 0.9 else None,
+            [(landmark_list(hand), 'Right' if i else 'Left') for i, hand in enumerate(hands[:hand_count])],
+            landmark_list(pose) if rng.random() < 0.8 else None
+        ))
+    return frames
+
+
+# Scalar reference detectors: one landmark at a time, straight from the
+# MediaPipe landmark lists, updating the recognizer's counters and motion
+# windows. analyze_landmarks must give the same results (--detectors).
+
+def detect_smile(recognizer, face_landmarks, image_width, image_height):
+    """Mouth width / height ratio above 3.5"""
+    left_mouth = face_landmarks.landmark[61]
+    right_mouth = face_landmarks.landmark[291]
+    top_lip = face_landmarks.landmark[13]
+    bottom_lip = face_landmarks.landmark[14]
+
+    mouth_width = abs(right_mouth.x - left_mouth.x) * image_width
+    mouth_height = abs(top_lip.y - bottom_lip.y) * image_height
+    if mouth_height > 0 and mouth_width / mouth_height > 3.5:
+        recognizer.gestures_detected['smile'] += 1
+        return True
+    return False
+
+
+def detect_eye_contact(recognizer, face_landmarks):
+    """Nose within 15% of the eye distance from the eye center"""
+    left_eye = face_landmarks.landmark[33]
+    right_eye = face_landmarks.landmark[263]
+    nose_tip = face_landmarks.landmark[1]
+
+    deviation = abs(nose_tip.x - (left_eye.x + right_eye.x) / 2)
+    if deviation < abs(right_eye.x - left_eye.x) * 0.15:
+        recognizer.gestures_detected['eye_contact'] += 1
+        return True
+    return False
+
+
+def detect_head_nod(recognizer, face_landmarks, image_height):
+    """Append the nose height, then check the window for an up-down pattern"""
+    recognizer.head_positions.append(face_landmarks.landmark[1].y * image_height)
+    if recognizer._nod_window():
+        recognizer.gestures_detected['nod'] += 1
+        return True
+    return False
+
+
+def detect_thumbs_up(recognizer, hand_landmarks):
+    """Thumb tip above the wrist, the other finger tips below it"""
+    wrist_y = hand_landmarks.landmark[0].y
+    thumb_extended = hand_landmarks.landmark[4].y < wrist_y
+    fingers_curled = all(hand_landmarks.landmark[tip].y > wrist_y for tip in (8, 12, 16, 20))
+    if thumb_extended and fingers_curled:
+        recognizer.gestures_detected['thumbs_up'] += 1
+        return True
+    return False
+
+
+def detect_wave(recognizer, hand_landmarks):
+    """Append the wrist x, then check the window for side-to-side movement"""
+    recognizer.hand_positions.append(hand_landmarks.landmark[0].x)
+    if len(recognizer.hand_positions) >= 10:
+        positions = list(recognizer.hand_positions.ordered())
+        if max(positions) - min(positions) > 0.1:
+            recognizer.gestures_detected['wave'] += 1
+            return True
+    return False
+
+
+def detect_nervous_gestures(recognizer):
+    """High variance over the last five wrist samples"""
+    if len(recognizer.hand_positions) >= 5 and np.var(recognizer.hand_positions.last(5)) > 0.01:
+        recognizer.gestures_detected['nervous_gestures'] += 1
+        return True
+    return False
+
+
+def detect_thinking_pose(recognizer, pose_landmarks, hand_landmarks):
+    """Wrist within 0.15 of the pose nose"""
+    nose = pose_landmarks.landmark[0]
+    wrist = hand_landmarks.landmark[0]
+    if np.sqrt((nose.x - wrist.x) ** 2 + (nose.y - wrist.y) ** 2) < 0.15:
+        recognizer.gestures_detected['thinking'] += 1
+        return True
+    return False
+
+
+def detect_posture(recognizer, pose_landmarks):
+    """'confident' with shoulders above hips and wider than 0.2, else 'slouching'"""
+    left_shoulder = pose_landmarks.landmark[11]
+    right_shoulder = pose_landmarks.landmark[12]
+    left_hip = pose_landmarks.landmark[23]
+    right_hip = pose_landmarks.landmark[24]
+
+    shoulder_center_y = (left_shoulder.y + right_shoulder.y) / 2
+    hip_center_y = (left_hip.y + right_hip.y) / 2
+    if shoulder_center_y < hip_center_y and abs(right_shoulder.x - left_shoulder.x) > 0.2:
+        recognizer.gestures_detected['confident_posture'] += 1
+        return 'confident'
+    return 'slouching'
+
+
+def scalar_analyze(recognizer, face, hands, pose, width, height, timings=None):
+    """Per-gesture scalar detector calls, as analyze_landmarks did before vectorizing
+
+    With a timings dict, each detector call is timed individually.
+    """
+    def timed(name, func, *args, **kwargs):
+        if timings is None:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        value = func(*args, **kwargs)
+        timings.setdefault(name, []).append(time.perf_counter() - started)
+        return value
+
+    current = {
+        'smile': False, 'eye_contact': False, 'head_nod': False, 'thumbs_up': False,
+        'wave': False, 'thinking': False, 'posture': 'unknown', 'nervous': False
+    }
+    if face is not None:
+        current['smile'] = timed('smile', detect_smile, recognizer, face, width, height)
+        current['eye_contact'] = timed('eye_contact', detect_eye_contact, recognizer, face)
+        current['head_nod'] = timed('head_nod', detect_head_nod, recognizer, face, height)
+    for hand, _ in hands:
+        current['thumbs_up'] = timed('thumbs_up', detect_thumbs_up, recognizer, hand)
+        current['wave'] = timed('wave', detect_wave, recognizer, hand)
+        current['nervous'] = timed('nervous', detect_nervous_gestures, recognizer)
+        if pose is not None:
+            current['thinking'] = timed('thinking', detect_thinking_pose, recognizer, pose, hand)
+    if pose is not None:
+        current['posture'] = timed('posture', detect_posture, recognizer, pose)
+
+    # Same per-frame bookkeeping as analyze_landmarks
+    timestamp = time.time()
+    recognizer.gesture_history.append(current)
+    recognizer.timeline.append(timestamp, *pack_gestures(current))
+    recognizer.events.update(timestamp, current)
+    recognizer.frame_count += 1
+    recognizer._publish_snapshot(timestamp, current)
+    return current
+
+
+def packed_landmark_frames(frames, width=1280, height=720):
+    """The same frames round-tripped through the client keypoint format"""
+    def keypoints(landmarks, indices):
+        return np.array([(landmarks.landmark[i].x, landmarks.landmark[i].y) for i in indices])
+
+    packed = []
+    for face, hands, pose in frames:
+        data = encode_frame(
+            width, height,
+            face=keypoints(face, FACE_KEYPOINTS) if face is not None else None,
+            hands=[(keypoints(hand, HAND_KEYPOINTS), label) for hand, label in hands],
+            pose=keypoints(pose, POSE_KEYPOINTS) if pose is not None else None
+        )
+        frame = decode_frames(data)[0]
+        packed.append((frame.face, frame.hands, frame.pose))
+    return packed
+
+
+def time_detectors(frames, width, height):
+    """Time scalar vs vectorized detectors on one set of frames"""
+    per_detector = GestureRecognizer(profile='landmarks')
+    scalar = GestureRecognizer(profile='landmarks')
+    vectorized = GestureRecognizer(profile='landmarks')
+    timings = {}
+    mismatches = 0
+
+    for face, hands, pose in frames:
+        scalar_analyze(per_detector, face, hands, pose, width, height, timings)
+
+        started = time.perf_counter()
+        expected = scalar_analyze(scalar, face, hands, pose, width, height)
+        timings.setdefault('scalar_total', []).append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        actual = vectorized.analyze_landmarks(face, hands, pose, width, height)
+        timings.setdefault('vectorized_total', []).append(time.perf_counter() - started)
+        mismatches += actual != expected
+
+    results = {name: {'calls': len(samples), 'mean_us': float(np.mean(samples) * 1e6)}
+               for name, samples in timings.items()}
+    results['mismatched_frames'] = mismatches
+    results['counters_match'] = scalar.gestures_detected == vectorized.gestures_detected
+    return results
+
+
+def benchmark_detectors(count, width=1280, height=720):
+    """Detector timings for MediaPipe protobuf and packed client landmarks"""
+    frames = random_landmark_frames(count)
+    return {
+        'mediapipe': time_detectors(frames, width, height),
+        'packed': time_detectors(packed_landmark_frames(frames, width, height), width, height)
+    }
+
+
+# Run in a fresh interpreter per sample; prints one JSON line of milliseconds
+STARTUP_SCRIPT = """
+import json, time
+started = time.perf_counter()
+import gesture_api
+imported = time.perf_counter()
+from gesture_imports import is_loaded
+lazy = not is_loaded('cv2') and not is_loaded('mediapipe')
+response = gesture_api.app.test_client().get('/api/gesture/health')
+healthy = time.perf_counter()
+import numpy as np
+frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+gesture_api.gesture_api.recognizer.process_frame(frame, draw=False)
+first_frame = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'health_ms': (healthy - started) * 1000,
+    'first_frame_ms': (first_frame - started) * 1000,
+    'health_status': response.status_code,
+    'deferred': lazy
+}))
+"""
+
+MODULE_SCRIPT = "import time; started = time.perf_counter(); import {0}; print((time.perf_counter() - started) * 1000)"
+
+
+def _run_python(code):
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    return output.strip().splitlines()[-1]
+
+
+def benchmark_startup(runs):
+    """Median cold-start timings over `runs` fresh interpreters, in milliseconds"""
+    samples = [json.loads(_run_python(STARTUP_SCRIPT)) for _ in range(runs)]
+    result = {key: float(np.median([sample[key] for sample in samples]))
+              for key in ('import_ms', 'health_ms', 'first_frame_ms')}
+    result['deferred'] = all(sample['deferred'] for sample in samples)
+    result['health_ok'] = all(sample['health_status'] == 200 for sample in samples)
+    for module in ('cv2', 'mediapipe'):
+        result[f'{module}_import_ms'] = float(np.median(
+            [float(_run_python(MODULE_SCRIPT.format(module))) for _ in range(runs)]))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark gesture recognition inference resolutions')
+    parser.add_argument('clips', nargs='*', help='Recorded video files')
+    parser.add_argument('--synthetic', type=int, default=0,
+                        help='Also run this many synthetic 1280x720 frames (timing only)')
+    parser.add_argument('--widths', default='full,960,640,480,320',
+                        help='Comma-separated inference widths; "full" = no downscaling')
+    parser.add_argument('--intervals', default='face=1,hands=1,pose=1',
+                        help='Detector cadence, e.g. face=1,hands=2,pose=3')
+    parser.add_argument('--profile', default=DEFAULT_DETECTOR_PROFILE,
+                        choices=[name for name in DETECTOR_PROFILES if name != 'landmarks'],
+                        help='Detector profile to benchmark (default: full)')
+    parser.add_argument('--face-roi', action='store_true',
+                        help='Also run every width with FaceMesh cropped to the tracked face')
+    parser.add_argument('--headless', action='store_true',
+                        help='Skip landmark drawing (as gesture_api does with no viewers)')
+    parser.add_argument('--max-frames', type=int, default=300, help='Frames read per clip')
+    parser.add_argument('--json', help='Also write results to this JSON file')
+    parser.add_argument('--warmup', type=int, default=5,
+                        help='Leading frames per run left out of the timings')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for synthetic frames')
+    parser.add_argument('--memory', action='store_true',
+                        help='Also measure peak Python/NumPy allocations (extra pass per run)')
+    parser.add_argument('--allocations', action='store_true',
+                        help='Also count per-frame buffer allocations along the camera path (extra pass per run)')
+    parser.add_argument('--compare', help='Earlier --json results to print the change against')
+    parser.add_argument('--detectors', type=int, default=0,
+                        help='Time the gesture detectors on this many random landmark frames instead')
+    parser.add_argument('--startup', type=int, default=0,
+                        help='Time gesture_api cold start over this many fresh interpreters instead')
+    args = parser.parse_args()
+
+    if args.startup:
+        results = benchmark_startup(args.startup)
+        print("=" * 60)
+        print("GESTURE API STARTUP BENCHMARK")
+        print("=" * 60)
+        print(f"\nMedian of {args.startup} cold starts (ms since the import began)")
+        print(f"  import gesture_api  {results['import_ms']:>8.0f}")
+        print(f"  first health check  {results['health_ms']:>8.0f}")
+        print(f"  first frame         {results['first_frame_ms']:>8.0f}")
+        print(f"  cv2 alone           {results['cv2_import_ms']:>8.0f}")
+        print(f"  mediapipe alone     {results['mediapipe_import_ms']:>8.0f}")
+        print(f"  cv2/mediapipe deferred at import: {results['deferred']}, health OK: {results['health_ok']}")
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"\n[OK] Results written to {args.json}")
+        return
+
+    if args.detectors:
+        results = benchmark_detectors(args.detectors)
+        print("=" * 60)
+        print("GESTURE DETECTOR BENCHMARK")
+        print("=" * 60)
+        for source, timings in results.items():
+            print(f"\n{source} landmarks ({args.detectors} frames)")
+            for name, entry in timings.items():
+                if isinstance(entry, dict):
+                    print(f"  {name:<18} {entry['calls']:>7} calls {entry['mean_us']:>9.1f} us")
+            print(f"  mismatched frames: {timings['mismatched_frames']}, "
+                  f"counters match: {timings['counters_match']}")
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"\n[OK] Results written to {args.json}")
+        return
+
+    widths = [None if w.strip() == 'full' else int(w) for w in args.widths.split(',') if w.strip()]
+    if widths[0] is not None:
+        widths.insert(0, None)
+    intervals = parse_detector_intervals(args.intervals)
+
+    sources = [(path, load_clip(path, args.max_frames)) for path in args.clips]
+    if args.synthetic:
+        sources.append(('synthetic', synthetic_frames(args.synthetic, seed=args.seed)))
+    sources = [(name, frames) for name, frames in sources if frames]
+    if not sources:
+        parser.error('no frames to benchmark (pass clips or --synthetic N)')
+
+    print("=" * 60)
+    print("GESTURE RECOGNITION BENCHMARK")
+    print("=" * 60)
+
+    results = []
+    for name, frames in sources:
+        print(f"\n{name} ({len(frames)} frames, {frames[0].shape[1]}x{frames[0].shape[0]})")
+        print(f"  {'width':>8} {'mean ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'fps':>7} "
+              f"{'gest %':>7} {'face %':>7} {'lm err px':>10}{'  alloc MB' if args.memory else ''}")
+        warmup = min(args.warmup, len(frames) - 1)
+        entries = benchmark(name, frames, widths, intervals, args.headless, warmup, args.memory,
+                            args.allocations, args.profile, args.face_roi)
+        for entry in entries:
+            error = entry['landmark_error_px']
+            memory = f"{entry['alloc_peak_mb']:>10.1f}" if 'alloc_peak_mb' in entry else ''
+            print(f"  {width_label(entry):>8} {entry['mean_ms']:>8.1f} {entry['p95_ms']:>8.1f} "
+                  f"{entry['p99_ms']:>8.1f} {entry['fps']:>7.1f} {entry['gesture_agreement']:>7.1f} "
+                  f"{entry['face_agreement']:>7.1f} {(f'{error:.2f}' if error is not None else '-'):>10}{memory}")
+
+        print("\n  stage p50/p95 ms  " + ' '.join(f"{stage:>13}" for stage in STAGES))
+        for entry in entries:
+            cells = ' '.join(f"{stages['p50_ms']:>6.1f}/{stages['p95_ms']:<6.1f}"
+                             for stages in (entry['stages'][stage] for stage in STAGES))
+            print(f"  {width_label(entry):>16} {cells}")
+
+        if args.allocations:
+            print("\n  allocs/frame KB (frames) " + ' '.join(f"{stage:>18}" for stage in ALLOCATION_STAGES)
+                  + "   pool allocated/reused")
+            for entry in entries:
+                allocations = entry.get('allocations')
+                if allocations is None:
+                    continue
+                cells = ' '.join(f"{allocations[stage]['kb']:>10.1f} ({allocations[stage]['frames']:>4.2f})"
+                                 for stage in ALLOCATION_STAGES)
+                pool = allocations['pool']
+                print(f"  {str(entry['inference_width']):>24} {cells}   {pool['allocated']}/{pool['reused']}")
+        if args.face_roi:
+            print("\n  FaceMesh cropping (+roi rows are compared with the whole-frame run at their width)")
+            for entry in entries:
+                if entry.get('face_roi'):
+                    roi = entry['roi']
+                    print(f"  {width_label(entry):>10}  cropped {roi['cropped_percent']:>5.1f}% of runs, "
+                          f"face lost in window {roi['lost']}x, window placed {roi['windows_placed']}x")
+        results.extend(entries)
+
+    rss = peak_rss_mb()
+    if rss is not None:
+        print(f"\nPeak RSS: {rss:.0f} MB")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare_results(results, json.load(f))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n[OK] Results written to {args.json}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""
+Gesture Events
+Turns per-frame gesture signals into debounced onset/offset events, so
+counts and durations describe what the candidate did rather than how
+many frames were processed
+
+A gesture turns on once its signal has held for min_on seconds (the event
+starts at the first frame of that run) and off once it has been absent
+for min_off seconds (the event ends at the first absent frame). Gaps
+shorter than min_off are bridged, both before and after the onset, so
+single-frame detector dropouts neither split an event nor delay it. Everything is measured in
+timestamps, not frames, so results hold at any frame rate.
+
+Counts, dwell totals and open events are also published as an immutable
+EventState after every frame that changes them, so readers on other
+threads never take the tracker's lock.
+"""
+
+import threading
+from collections import deque, namedtuple
+from types import MappingProxyType
+
+# Event key -> test on a current_gestures dict. Keys match the per-frame
+# counters in GestureRecognizer.gestures_detected.
+EVENT_SIGNALS = {
+    'smile': lambda g: g.get('smile'),
+    'eye_contact': lambda g: g.get('eye_contact'),
+    'nod': lambda g: g.get('head_nod'),
+    'thumbs_up': lambda g: g.get('thumbs_up'),
+    'wave': lambda g: g.get('wave'),
+    'thinking': lambda g: g.get('thinking'),
+    'nervous_gestures': lambda g: g.get('nervous'),
+    'confident_posture': lambda g: g.get('posture') == 'confident'
+}
+
+# (min_on, min_off) seconds per event key
+DEFAULT_EVENT_TIMING = {
+    'smile': (0.3, 0.5),
+    'eye_contact': (0.5, 0.5),
+    'nod': (0.0, 1.0),  # the nod detector already needs a 10-sample window
+    'thumbs_up': (0.3, 0.5),
+    'wave': (0.3, 1.0),
+    'thinking': (1.0, 1.0),
+    'nervous_gestures': (0.5, 1.0),
+    'confident_posture': (2.0, 2.0)
+}
+
+# Completed events kept for inspection; counts and dwell totals are unbounded
+MAX_EVENTS = 1000
+
+# Proctoring warnings for live clients: warning -> (event key, raised when
+# the event is active or when it is not)
+LIVE_WARNINGS = {
+    'looking_away': ('eye_contact', False),
+    'nervous': ('nervous_gestures', True)
+}
+
+
+class EventState(namedtuple('EventState', 'counts dwell open_events last_time')):
+    """Read-only tracker state: event counts, dwell seconds of finished
+    events, and (key, started, absent_since) per open event"""
+
+    __slots__ = ()
+
+    def dwell_seconds(self, last_time=None):
+        """Dwell per key with open events running to last_time (or their first absent frame)"""
+        last_time = self.last_time if last_time is None else last_time
+        totals = dict(self.dwell)
+        for key, started, absent_since in self.open_events:
+            totals[key] += (last_time if absent_since is None else absent_since) - started
+        return {key: round(value, 3) for key, value in totals.items()}
+
+    def active(self):
+        return [key for key, _, _ in self.open_events]
+
+
+class _SignalState:
+    __slots__ = ('active', 'pending_since', 'absent_since', 'started')
+
+    def __init__(self):
+        self.active = False
+        self.pending_since = None  # first frame of a run not yet confirmed
+        self.absent_since = None   # first absent frame while active
+        self.started = None
+
+
+class GestureEventTracker:
+    """Per-gesture hysteresis state machines fed one frame at a time"""
+
+    def __init__(self, start_time, timing=None, max_events=MAX_EVENTS):
+        self.start_time = start_time
+        self.timing = dict(DEFAULT_EVENT_TIMING)
+        self.timing.update(timing or {})
+        self.states = {key: _SignalState() for key in EVENT_SIGNALS}
+        self.counts = {key: 0 for key in EVENT_SIGNALS}
+        self.dwell = {key: 0.0 for key in EVENT_SIGNALS}
+        self.events = deque(maxlen=max_events)
+        self.last_time = start_time
+        self.lock = threading.Lock()
+        self._publish()
+
+    def _publish(self):
+        """Replace self.state (call with the lock held, or before sharing)"""
+        self.state = EventState(
+            MappingProxyType(dict(self.counts)),
+            MappingProxyType(dict(self.dwell)),
+            tuple((key, state.started, state.absent_since)
+                  for key, state in self.states.items() if state.active),
+            self.last_time
+        )
+
+    def update(self, timestamp, gestures):
+        """Feed one frame; returns the [(kind, key, time)] transitions it caused
+
+        kind is 'onset' (time = event start) or 'offset' (time = event end).
+        """
+        transitions = []
+        with self.lock:
+            self.last_time = timestamp
+            changed = False
+            for key, signal in EVENT_SIGNALS.items():
+                state = self.states[key]
+                min_on, min_off = self.timing[key]
+
+                if signal(gestures):
+                    if state.active:
+                        changed |= state.absent_since is not None
+                        state.absent_since = None
+                        continue
+                    state.absent_since = None
+                    if state.pending_since is None:
+                        state.pending_since = timestamp
+                    if timestamp - state.pending_since >= min_on:
+                        state.active = True
+                        state.started = state.pending_since
+                        state.pending_since = None
+                        self.counts[key] += 1
+                        changed = True
+                        transitions.append(('onset', key, state.started))
+                else:
+                    if not state.active and state.pending_since is None:
+                        continue
+                    if state.absent_since is None:
+                        state.absent_since = timestamp
+                        changed |= state.active
+                    if timestamp - state.absent_since < min_off:
+                        continue
+                    if state.active:
+                        ended = state.absent_since
+                        self._finish(key, state, ended)
+                        changed = True
+                        transitions.append(('offset', key, ended))
+                    else:
+                        # The run never lasted min_on; drop it
+                        state.pending_since = None
+                        state.absent_since = None
+            if changed:
+                self._publish()
+            elif self.state.open_events:
+                # Open events' dwell runs to last_time, so it moves every frame
+                self.state = self.state._replace(last_time=timestamp)
+        return transitions
+
+    def _finish(self, key, state, end):
+        self.dwell[key] += end - state.started
+        self.events.append({
+            'gesture': key,
+            'start': round(state.started - self.start_time, 3),
+            'end': round(end - self.start_time, 3),
+            'duration': round(end - state.started, 3)
+        })
+        state.active = False
+        state.absent_since = None
+        state.started = None
+
+    def close(self, timestamp=None):
+        """End every active event (at its first absent frame, or at timestamp)"""
+        with self.lock:
+            timestamp = self.last_time if timestamp is None else timestamp
+            for key, state in self.states.items():
+                if state.active:
+                    self._finish(key, state, timestamp if state.absent_since is None else state.absent_since)
+                state.pending_since = None
+            self._publish()
+
+    def dwell_seconds(self):
+        """Total active seconds per event key, including events still running"""
+        return self.state.dwell_seconds()
+
+    def active(self):
+        return self.state.active()
+
+    def recent_events(self, limit=None):
+        """Completed events, oldest first, with times in seconds since start"""
+        with self.lock:
+            events = list(self.events)
+        return events[-limit:] if limit else events
+
+
+def live_state(gestures, tracker=None):
+    """Gesture and warning state pushed to live subscribers
+
+    Warnings follow the tracker's debounced events, so a one-frame dropout
+    doesn't raise one; without a tracker the frame's own signals are used.
+    """
+    if tracker is not None:
+        active = tracker.active()
+    else:
+        active = [key for key, signal in EVENT_SIGNALS.items() if signal(gestures)]
+    return {
+        'gestures': dict(gestures),
+        'active': active,
+        'warnings': [warning for warning, (key, when_active) in LIVE_WARNINGS.items()
+                     if (key in active) == when_active]
+    }
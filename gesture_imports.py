@@ -0,0 +1,40 @@
+"""
+Deferred Imports
+OpenCV and MediaPipe take most of a second to import; modules the API
+server loads at startup bind them through lazy_import instead, so the
+server comes up without them and the first attribute access (the first
+frame, the first graph) pays for the import
+"""
+
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """Module object for name that is only executed on first attribute access
+
+    Raises ImportError straight away if the module isn't installed. An
+    already imported module is returned as-is.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ImportError(f"No module named '{name}'", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def is_loaded(name):
+    """Whether a module has actually been executed (not just lazily bound)"""
+    module = sys.modules.get(name)
+    if module is None:
+        return False
+    # LazyLoader swaps the module's class back to ModuleType once it has run
+    return type(module) is type(sys)
@@ -0,0 +1,157 @@
+"""
+Packed Landmark Frames
+Binary format for landmarks computed client-side (MediaPipe in the
+browser), so the server can run the gesture detectors without receiving
+or decoding video
+
+Each frame (little-endian):
+    header   17 bytes  '<2sBBHHHBBBI'
+             magic b'GL', version 2, dims (2 = x,y or 3 = x,y,z),
+             image width, image height,
+             face points (0, len(FACE_KEYPOINTS), 468 or 478),
+             pose points (0, len(POSE_KEYPOINTS) or 33),
+             hand count (0-2), points per hand (len(HAND_KEYPOINTS) or 21),
+             capture time in milliseconds on the client's clock (wraps)
+    handedness  hand count bytes, 0 = Left, 1 = Right
+    landmarks   float16 normalized coordinates: face, pose, then hands
+
+Sending only the keypoints the detectors read keeps a frame around
+100 bytes; full landmark sets are accepted too. Several frames may be
+concatenated in one request body; their capture times keep the event
+debouncing and timeline in real time however they are batched.
+"""
+
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+MAGIC = b'GL'
+VERSION = 2
+HEADER = struct.Struct('<2sBBHHHBBBI')
+
+# Capture times are milliseconds modulo 2**32
+TIME_WRAP = 1 << 32
+
+# Landmarks read by the detectors in gesture_recognition, in wire order
+FACE_KEYPOINTS = (1, 13, 14, 33, 61, 263, 291)
+POSE_KEYPOINTS = (0, 11, 12, 23, 24)
+HAND_KEYPOINTS = (0, 4, 8, 12, 16, 20)
+
+FULL_FACE_POINTS = (468, 478)
+FULL_POSE_POINTS = 33
+FULL_HAND_POINTS = 21
+
+HANDEDNESS = ('Left', 'Right')
+
+Landmark = namedtuple('Landmark', 'x y z')
+LandmarkFrame = namedtuple('LandmarkFrame', 'width height face hands pose time_ms')
+
+
+class LandmarkFormatError(ValueError):
+    """Raised for malformed packed landmark data"""
+
+
+class PackedLandmarkList:
+    """MediaPipe-style landmark list (.landmark[i].x/.y) over an array
+
+    keypoints maps the original MediaPipe indices to rows when only a
+    subset of the landmarks was sent.
+    """
+
+    __slots__ = ('points', 'index', 'landmark')
+
+    def __init__(self, points, keypoints=None):
+        self.points = points
+        self.index = {point: row for row, point in enumerate(keypoints)} if keypoints else None
+        self.landmark = self
+
+    def __getitem__(self, i):
+        row = self.points[self.index[i] if self.index is not None else i]
+        return Landmark(float(row[0]), float(row[1]), float(row[2]) if len(row) > 2 else 0.0)
+
+    def __len__(self):
+        return len(self.points)
+
+
+def _keypoints_for(count, subset, full_counts):
+    if count == len(subset):
+        return subset
+    if count in full_counts:
+        return None
+    raise LandmarkFormatError(f'Unsupported landmark count {count}')
+
+
+def encode_frame(width, height, face=None, hands=(), pose=None, dims=2, time_ms=0):
+    """Pack one frame of landmarks
+
+    face/pose are (N, >=dims) arrays of normalized coordinates holding
+    either the keypoint subset or the full set; hands is a list of
+    (array, 'Left'|'Right'). time_ms is the capture time in milliseconds
+    on any steadily increasing client clock (e.g. performance.now()).
+    """
+    face = np.zeros((0, dims)) if face is None else np.asarray(face)[:, :dims]
+    pose = np.zeros((0, dims)) if pose is None else np.asarray(pose)[:, :dims]
+    hand_arrays = [np.asarray(points)[:, :dims] for points, _ in hands]
+    hand_points = len(hand_arrays[0]) if hand_arrays else 0
+
+    parts = [
+        HEADER.pack(MAGIC, VERSION, dims, width, height, len(face), len(pose), len(hand_arrays), hand_points,
+                    int(time_ms) % TIME_WRAP),
+        bytes(HANDEDNESS.index(label) for _, label in hands)
+    ]
+    for array in [face, pose] + hand_arrays:
+        parts.append(np.ascontiguousarray(array, dtype='<f2').tobytes())
+    return b''.join(parts)
+
+
+def decode_frames(data):
+    """Parse one or more concatenated packed frames into LandmarkFrames"""
+    view = memoryview(data)
+    offset = 0
+    frames = []
+
+    while offset < len(view):
+        if len(view) - offset < HEADER.size:
+            raise LandmarkFormatError('Truncated header')
+        magic, version, dims, width, height, face_n, pose_n, hand_n, hand_points, time_ms = \
+            HEADER.unpack_from(view, offset)
+        if magic != MAGIC:
+            raise LandmarkFormatError('Not a packed landmark frame')
+        if version != VERSION:
+            raise LandmarkFormatError(f'Unsupported landmark format version {version}')
+        if dims not in (2, 3) or hand_n > 2:
+            raise LandmarkFormatError('Invalid dimensions or hand count')
+        offset += HEADER.size
+
+        handedness = bytes(view[offset:offset + hand_n])
+        offset += hand_n
+
+        count = (face_n + pose_n + hand_n * hand_points) * dims
+        if len(view) - offset < count * 2:
+            raise LandmarkFormatError('Truncated landmark data')
+        values = np.frombuffer(view, dtype='<f2', count=count, offset=offset).astype(np.float32)
+        offset += count * 2
+        values = values.reshape(-1, dims)
+
+        face = None
+        if face_n:
+            face = PackedLandmarkList(values[:face_n],
+                                      _keypoints_for(face_n, FACE_KEYPOINTS, FULL_FACE_POINTS))
+        pose = None
+        if pose_n:
+            pose = PackedLandmarkList(values[face_n:face_n + pose_n],
+                                      _keypoints_for(pose_n, POSE_KEYPOINTS, (FULL_POSE_POINTS,)))
+        hands = []
+        if hand_n:
+            keypoints = _keypoints_for(hand_points, HAND_KEYPOINTS, (FULL_HAND_POINTS,))
+            start = face_n + pose_n
+            for i in range(hand_n):
+                if handedness[i] > 1:
+                    raise LandmarkFormatError('Invalid handedness')
+                points = values[start + i * hand_points:start + (i + 1) * hand_points]
+                hands.append((PackedLandmarkList(points, keypoints), HANDEDNESS[handedness[i]]))
+
+        frames.append(LandmarkFrame(width, height, face, hands, pose, time_ms))
+
+    return frames
@@ -0,0 +1,374 @@
+"""
+Gesture Pipeline Primitives
+Bounded hand-off buffers, reusable frame buffers, timing stats and the
+CPU budget governor for the staged capture -> inference -> encode pipeline
+in gesture_api
+"""
+
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Inference widths the governor steps down through once the frame rate is
+# at its floor (never above the recognizer's configured width)
+GOVERNOR_WIDTHS = (960, 640, 480, 320)
+
+
+class FrameRing:
+    """Bounded drop-oldest buffer between two pipeline stages
+
+    Producers never block: when the ring is full the oldest item is
+    discarded, so a slow consumer loses frames instead of falling behind
+    the camera. Consumers wait on a condition variable instead of polling.
+    on_drop is called with every item discarded without being consumed
+    (overwritten, skipped by a latest get, or cleared), e.g. to return its
+    buffer to a FramePool.
+    """
+
+    def __init__(self, capacity=2, on_drop=None):
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self.capacity = capacity
+        self.on_drop = on_drop
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.put_count = 0
+        self.dropped = 0
+
+    def _discard(self, items):
+        if self.on_drop is not None:
+            for item in items:
+                self.on_drop(item)
+
+    def put(self, item):
+        """Add an item, discarding the oldest one if the ring is full"""
+        with self._cond:
+            if len(self._items) >= self.capacity:
+                self._discard([self._items.popleft()])
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self._cond.notify()
+
+    def get(self, timeout=None, latest=False):
+        """Wait for an item and return it (None on timeout or close)
+
+        latest=True returns the newest item and drops any older ones,
+        for consumers that only care about the freshest frame.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._items or self._closed, timeout):
+                return None
+            if not self._items:
+                return None
+            if latest:
+                self.dropped += len(self._items) - 1
+                item = self._items.pop()
+                self._discard(self._items)
+                self._items.clear()
+                return item
+            return self._items.popleft()
+
+    def close(self):
+        """Wake all waiting consumers; later gets return None immediately"""
+        with self._cond:
+            self._closed = True
+            self._discard(self._items)
+            self._items.clear()
+            self._cond.notify_all()
+
+    def reset(self):
+        """Reopen a closed ring and zero its counters"""
+        with self._cond:
+            self._closed = False
+            self._discard(self._items)
+            self._items.clear()
+            self.put_count = 0
+            self.dropped = 0
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+
+class FramePool:
+    """Reusable frame buffers handed from stage to stage
+
+    acquire() returns a free buffer of the requested shape, allocating only
+    when none is free; the buffer goes back to the pool once every holder
+    has called release() (retain() adds a holder). In steady state the
+    pipeline cycles through a handful of buffers instead of allocating
+    several frames per camera frame.
+    """
+
+    def __init__(self, max_free=8):
+        self.max_free = max_free
+        self._free = {}  # (shape, dtype) -> [buffer]
+        self._refs = {}  # id(buffer) -> [buffer, holders]
+        self._lock = threading.Lock()
+        self.allocated = 0
+        self.reused = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        """A buffer of shape/dtype with one holder; its contents are stale"""
+        key = (tuple(shape), np.dtype(dtype).str)
+        with self._lock:
+            free = self._free.get(key)
+            if free:
+                buffer = free.pop()
+                self.reused += 1
+            else:
+                buffer = np.empty(shape, dtype=dtype)
+                self.allocated += 1
+            self._refs[id(buffer)] = [buffer, 1]
+        return buffer
+
+    def retain(self, buffer):
+        """Add a holder to a buffer from acquire()"""
+        with self._lock:
+            self._refs[id(buffer)][1] += 1
+
+    def release(self, buffer):
+        """Drop a holder; the last release makes the buffer reusable"""
+        with self._lock:
+            entry = self._refs.get(id(buffer))
+            if entry is None or entry[0] is not buffer:
+                raise ValueError('buffer was not acquired from this pool')
+            entry[1] -= 1
+            if entry[1]:
+                return
+            del self._refs[id(buffer)]
+            # Buffers of a shape no longer in use (e.g. after a camera
+            # resolution change) are left to the garbage collector
+            free = self._free.setdefault((buffer.shape, buffer.dtype.str), [])
+            if len(free) < self.max_free:
+                free.append(buffer)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'allocated': self.allocated,
+                'reused': self.reused,
+                'in_use': len(self._refs),
+                'free': sum(len(free) for free in self._free.values())
+            }
+
+
+class FrameRateGovernor:
+    """Keeps a recognizer's inference within a CPU budget
+
+    budget is the share of one core inference may use (processing seconds
+    per wall-clock second; 0 disables the governor). Each processed frame's
+    time feeds a moving average, and once per interval the operating point
+    is adjusted: over budget, the target frame rate drops to what the
+    budget affords, and below min_fps the inference width steps down;
+    with headroom, width is restored first, then frame rate (at a reduced
+    width too, while widening would not fit the budget). Callers wait
+    wait_time() before taking a frame, so skipped frames cost nothing.
+    """
+
+    def __init__(self, budget=1.0, max_fps=30.0, min_fps=5.0, inference_width=None, adapt_width=True,
+                 interval=1.0, widths=GOVERNOR_WIDTHS):
+        self.budget = budget
+        self.max_fps = max_fps
+        self.min_fps = min(min_fps, max_fps)
+        self.interval = interval
+        # Widths from the configured one (None = full frame) downwards
+        self.widths = [inference_width]
+        if adapt_width:
+            self.widths += [w for w in widths if inference_width is None or w < inference_width]
+        self.level = 0
+        self.fps = max_fps
+        self.frame_seconds = None  # moving average of processing time
+        self.last_started = None
+        self.window_started = None
+        self.window_frames = 0
+        self.measured_fps = 0.0
+        self.adjustments = 0
+        self._lock = threading.Lock()
+
+    @property
+    def inference_width(self):
+        return self.widths[self.level]
+
+    def wait_time(self, now=None):
+        """Seconds until the next frame is due at the target rate"""
+        with self._lock:
+            if self.last_started is None:
+                return 0.0
+            now = time.perf_counter() if now is None else now
+            return max(0.0, self.last_started + 1 / self.fps - now)
+
+    def ready(self, now=None):
+        return self.wait_time(now) <= 0
+
+    def record(self, seconds, started=None):
+        """Record one processed frame (started: its perf_counter start time)"""
+        started = time.perf_counter() - seconds if started is None else started
+        with self._lock:
+            self.last_started = started
+            self.frame_seconds = seconds if self.frame_seconds is None \
+                else 0.8 * self.frame_seconds + 0.2 * seconds
+            if self.window_started is None:
+                self.window_started = started
+            self.window_frames += 1
+            elapsed = started + seconds - self.window_started
+            if elapsed >= self.interval:
+                self.measured_fps = self.window_frames / elapsed
+                self.window_started = started + seconds
+                self.window_frames = 0
+                if self.budget > 0:
+                    self._adjust()
+
+    def _adjust(self):
+        cost = self.frame_seconds
+        if cost <= 0:
+            return
+        load = cost * self.fps
+        fps, level = self.fps, self.level
+
+        if load > self.budget * 1.1:
+            fps = self.budget / cost
+            if fps < self.min_fps:
+                fps = self.min_fps
+                level = min(level + 1, len(self.widths) - 1)
+        elif load < self.budget * 0.7:
+            # Wider inference frames cost more; only step up with room to
+            # spare, otherwise use the headroom for frame rate at this width
+            if level > 0 and load * 1.5 < self.budget * 0.7:
+                level -= 1
+            else:
+                fps = min(self.max_fps, self.budget * 0.9 / cost)
+
+        fps = max(self.min_fps, min(self.max_fps, fps))
+        if level != self.level or abs(fps - self.fps) >= 0.5:
+            self.adjustments += 1
+            self.fps, self.level = fps, level
+
+    def get_state(self):
+        """Current operating point"""
+        with self._lock:
+            cost = self.frame_seconds or 0.0
+            return {
+                'enabled': self.budget > 0,
+                'cpu_budget': round(self.budget, 3),
+                'cpu_load': round(cost * self.measured_fps, 3),
+                'target_fps': round(self.fps, 1),
+                'measured_fps': round(self.measured_fps, 1),
+                'frame_ms': round(cost * 1000, 2),
+                'inference_width': self.inference_width,
+                'adjustments': self.adjustments
+            }
+
+
+class StageStats:
+    """Rolling latency samples for one pipeline stage"""
+
+    def __init__(self, window=300):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+
+    def time(self):
+        """Context manager that records the duration of its block"""
+        return _StageTimer(self)
+
+    def summary(self):
+        """Latency summary over the rolling window, in milliseconds"""
+        with self._lock:
+            samples = np.array(self._samples) * 1000
+            count = self.count
+
+        if not len(samples):
+            return {'count': count, 'avg_ms': 0.0, 'p50_ms': 0.0, 'p95_ms': 0.0, 'max_ms': 0.0}
+
+        return {
+            'count': count,
+            'avg_ms': round(float(samples.mean()), 2),
+            'p50_ms': round(float(np.percentile(samples, 50)), 2),
+            'p95_ms': round(float(np.percentile(samples, 95)), 2),
+            'max_ms': round(float(samples.max()), 2)
+        }
+
+
+class _StageTimer:
+    def __init__(self, stats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.stats.record(time.perf_counter() - self.started)
+        return False
+
+
+class VersionedBuffer:
+    """Latest published value with a version number for fan-out readers
+
+    One writer publishes (e.g. each encoded JPEG exactly once); any number
+    of readers wait on a condition variable for a version newer than the
+    one they last saw and all receive the same immutable object.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._value = None
+        self._closed = False
+        self.version = 0
+
+    def publish(self, value):
+        """Replace the value and wake every waiting reader"""
+        with self._cond:
+            self._value = value
+            self.version += 1
+            self._cond.notify_all()
+
+    def update(self, value):
+        """Publish value only if it differs from the current one
+
+        For small state dicts whose readers only care about changes;
+        returns whether a new version was published.
+        """
+        with self._cond:
+            if self.version and value == self._value:
+                return False
+            self._value = value
+            self.version += 1
+            self._cond.notify_all()
+            return True
+
+    def latest(self):
+        """Return (version, value) without waiting"""
+        with self._cond:
+            return self.version, self._value
+
+    def wait_newer(self, version, timeout=None):
+        """Wait until the version exceeds `version`; returns (version, value)
+
+        On timeout or close the current (possibly unchanged) version is
+        returned, so callers compare it with what they passed in.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self.version > version or self._closed, timeout)
+            return self.version, self._value
+
+    def close(self):
+        """Wake all readers; waits return immediately until reopened"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reopen(self):
+        """Accept waiters again (the version keeps counting up)"""
+        with self._cond:
+            self._closed = False
@@ -3,51 +3,392 @@ Live Camera Gesture Recognition System for Interview Application
 Uses OpenCV, MediaPipe, and TensorFlow for real-time gesture detection
 """
 
-import cv2
-import mediapipe as mp
 import numpy as np
 import time
-from collections import deque
+from collections import deque, namedtuple
 import json
 from datetime import datetime
+from types import MappingProxyType
+
+from gesture_imports import lazy_import
+from gesture_landmarks import FACE_KEYPOINTS, POSE_KEYPOINTS, HAND_KEYPOINTS, PackedLandmarkList
+from gesture_timeline import DEFAULT_CAPACITY as TIMELINE_CAPACITY, GestureTimeline
+from gesture_events import GestureEventTracker
+
+# Imported on first use: landmark-only recognizers and the API server's
+# startup never need them
+cv2 = lazy_import('cv2')
+mp = lazy_import('mediapipe')
+
+
+# Run each MediaPipe graph every Nth frame and reuse its last result in
+# between. Face drives smile/eye contact/nod so it runs every frame; hands
+# and body posture change slowly enough to be sampled less often.
+DEFAULT_DETECTOR_INTERVALS = {
+    'face': 1,
+    'hands': 2,
+    'pose': 3
+}
+
+# MediaPipe graphs each detector profile runs. Gestures whose graph is off
+# never fire: face drives smile, eye contact and nods, hands drive thumbs
+# up, wave, nervous and thinking (with pose), pose drives posture.
+DETECTOR_PROFILES = {
+    'full': ('face', 'hands', 'pose'),
+    'proctoring': ('face', 'pose'),  # eye contact and posture, no hand tracking
+    'face_only': ('face',),
+    'landmarks': ()  # landmarks come from the client; analyze_landmarks only
+}
+DEFAULT_DETECTOR_PROFILE = 'full'
+
+# Landmark models work on small inputs (FaceMesh 192x192, Pose 256x256), so
+# frames are downscaled to this width for inference; landmarks come back
+# normalized and are used against the full-resolution display frame.
+DEFAULT_INFERENCE_WIDTH = 640
+
+# Optional FaceMesh cropping (face_roi=True): once a face is found, FaceMesh
+# runs on a window around it instead of the whole inference frame, the face
+# box grown by FACE_ROI_MARGIN of its size on each side. The window stays
+# put while the face keeps FACE_ROI_SLACK of its size clear of its edges
+# (MediaPipe's own tracking assumes a steady view), and the whole frame is
+# searched again as soon as the face is lost in it. FaceMesh already tracks
+# on a 192x192 crop of its own, so this saves little time; see the
+# benchmark's --face-roi.
+FACE_ROI_MARGIN = 0.6
+FACE_ROI_SLACK = 0.15
+
+
+# Boolean gestures in bit order plus posture codes, for compact transport
+# and storage of per-frame results
+GESTURE_FLAGS = ('smile', 'eye_contact', 'head_nod', 'thumbs_up', 'wave', 'thinking', 'nervous')
+POSTURE_CODES = {'unknown': 0, 'confident': 1, 'slouching': 2}
+POSTURE_LABELS = {code: label for label, code in POSTURE_CODES.items()}
+
+
+def pack_gestures(gestures):
+    """Encode a current_gestures dict as (bit flags, posture code)"""
+    flags = 0
+    for bit, name in enumerate(GESTURE_FLAGS):
+        if gestures.get(name):
+            flags |= 1 << bit
+    return flags, POSTURE_CODES.get(gestures.get('posture'), 0)
+
+
+def unpack_gestures(flags, posture_code):
+    """Decode (bit flags, posture code) back into a current_gestures dict"""
+    gestures = {name: bool(int(flags) >> bit & 1) for bit, name in enumerate(GESTURE_FLAGS)}
+    gestures['posture'] = POSTURE_LABELS.get(int(posture_code), 'unknown')
+    return gestures
+
+
+def parse_detector_intervals(value):
+    """Parse 'face=1,hands=2,pose=3' into a detector interval dict"""
+    intervals = {}
+    for item in (value or '').split(','):
+        if item.strip():
+            name, interval = item.split('=')
+            intervals[name.strip()] = int(interval)
+    return intervals
+
+
+# Read-only recognizer state, replaced as a whole after every frame; see
+# GestureRecognizer.snapshot
+RecognizerSnapshot = namedtuple(
+    'RecognizerSnapshot', 'frame_count timestamp processing_seconds gestures gesture_frames events'
+)
+
+
+MAX_HANDS = 2
+
+# Rows of the per-frame keypoint array: face, pose, then each hand, in the
+# gesture_landmarks keypoint order
+_POSE_BASE = len(FACE_KEYPOINTS)
+_HAND_BASE = _POSE_BASE + len(POSE_KEYPOINTS)
+KEYPOINT_ROWS = _HAND_BASE + MAX_HANDS * len(HAND_KEYPOINTS)
+_X, _Y = 0, 1
+
+# Columns of the feature vector; the hand block repeats per hand
+(F_MOUTH_WIDTH, F_MOUTH_HEIGHT, F_EYE_DISTANCE, F_NOSE_OFFSET, F_NOSE_Y,
+ F_TORSO_LIFT, F_SHOULDER_WIDTH) = range(7)
+(H_THUMB_RISE, H_INDEX_DROP, H_MIDDLE_DROP, H_RING_DROP, H_PINKY_DROP,
+ H_WRIST_X, H_NOSE_DX, H_NOSE_DY) = range(8)
+_HAND_FEATURES = 8
+FEATURE_COUNT = 7 + MAX_HANDS * _HAND_FEATURES
+
+
+def _face_row(index):
+    return FACE_KEYPOINTS.index(index)
+
+
+def _pose_row(index):
+    return _POSE_BASE + POSE_KEYPOINTS.index(index)
+
+
+def _hand_row(hand, index):
+    return _HAND_BASE + hand * len(HAND_KEYPOINTS) + HAND_KEYPOINTS.index(index)
+
+
+def _build_feature_matrix():
+    """Linear map from the flattened keypoints (x0, y0, x1, y1, ...) to features
+    
+    Every quantity the detectors threshold is a difference or midpoint of
+    landmark coordinates, so one matrix product yields all of them.
+    """
+    matrix = np.zeros((FEATURE_COUNT, KEYPOINT_ROWS * 2))
+    
+    def feature(column, *terms):
+        for weight, row, axis in terms:
+            matrix[column, row * 2 + axis] += weight
+    
+    feature(F_MOUTH_WIDTH, (1, _face_row(291), _X), (-1, _face_row(61), _X))
+    feature(F_MOUTH_HEIGHT, (1, _face_row(13), _Y), (-1, _face_row(14), _Y))
+    feature(F_EYE_DISTANCE, (1, _face_row(263), _X), (-1, _face_row(33), _X))
+    feature(F_NOSE_OFFSET, (1, _face_row(1), _X), (-0.5, _face_row(33), _X), (-0.5, _face_row(263), _X))
+    feature(F_NOSE_Y, (1, _face_row(1), _Y))
+    feature(F_TORSO_LIFT, (0.5, _pose_row(23), _Y), (0.5, _pose_row(24), _Y),
+            (-0.5, _pose_row(11), _Y), (-0.5, _pose_row(12), _Y))
+    feature(F_SHOULDER_WIDTH, (1, _pose_row(12), _X), (-1, _pose_row(11), _X))
+    
+    for hand in range(MAX_HANDS):
+        base = 7 + hand * _HAND_FEATURES
+        wrist = _hand_row(hand, 0)
+        feature(base + H_THUMB_RISE, (1, wrist, _Y), (-1, _hand_row(hand, 4), _Y))
+        for column, tip in zip(range(H_INDEX_DROP, H_PINKY_DROP + 1), (8, 12, 16, 20)):
+            feature(base + column, (1, _hand_row(hand, tip), _Y), (-1, wrist, _Y))
+        feature(base + H_WRIST_X, (1, wrist, _X))
+        feature(base + H_NOSE_DX, (1, wrist, _X), (-1, _pose_row(0), _X))
+        feature(base + H_NOSE_DY, (1, wrist, _Y), (-1, _pose_row(0), _Y))
+    
+    return matrix
+
+
+FEATURE_MATRIX = _build_feature_matrix()
+
+
+class RingArray:
+    """Fixed-size rolling window in a preallocated NumPy array
+    
+    Each value is written twice (at pos and pos + size) so the window,
+    oldest first, is always a contiguous view and never copied.
+    """
+    
+    def __init__(self, size):
+        self.data = np.zeros(size * 2, dtype=np.float64)
+        self.size = size
+        self.count = 0
+        self.pos = 0
+        self.appended = 0
+    
+    def append(self, value):
+        self.data[self.pos] = value
+        self.data[self.pos + self.size] = value
+        self.pos = (self.pos + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+        self.appended += 1
+    
+    def ordered(self):
+        """Current values oldest first (a view)"""
+        end = self.pos + self.size
+        return self.data[end - self.count:end]
+    
+    def last(self, n):
+        """The n most recent values, oldest first (a view)"""
+        end = self.pos + self.size
+        return self.data[end - min(n, self.count):end]
+    
+    def __len__(self):
+        return self.count
+
+
+class FaceRegionTracker:
+    """Crop window for FaceMesh input that follows the last detected face
+    
+    process() runs a FaceMesh graph of its own (from create_mesh) on the
+    window, so that graph's tracking always sees the same view, and the
+    whole-frame graph it is given when there is no window or the face was
+    lost in it. The window is kept in normalized coordinates, so it holds
+    across inference width changes, and landmarks found in the crop are
+    moved back to whole-frame coordinates.
+    """
+    
+    def __init__(self, create_mesh, margin=FACE_ROI_MARGIN, slack=FACE_ROI_SLACK):
+        self.create_mesh = create_mesh
+        self.mesh = None
+        self.margin = margin
+        self.slack = slack
+        self.window = None  # (x0, y0, x1, y1), normalized
+        self._face_width = None  # face width when the window was placed
+        self._outline = None  # face oval landmark indices
+        self._buffer = None
+        self.cropped = 0
+        self.full_frame = 0
+        self.lost = 0
+        self.placed = 0
+    
+    def process(self, rgb_frame, full_frame_mesh):
+        """FaceMesh results for the frame, in whole-frame coordinates
+        
+        A face lost in the window is looked for in the whole frame straight
+        away, so losing it costs one extra run rather than a missed frame.
+        """
+        crop, box = self.crop(rgb_frame)
+        if crop is not None:
+            if self.mesh is None:
+                self.mesh = self.create_mesh()
+            results = self.mesh.process(crop)
+            if results.multi_face_landmarks:
+                self.cropped += 1
+                height, width = rgb_frame.shape[:2]
+                self.remap(results.multi_face_landmarks[0], box, width, height)
+                self.update(results.multi_face_landmarks[0])
+                return results
+            self.lost += 1
+        
+        results = full_frame_mesh.process(rgb_frame)
+        self.full_frame += 1
+        self.update(results.multi_face_landmarks[0] if results.multi_face_landmarks else None)
+        return results
+    
+    def close(self):
+        """Close the window graph and forget the window"""
+        if self.mesh is not None:
+            self.mesh.close()
+            self.mesh = None
+        self.window = None
+    
+    def crop(self, rgb_frame):
+        """(crop, pixel box) for the current window, or (None, None) without one
+        
+        The crop is copied into a buffer reused while the window size stays
+        the same; it is only valid until the next call.
+        """
+        if self.window is None:
+            return None, None
+        height, width = rgb_frame.shape[:2]
+        x0, y0 = int(self.window[0] * width), int(self.window[1] * height)
+        x1, y1 = int(np.ceil(self.window[2] * width)), int(np.ceil(self.window[3] * height))
+        region = rgb_frame[y0:y1, x0:x1]
+        if self._buffer is None or self._buffer.shape != region.shape:
+            self._buffer = np.empty_like(region)
+        np.copyto(self._buffer, region)
+        return self._buffer, (x0, y0, x1, y1)
+    
+    @staticmethod
+    def remap(face_landmarks, box, width, height):
+        """Convert landmarks found in the crop at box to whole-frame coordinates (in place)"""
+        x0, y0, x1, y1 = box
+        scale_x, scale_y = (x1 - x0) / width, (y1 - y0) / height
+        offset_x, offset_y = x0 / width, y0 / height
+        for landmark in face_landmarks.landmark:
+            landmark.x = landmark.x * scale_x + offset_x
+            landmark.y = landmark.y * scale_y + offset_y
+            landmark.z *= scale_x  # z shares the x scale
+    
+    def update(self, face_landmarks):
+        """Follow the face (whole-frame landmarks), or drop the window if None"""
+        if face_landmarks is None:
+            self.window = None
+            return
+        if self._outline is None:
+            self._outline = sorted({index for edge in mp.solutions.face_mesh.FACEMESH_FACE_OVAL
+                                    for index in edge})
+        points = face_landmarks.landmark
+        xs = [points[index].x for index in self._outline]
+        ys = [points[index].y for index in self._outline]
+        left, top, right, bottom = min(xs), min(ys), max(xs), max(ys)
+        face_width, face_height = right - left, bottom - top
+        
+        if self.window is not None:
+            x0, y0, x1, y1 = self.window
+            slack_x, slack_y = face_width * self.slack, face_height * self.slack
+            # Keep the window unless the face nears its edge or has shrunk
+            # well inside it (moved away from the camera)
+            if (left - x0 >= slack_x or x0 <= 0) and (x1 - right >= slack_x or x1 >= 1) \
+                    and (top - y0 >= slack_y or y0 <= 0) and (y1 - bottom >= slack_y or y1 >= 1) \
+                    and face_width >= self._face_width * 0.5:
+                return
+        
+        margin_x, margin_y = face_width * self.margin, face_height * self.margin
+        self.window = (max(0.0, left - margin_x), max(0.0, top - margin_y),
+                       min(1.0, right + margin_x), min(1.0, bottom + margin_y))
+        self._face_width = face_width
+        self.placed += 1
+    
+    def get_state(self):
+        runs = self.cropped + self.full_frame
+        return {
+            'cropped_runs': self.cropped,
+            'full_frame_runs': self.full_frame,
+            'cropped_percent': round(self.cropped / runs * 100, 1) if runs else 0.0,
+            'lost': self.lost,
+            'windows_placed': self.placed
+        }
+
+
+def _keypoint_coords(landmarks, keypoints):
+    """Flat [x0, y0, x1, y1, ...] of the given landmark indices"""
+    if isinstance(landmarks, PackedLandmarkList):
+        # Packed frames carry either exactly these keypoints or the full set
+        points = landmarks.points if landmarks.index is not None else landmarks.points[list(keypoints)]
+        return points[:, :2].ravel().tolist()
+    
+    return [c for point in map(landmarks.landmark.__getitem__, keypoints) for c in (point.x, point.y)]
+
+
+_ABSENT = {
+    'face': [0.0] * (len(FACE_KEYPOINTS) * 2),
+    'pose': [0.0] * (len(POSE_KEYPOINTS) * 2),
+    'hand': [0.0] * (len(HAND_KEYPOINTS) * 2)
+}
 
 
 class GestureRecognizer:
     """Real-time gesture recognition using MediaPipe and OpenCV"""
     
-    def __init__(self):
-        # Initialize MediaPipe solutions
-        self.mp_face_mesh = mp.solutions.face_mesh
-        self.mp_hands = mp.solutions.hands
-        self.mp_pose = mp.solutions.pose
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.mp_drawing_styles = mp.solutions.drawing_styles
-        
-        # Initialize detectors
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        
-        self.hands = self.mp_hands.Hands(
-            static_image_mode=False,
-            max_num_hands=2,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
-        
-        self.pose = self.mp_pose.Pose(
-            static_image_mode=False,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5
-        )
+    def __init__(self, detector_intervals=None, inference_width=DEFAULT_INFERENCE_WIDTH, headless=False,
+                 profile=DEFAULT_DETECTOR_PROFILE, timeline_capacity=TIMELINE_CAPACITY, timeline_path=None,
+                 event_timing=None, face_roi=False):
+        # MediaPipe graphs, created the first time each one runs (or by
+        # load_detectors), and only those in the detector profile
+        self.detectors = {}
+        self.last_results = {}
+        # FaceMesh input window around the last face (None = always whole frame)
+        self.face_roi = FaceRegionTracker(lambda: self._create_detector('face')) if face_roi else None
+        self.set_profile(profile)
+        
+        # Per-detector cadence (frames between inferences)
+        self.detector_intervals = dict(DEFAULT_DETECTOR_INTERVALS)
+        if detector_intervals:
+            for name, interval in detector_intervals.items():
+                if name not in DEFAULT_DETECTOR_INTERVALS:
+                    raise ValueError(f"Unknown detector '{name}'")
+                if int(interval) < 1:
+                    raise ValueError(f"Interval for '{name}' must be at least 1")
+                self.detector_intervals[name] = int(interval)
+        
+        # Inference resolution (None or 0 = full frame) and the buffers the
+        # downscaled BGR/RGB frames are written into, reused across frames
+        self.inference_width = inference_width or None
+        self._inference_bgr = None
+        self._inference_rgb = None
+        self._indicator_overlay = None  # see draw_gesture_indicators
+        
+        # Headless: compute gestures only, never draw landmarks into frames
+        self.headless = headless
         
         # Gesture tracking data
         self.gesture_history = deque(maxlen=30)  # Last 30 frames
-        self.head_positions = deque(maxlen=10)
-        self.hand_positions = deque(maxlen=10)
+        self.head_positions = RingArray(10)
+        self.hand_positions = RingArray(10)
+        
+        # Per-frame keypoints, filled in place by extract_keypoints
+        self.keypoints = np.zeros((KEYPOINT_ROWS, 2))
+        self._keypoints_flat = self.keypoints.reshape(-1)
+        self._features = np.zeros(FEATURE_COUNT)
+        # (appends seen, result) for the rolling-window checks
+        self._nod_cache = (-1, False)
+        self._motion_cache = (-1, (False, False))
         
         # Gesture counters
         self.gestures_detected = {
@@ -64,196 +405,258 @@ class GestureRecognizer:
         # Session data
         self.session_start = time.time()
         self.frame_count = 0
-        
-    def calculate_distance(self, point1, point2):
-        """Calculate Euclidean distance between two points"""
-        return np.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
-    
-    def detect_smile(self, face_landmarks, image_width, image_height):
-        """Detect smile based on mouth landmarks"""
-        # Mouth corner points
-        left_mouth = face_landmarks.landmark[61]
-        right_mouth = face_landmarks.landmark[291]
-        top_lip = face_landmarks.landmark[13]
-        bottom_lip = face_landmarks.landmark[14]
-        
-        # Convert to pixel coordinates
-        mouth_width = abs(right_mouth.x - left_mouth.x) * image_width
-        mouth_height = abs(top_lip.y - bottom_lip.y) * image_height
-        
-        # Smile ratio
-        if mouth_height > 0:
-            smile_ratio = mouth_width / mouth_height
-            if smile_ratio > 3.5:
-                self.gestures_detected['smile'] += 1
-                return True, smile_ratio
-        
-        return False, 0
-    
-    def detect_eye_contact(self, face_landmarks, image_width, image_height):
-        """Detect if person is looking at camera"""
-        # Get eye landmarks
-        left_eye = face_landmarks.landmark[33]
-        right_eye = face_landmarks.landmark[263]
-        nose_tip = face_landmarks.landmark[1]
-        
-        # Calculate eye center
-        eye_center_x = (left_eye.x + right_eye.x) / 2
-        
-        # Check if nose is centered between eyes
-        deviation = abs(nose_tip.x - eye_center_x)
-        eye_distance = abs(right_eye.x - left_eye.x)
-        
-        if deviation < eye_distance * 0.15:  # Within 15% of eye distance
-            self.gestures_detected['eye_contact'] += 1
-            return True
-        
-        return False
-    
-    def detect_head_nod(self, face_landmarks, image_height):
-        """Detect head nodding gesture"""
-        nose_tip = face_landmarks.landmark[1]
-        current_y = nose_tip.y * image_height
-        
-        self.head_positions.append(current_y)
-        
-        if len(self.head_positions) >= 10:
-            positions = list(self.head_positions)
-            # Check for up-down pattern
-            max_pos = max(positions)
-            min_pos = min(positions)
-            
-            if max_pos - min_pos > 20:  # Significant vertical movement
-                # Check for oscillation pattern
-                mid_point = (max_pos + min_pos) / 2
-                crossings = 0
-                for i in range(1, len(positions)):
-                    if (positions[i-1] < mid_point and positions[i] >= mid_point) or \
-                       (positions[i-1] >= mid_point and positions[i] < mid_point):
-                        crossings += 1
-                
-                if crossings >= 2:  # At least one complete nod
-                    self.gestures_detected['nod'] += 1
-                    return True
-        
-        return False
-    
-    def detect_thumbs_up(self, hand_landmarks, handedness):
-        """Detect thumbs up gesture"""
-        # Get thumb and finger tips
-        thumb_tip = hand_landmarks.landmark[4]
-        index_tip = hand_landmarks.landmark[8]
-        middle_tip = hand_landmarks.landmark[12]
-        ring_tip = hand_landmarks.landmark[16]
-        pinky_tip = hand_landmarks.landmark[20]
-        
-        # Get palm base
-        wrist = hand_landmarks.landmark[0]
-        
-        # Thumb should be extended upward
-        thumb_extended = thumb_tip.y < wrist.y
-        
-        # Other fingers should be curled
-        fingers_curled = (index_tip.y > wrist.y and 
-                         middle_tip.y > wrist.y and 
-                         ring_tip.y > wrist.y and 
-                         pinky_tip.y > wrist.y)
-        
-        if thumb_extended and fingers_curled:
-            self.gestures_detected['thumbs_up'] += 1
-            return True
-        
-        return False
-    
-    def detect_wave(self, hand_landmarks):
-        """Detect waving gesture"""
-        wrist = hand_landmarks.landmark[0]
-        current_x = wrist.x
-        
-        self.hand_positions.append(current_x)
-        
-        if len(self.hand_positions) >= 10:
-            positions = list(self.hand_positions)
-            # Check for side-to-side movement
-            max_pos = max(positions)
-            min_pos = min(positions)
-            
-            if max_pos - min_pos > 0.1:  # Significant horizontal movement
-                self.gestures_detected['wave'] += 1
-                return True
-        
-        return False
-    
-    def detect_thinking_pose(self, pose_landmarks, hand_landmarks):
-        """Detect thinking pose (hand near face)"""
-        if pose_landmarks and hand_landmarks:
-            # Get face position (nose)
-            nose = pose_landmarks.landmark[0]
-            
-            # Get hand position (wrist)
-            wrist = hand_landmarks.landmark[0]
-            
-            # Calculate distance
-            distance = self.calculate_distance(
-                (nose.x, nose.y),
-                (wrist.x, wrist.y)
+        # Time spent inside process_frame/analyze_landmarks, for fps that
+        # excludes waiting on the camera or uploads
+        self.processing_seconds = 0.0
+        # Per-stage seconds of the last process_frame call
+        self.last_timings = {}
+        # Every frame's gestures; spills to timeline_path when the ring fills
+        self.timeline = GestureTimeline(GESTURE_FLAGS, POSTURE_LABELS, self.session_start,
+                                        capacity=timeline_capacity, path=timeline_path)
+        # Debounced onset/offset events; gestures_detected counts frames
+        self.events = GestureEventTracker(self.session_start, timing=event_timing)
+        # The counters above belong to the thread running process_frame;
+        # other threads read this snapshot, which is swapped in one
+        # assignment per frame, so they never block it or see half a frame
+        self.snapshot = RecognizerSnapshot(0, self.session_start, 0.0, MappingProxyType({}),
+                                           MappingProxyType(dict(self.gestures_detected)), self.events.state)
+        
+    def _create_detector(self, name):
+        """Build one MediaPipe graph (face, hands or pose)"""
+        if name == 'face':
+            return mp.solutions.face_mesh.FaceMesh(
+                max_num_faces=1,
+                refine_landmarks=True,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
             )
-            
-            if distance < 0.15:  # Hand close to face
-                self.gestures_detected['thinking'] += 1
-                return True
-        
-        return False
-    
-    def detect_posture(self, pose_landmarks):
-        """Detect body posture (confident vs slouching)"""
-        if pose_landmarks:
-            # Get shoulder and hip landmarks
-            left_shoulder = pose_landmarks.landmark[11]
-            right_shoulder = pose_landmarks.landmark[12]
-            left_hip = pose_landmarks.landmark[23]
-            right_hip = pose_landmarks.landmark[24]
-            
-            # Calculate shoulder-hip alignment
-            shoulder_center_y = (left_shoulder.y + right_shoulder.y) / 2
-            hip_center_y = (left_hip.y + right_hip.y) / 2
-            
-            # Calculate shoulder width
-            shoulder_width = abs(right_shoulder.x - left_shoulder.x)
-            
-            # Good posture: shoulders above hips, shoulders wide
-            if shoulder_center_y < hip_center_y and shoulder_width > 0.2:
-                self.gestures_detected['confident_posture'] += 1
-                return 'confident'
+        if name == 'hands':
+            return mp.solutions.hands.Hands(
+                static_image_mode=False,
+                max_num_hands=2,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5
+            )
+        return mp.solutions.pose.Pose(
+            static_image_mode=False,
+            min_detection_confidence=0.5,
+            min_tracking_confidence=0.5
+        )
+    
+    def set_profile(self, profile):
+        """Switch detector profile; graphs it drops are closed
+        
+        Call between frames, from the thread that runs process_frame.
+        """
+        if profile not in DETECTOR_PROFILES:
+            raise ValueError(f"Unknown detector profile '{profile}' "
+                             f"(choose from {', '.join(DETECTOR_PROFILES)})")
+        self.profile = profile
+        self.enabled_detectors = DETECTOR_PROFILES[profile]
+        for name in [name for name in self.detectors if name not in self.enabled_detectors]:
+            self.detectors.pop(name).close()
+            self.last_results.pop(name, None)
+        if self.face_roi is not None and 'face' not in self.enabled_detectors:
+            self.face_roi.close()
+    
+    @property
+    def landmarks_only(self):
+        """True when no graphs are enabled and only analyze_landmarks is usable"""
+        return not self.enabled_detectors
+    
+    def _detector(self, name):
+        detector = self.detectors.get(name)
+        if detector is None:
+            if name not in self.enabled_detectors:
+                raise RuntimeError(f"Detector '{name}' is not in the '{self.profile}' profile")
+            detector = self.detectors[name] = self._create_detector(name)
+        return detector
+    
+    def load_detectors(self):
+        """Create the profile's MediaPipe graphs now instead of on the first frame"""
+        for name in self.enabled_detectors:
+            self._detector(name)
+    
+    def _run_detector(self, name, rgb_frame):
+        """Run a MediaPipe graph on its cadence, reusing the last result otherwise
+        
+        Returns (results, fresh), or (None, False) for a detector outside
+        the profile. Detectors are phase-shifted so graphs with different
+        intervals don't all land on the same frame.
+        """
+        if name not in self.enabled_detectors:
+            return None, False
+        interval = self.detector_intervals[name]
+        phase = list(DEFAULT_DETECTOR_INTERVALS).index(name)
+        
+        if name not in self.last_results or (self.frame_count + phase) % interval == 0:
+            if name == 'face' and self.face_roi is not None:
+                self.last_results[name] = self.face_roi.process(rgb_frame, self._detector(name))
             else:
-                return 'slouching'
+                self.last_results[name] = self._detector(name).process(rgb_frame)
+            return self.last_results[name], True
         
-        return 'unknown'
+        return self.last_results[name], False
     
-    def detect_nervous_gestures(self, hand_landmarks):
-        """Detect nervous gestures (fidgeting, rapid movements)"""
-        if len(self.hand_positions) >= 5:
-            positions = list(self.hand_positions)[-5:]
-            
-            # Calculate movement variance
-            variance = np.var(positions)
-            
-            if variance > 0.01:  # High variance indicates fidgeting
-                self.gestures_detected['nervous_gestures'] += 1
-                return True
+    def prepare_inference_frame(self, frame):
+        """Downscale (keeping aspect ratio) and convert a BGR frame to RGB
+        
+        Writes into buffers owned by the recognizer, so the returned array is
+        only valid until the next call. MediaPipe copies its input, so this
+        is safe to pass straight to process().
+        """
+        height, width = frame.shape[:2]
         
-        return False
+        if self.inference_width and width > self.inference_width:
+            size = (self.inference_width, max(1, round(height * self.inference_width / width)))
+            if self._inference_bgr is None or self._inference_bgr.shape[:2] != (size[1], size[0]):
+                self._inference_bgr = np.empty((size[1], size[0], 3), dtype=np.uint8)
+                self._inference_rgb = np.empty_like(self._inference_bgr)
+            cv2.resize(frame, size, dst=self._inference_bgr, interpolation=cv2.INTER_AREA)
+            source = self._inference_bgr
+        else:
+            if self._inference_rgb is None or self._inference_rgb.shape != frame.shape:
+                self._inference_rgb = np.empty_like(frame)
+            source = frame
+        
+        cv2.cvtColor(source, cv2.COLOR_BGR2RGB, dst=self._inference_rgb)
+        return self._inference_rgb
     
-    def process_frame(self, frame):
-        """Process a single frame and detect all gestures"""
-        # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    def process_frame(self, frame, draw=None, timestamp=None):
+        """Process a single frame and detect all gestures
+        
+        Inference runs at inference_width; gestures and drawing use the
+        normalized landmarks against the full-resolution frame. Landmarks
+        are drawn into frame unless draw is False (default: not headless).
+        timestamp (epoch seconds, default now) places the frame in the
+        timeline and event tracker; pass media time when replaying video.
+        """
+        if self.landmarks_only:
+            raise RuntimeError("Recognizer uses the 'landmarks' profile; use analyze_landmarks")
+        if draw is None:
+            draw = not self.headless
+        
+        clock = time.perf_counter
+        started = clock()
+        rgb_frame = self.prepare_inference_frame(frame)
         image_height, image_width, _ = frame.shape
+        prepared = clock()
+        
+        # Process with MediaPipe (each graph on its own cadence)
+        face_results, face_fresh = self._run_detector('face', rgb_frame)
+        face_done = clock()
+        hand_results, hands_fresh = self._run_detector('hands', rgb_frame)
+        hands_done = clock()
+        pose_results, _ = self._run_detector('pose', rgb_frame)
+        pose_done = clock()
+        
+        # Detectors outside the profile report nothing
+        face_landmarks = face_results.multi_face_landmarks[0] \
+            if face_results is not None and face_results.multi_face_landmarks else None
+        hands = [
+            (hand_landmarks, hand_results.multi_handedness[idx].classification[0].label)
+            for idx, hand_landmarks in enumerate(
+                (hand_results.multi_hand_landmarks if hand_results is not None else None) or []
+            )
+        ]
+        pose_landmarks = pose_results.pose_landmarks if pose_results is not None else None
+        
+        if draw:
+            self.draw_landmarks(frame, face_landmarks, hands, pose_landmarks)
+        drawn = clock()
+        # analyze_landmarks adds its own share
+        self.processing_seconds += drawn - started
+        
+        current_gestures = self.analyze_landmarks(
+            face_landmarks, hands, pose_landmarks, image_width, image_height,
+            face_fresh=face_fresh, hands_fresh=hands_fresh, timestamp=timestamp
+        )
+        
+        self.last_timings = {
+            'prepare': prepared - started,
+            'face': face_done - prepared,
+            'hands': hands_done - face_done,
+            'pose': pose_done - hands_done,
+            'draw': drawn - pose_done,
+            'analyze': clock() - drawn
+        }
+        return frame, current_gestures
+    
+    def draw_landmarks(self, frame, face_landmarks, hands, pose_landmarks):
+        """Draw the face mesh, hand and pose landmarks into frame"""
+        solutions = mp.solutions
+        drawing = solutions.drawing_utils
+        styles = solutions.drawing_styles
+        
+        # Draw face mesh
+        if face_landmarks is not None:
+            drawing.draw_landmarks(
+                image=frame,
+                landmark_list=face_landmarks,
+                connections=solutions.face_mesh.FACEMESH_TESSELATION,
+                landmark_drawing_spec=None,
+                connection_drawing_spec=styles.get_default_face_mesh_tesselation_style()
+            )
         
-        # Process with MediaPipe
-        face_results = self.face_mesh.process(rgb_frame)
-        hand_results = self.hands.process(rgb_frame)
-        pose_results = self.pose.process(rgb_frame)
+        # Draw hand landmarks
+        for hand_landmarks, _ in hands:
+            drawing.draw_landmarks(
+                frame,
+                hand_landmarks,
+                solutions.hands.HAND_CONNECTIONS,
+                styles.get_default_hand_landmarks_style(),
+                styles.get_default_hand_connections_style()
+            )
+        
+        # Draw pose landmarks
+        if pose_landmarks is not None:
+            drawing.draw_landmarks(
+                frame,
+                pose_landmarks,
+                solutions.pose.POSE_CONNECTIONS,
+                landmark_drawing_spec=styles.get_default_pose_landmarks_style()
+            )
+    
+    def extract_keypoints(self, face_landmarks=None, hands=(), pose_landmarks=None):
+        """Copy the landmarks the detectors read into self.keypoints
+        
+        Rows of absent parts are zeroed. Returns the number of hands copied
+        (at most MAX_HANDS).
+        """
+        coords = []
+        coords += _keypoint_coords(face_landmarks, FACE_KEYPOINTS) if face_landmarks is not None \
+            else _ABSENT['face']
+        coords += _keypoint_coords(pose_landmarks, POSE_KEYPOINTS) if pose_landmarks is not None \
+            else _ABSENT['pose']
+        
+        hand_count = min(len(hands), MAX_HANDS)
+        for i in range(MAX_HANDS):
+            coords += _keypoint_coords(hands[i][0], HAND_KEYPOINTS) if i < hand_count else _ABSENT['hand']
+        
+        # One list-to-array conversion per frame
+        self._keypoints_flat[:] = coords
+        return hand_count
+    
+    def analyze_landmarks(self, face_landmarks=None, hands=(), pose_landmarks=None,
+                          image_width=1, image_height=1, face_fresh=True, hands_fresh=True,
+                          timestamp=None):
+        """Detect gestures from already-extracted landmarks
+        
+        face_landmarks and pose_landmarks are MediaPipe landmark lists (or
+        anything exposing .landmark[i].x/.y, see gesture_landmarks); hands
+        is a list of (hand_landmarks, handedness label). Used by
+        process_frame and for landmarks computed client-side.
+        
+        The landmarks are copied into one array per frame and every feature
+        comes from a single product with FEATURE_MATRIX; results and
+        counters match the scalar reference detectors in gesture_benchmark.
+        """
+        started = time.perf_counter()
+        hands = list(hands)
+        hand_count = self.extract_keypoints(face_landmarks, hands, pose_landmarks)
+        np.dot(FEATURE_MATRIX, self._keypoints_flat, out=self._features)
+        features = self._features.tolist()
+        counts = self.gestures_detected
         
         # Current frame gestures
         current_gestures = {
@@ -267,80 +670,122 @@ class GestureRecognizer:
             'nervous': False
         }
         
-        # Detect face gestures
-        if face_results.multi_face_landmarks:
-            face_landmarks = face_results.multi_face_landmarks[0]
+        if face_landmarks is not None:
+            mouth_width = abs(features[F_MOUTH_WIDTH]) * image_width
+            mouth_height = abs(features[F_MOUTH_HEIGHT]) * image_height
+            if mouth_height > 0 and mouth_width / mouth_height > 3.5:
+                current_gestures['smile'] = True
+                counts['smile'] += 1
             
-            # Draw face mesh
-            self.mp_drawing.draw_landmarks(
-                image=frame,
-                landmark_list=face_landmarks,
-                connections=self.mp_face_mesh.FACEMESH_TESSELATION,
-                landmark_drawing_spec=None,
-                connection_drawing_spec=self.mp_drawing_styles.get_default_face_mesh_tesselation_style()
-            )
+            if abs(features[F_NOSE_OFFSET]) < abs(features[F_EYE_DISTANCE]) * 0.15:
+                current_gestures['eye_contact'] = True
+                counts['eye_contact'] += 1
             
-            # Detect gestures
-            is_smiling, smile_ratio = self.detect_smile(face_landmarks, image_width, image_height)
-            current_gestures['smile'] = is_smiling
+            if face_fresh:
+                self.head_positions.append(features[F_NOSE_Y] * image_height)
+            if self._nodding():
+                current_gestures['head_nod'] = True
+                counts['nod'] += 1
+        
+        # Hands are applied in order: each wrist sample moves the motion
+        # window the next hand is judged on, as with per-hand scalar detector calls
+        for i in range(hand_count):
+            hand = features[7 + i * _HAND_FEATURES:7 + (i + 1) * _HAND_FEATURES]
             
-            current_gestures['eye_contact'] = self.detect_eye_contact(
-                face_landmarks, image_width, image_height
-            )
+            thumbs_up = hand[H_THUMB_RISE] > 0 and min(hand[H_INDEX_DROP:H_PINKY_DROP + 1]) > 0
+            current_gestures['thumbs_up'] = thumbs_up
+            counts['thumbs_up'] += thumbs_up
             
-            current_gestures['head_nod'] = self.detect_head_nod(
-                face_landmarks, image_height
-            )
-        
-        # Detect hand gestures
-        if hand_results.multi_hand_landmarks:
-            for idx, hand_landmarks in enumerate(hand_results.multi_hand_landmarks):
-                # Draw hand landmarks
-                self.mp_drawing.draw_landmarks(
-                    frame,
-                    hand_landmarks,
-                    self.mp_hands.HAND_CONNECTIONS,
-                    self.mp_drawing_styles.get_default_hand_landmarks_style(),
-                    self.mp_drawing_styles.get_default_hand_connections_style()
-                )
-                
-                # Detect gestures
-                handedness = hand_results.multi_handedness[idx].classification[0].label
-                current_gestures['thumbs_up'] = self.detect_thumbs_up(hand_landmarks, handedness)
-                current_gestures['wave'] = self.detect_wave(hand_landmarks)
-                current_gestures['nervous'] = self.detect_nervous_gestures(hand_landmarks)
-                
-                # Detect thinking pose
-                if pose_results.pose_landmarks:
-                    current_gestures['thinking'] = self.detect_thinking_pose(
-                        pose_results.pose_landmarks,
-                        hand_landmarks
-                    )
-        
-        # Detect body posture
-        if pose_results.pose_landmarks:
-            # Draw pose landmarks
-            self.mp_drawing.draw_landmarks(
-                frame,
-                pose_results.pose_landmarks,
-                self.mp_pose.POSE_CONNECTIONS,
-                landmark_drawing_spec=self.mp_drawing_styles.get_default_pose_landmarks_style()
-            )
+            if hands_fresh:
+                self.hand_positions.append(hand[H_WRIST_X])
+            waving, nervous = self._hand_motion()
+            current_gestures['wave'] = waving
+            counts['wave'] += waving
+            
+            current_gestures['nervous'] = nervous
+            counts['nervous_gestures'] += nervous
             
-            current_gestures['posture'] = self.detect_posture(pose_results.pose_landmarks)
+            if pose_landmarks is not None:
+                thinking = (hand[H_NOSE_DX] ** 2 + hand[H_NOSE_DY] ** 2) ** 0.5 < 0.15
+                current_gestures['thinking'] = thinking
+                counts['thinking'] += thinking
+        
+        # Body posture
+        if pose_landmarks is not None:
+            if features[F_TORSO_LIFT] > 0 and abs(features[F_SHOULDER_WIDTH]) > 0.2:
+                current_gestures['posture'] = 'confident'
+                counts['confident_posture'] += 1
+            else:
+                current_gestures['posture'] = 'slouching'
         
         # Add to history
         self.gesture_history.append(current_gestures)
+        timestamp = time.time() if timestamp is None else timestamp
+        self.timeline.append(timestamp, *pack_gestures(current_gestures))
+        self.events.update(timestamp, current_gestures)
         self.frame_count += 1
+        self.processing_seconds += time.perf_counter() - started
+        self._publish_snapshot(timestamp, current_gestures)
         
-        return frame, current_gestures
+        return current_gestures
+    
+    def _publish_snapshot(self, timestamp, gestures):
+        self.snapshot = RecognizerSnapshot(
+            self.frame_count, timestamp, self.processing_seconds, MappingProxyType(dict(gestures)),
+            MappingProxyType(dict(self.gestures_detected)), self.events.state
+        )
+    
+    def _hand_motion(self):
+        """(waving, nervous) for the current wrist window
+        
+        Windows only change when a sample is appended, so frames reusing an
+        earlier hands result (and extra hands without new samples) hit the
+        cache.
+        """
+        window = self.hand_positions
+        if self._motion_cache[0] == window.appended:
+            return self._motion_cache[1]
+        
+        positions = window.ordered()
+        waving = len(window) >= 10 and positions.max() - positions.min() > 0.1
+        nervous = False
+        if len(window) >= 5:
+            # np.var's arithmetic without its dispatch overhead
+            recent = window.last(5)
+            deviations = recent - recent.sum() / 5
+            nervous = (deviations * deviations).sum() / 5 > 0.01
+        
+        result = (bool(waving), bool(nervous))
+        self._motion_cache = (window.appended, result)
+        return result
+    
+    def _nodding(self):
+        """Head nod check over the head position window, cached per sample"""
+        if self._nod_cache[0] == self.head_positions.appended:
+            return self._nod_cache[1]
+        nodding = self._nod_window()
+        self._nod_cache = (self.head_positions.appended, nodding)
+        return nodding
+    
+    def _nod_window(self):
+        if len(self.head_positions) < 10:
+            return False
+        positions = self.head_positions.ordered()
+        max_pos, min_pos = positions.max(), positions.min()
+        if max_pos - min_pos <= 20:
+            return False
+        # Midpoint crossings between consecutive samples
+        above = positions >= (max_pos + min_pos) / 2
+        return bool(np.count_nonzero(above[1:] != above[:-1]) >= 2)
     
     def draw_gesture_indicators(self, frame, gestures):
-        """Draw gesture indicators on frame"""
-        height, width = frame.shape[:2]
+        """Draw gesture indicators into frame and return it
         
-        # Create overlay
-        overlay = frame.copy()
+        Only the indicator panel is blended: it is copied into a reused
+        overlay buffer, drawn on, and blended back into frame in place, so
+        no full-frame copies are made.
+        """
+        height, width = frame.shape[:2]
         
         # Define indicator positions
         y_offset = 30
@@ -356,48 +801,85 @@ class GestureRecognizer:
             ('📐 Posture: ' + gestures['posture'], gestures['posture'] == 'confident', (100, 200, 255))
         ]
         
+        # Panel covering every rectangle and label, clipped to the frame
+        text_width = max(cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0][0]
+                         for label, _, _ in indicators)
+        left, top = x_offset, y_offset - 20
+        right = min(width, x_offset + max(250, 10 + text_width) + 2)
+        bottom = min(height, y_offset + (len(indicators) - 1) * 35 + 11)
+        if right <= left or bottom <= top:
+            return frame
+        panel = frame[top:bottom, left:right]
+        
+        # Create overlay
+        if self._indicator_overlay is None or self._indicator_overlay.shape != panel.shape:
+            self._indicator_overlay = np.empty_like(panel)
+        overlay = self._indicator_overlay
+        np.copyto(overlay, panel)
+        
         for i, (label, active, color) in enumerate(indicators):
-            y_pos = y_offset + (i * 35)
+            y_pos = y_offset + (i * 35) - top
             
             # Background rectangle
             bg_color = color if active else (50, 50, 50)
-            cv2.rectangle(overlay, (x_offset, y_pos - 20), (x_offset + 250, y_pos + 10), bg_color, -1)
+            cv2.rectangle(overlay, (0, y_pos - 20), (250, y_pos + 10), bg_color, -1)
             
             # Text
             text_color = (255, 255, 255) if active else (150, 150, 150)
-            cv2.putText(overlay, label, (x_offset + 10, y_pos), 
+            cv2.putText(overlay, label, (10, y_pos), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, text_color, 2)
         
         # Blend overlay
         alpha = 0.7
-        frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
+        cv2.addWeighted(overlay, alpha, panel, 1 - alpha, 0, dst=panel)
         
         return frame
     
     def get_session_stats(self):
-        """Get statistics for the current session"""
+        """Get statistics for the current session
+        
+        Built from the latest snapshot, so it is safe to call from any
+        thread while frames are being processed.
+        """
+        snapshot = self.snapshot
         duration = time.time() - self.session_start
+        busy = snapshot.processing_seconds
+        frames = snapshot.frame_count
         
         stats = {
             'duration_seconds': duration,
-            'total_frames': self.frame_count,
-            'fps': self.frame_count / duration if duration > 0 else 0,
-            'gestures_detected': self.gestures_detected.copy(),
+            'total_frames': frames,
+            # Frames per second of processing time; wall_fps includes idle
+            # time between frames (camera waits, gaps between uploads)
+            'fps': frames / busy if busy > 0 else 0,
+            'wall_fps': frames / duration if duration > 0 else 0,
+            'processing_seconds': busy,
+            'detector_profile': self.profile,
+            # Debounced events, independent of the frame rate
+            'gestures_detected': dict(snapshot.events.counts),
+            'dwell_seconds': snapshot.events.dwell_seconds(),
+            'active_gestures': snapshot.events.active(),
+            # Frames on which each detector fired
+            'gesture_frames': dict(snapshot.gesture_frames),
             'gesture_rates': {}
         }
         
-        # Calculate gesture rates (per minute)
+        # Calculate gesture rates (events per minute)
         if duration > 0:
             minutes = duration / 60
-            for gesture, count in self.gestures_detected.items():
+            for gesture, count in stats['gestures_detected'].items():
                 stats['gesture_rates'][gesture] = count / minutes
         
         return stats
     
     def save_session_data(self, filename='gesture_session.json'):
-        """Save session data to JSON file"""
+        """Save session data to JSON file (and flush the timeline, if it has a path)"""
         stats = self.get_session_stats()
         stats['timestamp'] = datetime.now().isoformat()
+        if self.timeline.path:
+            self.timeline.flush()
+        stats['timeline'] = self.timeline.summary()
+        stats['events'] = self.events.recent_events()
         
         with open(filename, 'w') as f:
             json.dump(stats, f, indent=2)
@@ -406,9 +888,13 @@ class GestureRecognizer:
     
     def release(self):
         """Release all resources"""
-        self.face_mesh.close()
-        self.hands.close()
-        self.pose.close()
+        for detector in self.detectors.values():
+            detector.close()
+        self.detectors = {}
+        if self.face_roi is not None:
+            self.face_roi.close()
+        if self.timeline.path:
+            self.timeline.flush()
 
 
 def main():
@@ -444,16 +930,22 @@ def main():
     print("\nPress 'q' to quit, 's' to save session data")
     print("=" * 60)
     
+    # Capture and mirror into the same two buffers every frame
+    raw = None
+    mirrored = None
+    
     try:
         while True:
-            ret, frame = cap.read()
+            ret, raw = cap.read(raw)
             
             if not ret:
                 print("❌ Error: Failed to capture frame")
                 break
             
             # Mirror the frame for natural interaction
-            frame = cv2.flip(frame, 1)
+            if mirrored is None or mirrored.shape != raw.shape:
+                mirrored = np.empty_like(raw)
+            frame = cv2.flip(raw, 1, dst=mirrored)
             
             # Process frame
             processed_frame, gestures = recognizer.process_frame(frame)
@@ -479,7 +971,7 @@ def main():
             elif key == ord('s'):
                 print("\n💾 Saving session data...")
                 stats = recognizer.save_session_data()
-                print(f"✅ Session data saved!")
+                print("✅ Session data saved!")
                 print(f"   Duration: {stats['duration_seconds']:.1f}s")
                 print(f"   Total Frames: {stats['total_frames']}")
                 print(f"   Gestures Detected: {sum(stats['gestures_detected'].values())}")
@@ -499,7 +991,8 @@ def main():
         print("=" * 60)
         print(f"Duration: {final_stats['duration_seconds']:.1f} seconds")
         print(f"Total Frames: {final_stats['total_frames']}")
-        print(f"Average FPS: {final_stats['fps']:.1f}")
+        print(f"Average FPS: {final_stats['wall_fps']:.1f} "
+              f"(processing capacity {final_stats['fps']:.1f})")
         print("\nGestures Detected:")
         for gesture, count in final_stats['gestures_detected'].items():
             print(f"  {gesture.replace('_', ' ').title()}: {count}")
@@ -0,0 +1,403 @@
+"""
+Multi-Session Gesture Recognition
+Keeps one GestureRecognizer per interview session and runs inference for
+all of them on a shared worker pool, fed by frames the candidates'
+browsers upload
+"""
+
+import queue
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from gesture_events import live_state
+from gesture_imports import lazy_import
+from gesture_landmarks import TIME_WRAP
+from gesture_pipeline import FrameRateGovernor, FrameRing, StageStats, VersionedBuffer
+
+cv2 = lazy_import('cv2')
+
+# Frames waiting per session; older ones are dropped when inference lags
+SESSION_RING_SIZE = 2
+MAX_SESSIONS = 200
+SESSION_IDLE_SECONDS = 120
+
+# Most of one core a session's inference may use; with many sessions each
+# gets an equal share of the server budget if that is smaller
+SESSION_CPU_BUDGET = 1.0
+
+# How far ahead of the server clock a landmark frame's capture time may map
+# before the client clock is taken to have been reset (page reload)
+LANDMARK_CLOCK_SLACK = 5.0
+
+
+class SessionLimitError(RuntimeError):
+    """Raised when the server already holds its maximum number of sessions"""
+
+
+class SessionModeError(RuntimeError):
+    """Raised when frames are sent to a session that only takes landmarks"""
+
+
+class GestureSession:
+    """One candidate's recognizer, pending frames and latest result"""
+
+    def __init__(self, session_id, recognizer, ring_size=SESSION_RING_SIZE, governor=None):
+        self.session_id = session_id
+        self.recognizer = recognizer
+        # Paces inference to the session's CPU budget; frames arriving
+        # faster than its target rate are skipped
+        self.governor = governor or FrameRateGovernor(budget=0)
+        self.inbox = FrameRing(ring_size)
+        self.lock = threading.Lock()
+        # Held while the recognizer runs; frame workers and landmark
+        # uploads for the same session never overlap
+        self.process_lock = threading.Lock()
+        self.created_at = time.time()
+        self.last_active = self.created_at
+        self.current_gestures = {}
+        # Gesture/warning state, versioned on change for live subscribers
+        self.live_state = VersionedBuffer()
+        self.frames_received = 0
+        self.frames_processed = 0
+        self.frames_invalid = 0
+        self.frames_failed = 0
+        self.frames_skipped = 0
+        self.decode_stats = StageStats()
+        self.inference_stats = StageStats()
+        self.latency_stats = StageStats()
+        self.closed = False
+        # True while the session is queued for or held by a worker, so a
+        # recognizer is only ever used by one thread at a time
+        self.scheduled = False
+        # (client ms, server epoch seconds) pairing the landmark capture
+        # clock with the server's, and the last timestamp handed out
+        self.landmark_clock = None
+        self.landmark_time = None
+
+    @property
+    def accepts_frames(self):
+        """False for 'landmarks' sessions, whose recognizer has no MediaPipe graphs"""
+        return not getattr(self.recognizer, 'landmarks_only', False)
+    
+    def landmark_timestamp(self, time_ms):
+        """Server epoch seconds for a landmark frame's client capture time
+
+        The first frame anchors the client clock at the server's current
+        time and later frames keep their spacing, so frames batched into one
+        upload are still seconds apart for debouncing and the timeline. A
+        client clock that jumps back or far ahead is re-anchored, and
+        timestamps never go backwards. Call with process_lock held.
+        """
+        now = time.time()
+        timestamp = None
+        if self.landmark_clock is not None:
+            client_ms, server_time = self.landmark_clock
+            timestamp = server_time + ((time_ms - client_ms) % TIME_WRAP) / 1000
+            if timestamp > now + LANDMARK_CLOCK_SLACK:
+                timestamp = None
+        if timestamp is None:
+            timestamp = now if self.landmark_time is None else max(now, self.landmark_time)
+            self.landmark_clock = (time_ms, timestamp)
+        if self.landmark_time is not None:
+            timestamp = max(timestamp, self.landmark_time)
+        self.landmark_time = timestamp
+        return timestamp
+
+    def get_current_gestures(self):
+        # current_gestures is replaced, never mutated, so no lock is needed
+        return dict(self.current_gestures)
+
+    def publish_state(self, gestures):
+        self.live_state.update(live_state(gestures, getattr(self.recognizer, 'events', None)))
+
+    def get_stats(self):
+        """Transport and inference stats plus the recognizer's session stats"""
+        with self.lock:
+            stats = {
+                'session_id': self.session_id,
+                'created_at': self.created_at,
+                'idle_seconds': round(time.time() - self.last_active, 1),
+                'frames_received': self.frames_received,
+                'frames_processed': self.frames_processed,
+                'frames_dropped': self.inbox.dropped,
+                'frames_invalid': self.frames_invalid,
+                'frames_failed': self.frames_failed,
+                'frames_skipped': self.frames_skipped,
+                'governor': self.governor.get_state(),
+                'decode': self.decode_stats.summary(),
+                'inference': self.inference_stats.summary(),
+                'latency': self.latency_stats.summary()
+            }
+        stats['recognizer'] = self.recognizer.get_session_stats()
+        return stats
+
+
+class GestureSessionManager:
+    """Session-keyed recognizer registry with a shared inference worker pool
+
+    submit_frame() only queues the encoded frame; workers decode and run
+    inference. recognizer_factory(session_id, **options) returns a
+    GestureRecognizer or anything with the same process_frame /
+    get_session_stats / release interface (see gesture_workers). Sessions are scheduled round-robin through a work queue,
+    one worker per session at a time, always on the session's newest frame.
+
+    Each session's FrameRateGovernor gets session_cpu_budget cores, or an
+    equal share of cpu_budget once that is smaller, so adding sessions
+    lowers everyone's frame rate instead of growing every queue.
+    """
+
+    def __init__(self, recognizer_factory, workers=4, max_sessions=MAX_SESSIONS,
+                 idle_timeout=SESSION_IDLE_SECONDS, ring_size=SESSION_RING_SIZE,
+                 session_cpu_budget=SESSION_CPU_BUDGET, cpu_budget=None, max_fps=30.0):
+        self.recognizer_factory = recognizer_factory
+        self.workers = workers
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.ring_size = ring_size
+        self.session_cpu_budget = session_cpu_budget
+        self.cpu_budget = cpu_budget if cpu_budget is not None else float(workers)
+        self.max_fps = max_fps
+        self.sessions = {}
+        self._creating = {}  # session_id -> Event set once its recognizer is built (or failed)
+        self.lock = threading.Lock()
+        self._work = queue.Queue()
+        self._threads = []
+        self._stop = threading.Event()
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+        self._threads = [
+            threading.Thread(target=self._worker, name=f'gesture-worker-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        self._threads.append(threading.Thread(target=self._reap_idle, name='gesture-reaper', daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def create_session(self, session_id=None, **recognizer_options):
+        """Register a session (idempotent for an existing id) and return it
+
+        The recognizer is built outside the manager lock, since opening one
+        on the process backend is a round trip to a worker. The id is
+        reserved meanwhile: concurrent creates of it wait for the first, and
+        the reservation is dropped if building the recognizer fails.
+        """
+        session_id = session_id or uuid.uuid4().hex
+        while True:
+            with self.lock:
+                session = self.sessions.get(session_id)
+                if session is not None:
+                    return session
+                creating = self._creating.get(session_id)
+                if creating is None:
+                    if len(self.sessions) + len(self._creating) >= self.max_sessions:
+                        raise SessionLimitError(f'Session limit reached ({self.max_sessions})')
+                    self._ensure_workers()
+                    creating = self._creating[session_id] = threading.Event()
+                    break
+            # Someone else is creating it; use theirs, or retry if that failed
+            creating.wait()
+
+        try:
+            recognizer = self.recognizer_factory(session_id, **recognizer_options)
+            # Remote (process backend) recognizers can only be paced, not resized
+            governor = FrameRateGovernor(
+                budget=self.session_cpu_budget, max_fps=self.max_fps,
+                inference_width=getattr(recognizer, 'inference_width', None),
+                adapt_width=hasattr(recognizer, 'inference_width')
+            )
+            session = GestureSession(session_id, recognizer, self.ring_size, governor)
+            with self.lock:
+                self.sessions[session_id] = session
+                self._rebalance()
+            return session
+        finally:
+            with self.lock:
+                del self._creating[session_id]
+            creating.set()
+
+    def _rebalance(self):
+        """Split the server CPU budget across sessions (call with self.lock held)"""
+        if self.session_cpu_budget <= 0:
+            return
+        share = self.session_cpu_budget
+        if self.sessions and self.cpu_budget > 0:
+            share = min(share, self.cpu_budget / len(self.sessions))
+        for session in self.sessions.values():
+            session.governor.budget = share
+
+    def get_session(self, session_id):
+        with self.lock:
+            return self.sessions.get(session_id)
+
+    def close_session(self, session_id):
+        """Remove a session and release its graphs; returns its final stats"""
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+            self._rebalance()
+        if session is None:
+            return None
+
+        session.inbox.close()
+        stats = session.get_stats()
+        with session.lock:
+            session.closed = True
+            # A worker holding the session releases it when it's done
+            release_now = not session.scheduled
+        session.live_state.close()
+        if release_now:
+            # A landmark upload may still be inside analyze_landmarks
+            with session.process_lock:
+                session.recognizer.release()
+        return stats
+
+    def submit_frame(self, session_id, data):
+        """Queue one encoded frame (JPEG/PNG bytes) for a session
+
+        Returns the session's latest gestures (from an earlier frame) so
+        uploaders get results without a separate request.
+        """
+        session = self.get_session(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        if not session.accepts_frames:
+            raise SessionModeError(f"Session {session_id} takes landmarks, not frames")
+
+        # Queue before scheduling so a worker never picks up an empty inbox
+        session.inbox.put((data, time.perf_counter()))
+        with session.lock:
+            if session.closed:
+                raise KeyError(session_id)
+            session.frames_received += 1
+            session.last_active = time.time()
+            schedule = not session.scheduled
+            session.scheduled = True
+            gestures = dict(session.current_gestures)
+
+        if schedule:
+            self._work.put(session)
+        return gestures
+
+    def submit_landmarks(self, session_id, frames):
+        """Run the detectors on client-computed landmark frames
+
+        frames are gesture_landmarks.LandmarkFrame tuples, timed by their
+        capture times (see GestureSession.landmark_timestamp). No MediaPipe
+        work is involved, so this runs inline in the caller's thread.
+        Returns the gestures of the last frame.
+        """
+        session = self.get_session(session_id)
+        if session is None or session.closed:
+            raise KeyError(session_id)
+
+        gestures = None
+        with session.process_lock, session.inference_stats.time():
+            # close_session releases the recognizer under this lock
+            if session.closed:
+                raise KeyError(session_id)
+            for frame in frames:
+                gestures = session.recognizer.analyze_landmarks(
+                    frame.face, frame.hands, frame.pose, frame.width, frame.height,
+                    timestamp=session.landmark_timestamp(frame.time_ms)
+                )
+
+        with session.lock:
+            session.frames_received += len(frames)
+            session.frames_processed += len(frames)
+            session.last_active = time.time()
+            if gestures is not None:
+                session.current_gestures = gestures
+            current = dict(session.current_gestures)
+        if gestures is not None:
+            session.publish_state(gestures)
+        return current
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                session = self._work.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            item = session.inbox.get(timeout=0, latest=True)
+            if item is not None and not session.closed and not session.governor.ready():
+                with session.lock:
+                    session.frames_skipped += 1
+            elif item is not None and not session.closed:
+                try:
+                    self._process(session, *item)
+                except Exception as e:
+                    with session.lock:
+                        session.frames_failed += 1
+                    print(f"[WARNING] Gesture inference failed for {session.session_id}: {e}")
+
+            with session.lock:
+                if session.closed:
+                    session.scheduled = False
+                    session.recognizer.release()
+                    continue
+                requeue = len(session.inbox) > 0
+                session.scheduled = requeue
+
+            # Back of the queue so busy sessions don't starve the others
+            if requeue:
+                self._work.put(session)
+
+    def _process(self, session, data, submitted_at):
+        # Decoding counts against the session's CPU budget too
+        started = time.perf_counter()
+        with session.decode_stats.time():
+            frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+
+        if frame is None:
+            with session.lock:
+                session.frames_invalid += 1
+            return
+
+        with session.process_lock, session.inference_stats.time():
+            _, gestures = session.recognizer.process_frame(frame, draw=False)
+        session.governor.record(time.perf_counter() - started, started)
+        if hasattr(session.recognizer, 'inference_width'):
+            session.recognizer.inference_width = session.governor.inference_width
+
+        with session.lock:
+            session.current_gestures = gestures
+            session.frames_processed += 1
+        session.publish_state(gestures)
+        session.latency_stats.record(time.perf_counter() - submitted_at)
+
+    def _reap_idle(self):
+        """Close sessions that stopped sending frames"""
+        while not self._stop.wait(min(30, self.idle_timeout)):
+            cutoff = time.time() - self.idle_timeout
+            with self.lock:
+                idle = [sid for sid, s in self.sessions.items() if s.last_active < cutoff]
+            for session_id in idle:
+                self.close_session(session_id)
+
+    def list_stats(self):
+        with self.lock:
+            sessions = list(self.sessions.values())
+        return [session.get_stats() for session in sessions]
+
+    def get_pool_stats(self):
+        with self.lock:
+            active = len(self.sessions)
+        return {
+            'sessions': active,
+            'max_sessions': self.max_sessions,
+            'workers': self.workers,
+            'queued': self._work.qsize()
+        }
+
+    def shutdown(self):
+        """Stop the workers and release every session"""
+        self._stop.set()
+        with self.lock:
+            session_ids = list(self.sessions)
+        for session_id in session_ids:
+            self.close_session(session_id)
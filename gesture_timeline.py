@@ -0,0 +1,216 @@
+"""
+Gesture Timelines
+Per-frame gesture record for a session in a fixed-size columnar ring:
+one float32 offset, one byte of gesture bit flags and one posture byte
+per frame (6 bytes, versus a dict per frame)
+
+Full rings spill to an append-only file when a path is given, so an
+hour-long interview costs a few megabytes on disk and a bounded amount of
+memory. A timeline opened on an existing file continues it. Queries ("smile between t1 and t2") run on the columns directly.
+
+File layout (little-endian):
+    header   '<2sBHd' magic b'GT', version 1, JSON length, start epoch
+    JSON     {"flags": [...], "postures": {code: label}}
+    records  RECORD_DTYPE rows, oldest first
+"""
+
+import json
+import os
+import struct
+import threading
+
+import numpy as np
+
+MAGIC = b'GT'
+VERSION = 1
+HEADER = struct.Struct('<2sBHd')
+RECORD_DTYPE = np.dtype([('t', '<f4'), ('flags', 'u1'), ('posture', 'u1')])
+
+# Ten minutes at 30 fps per recognizer before spilling or overwriting
+DEFAULT_CAPACITY = 18000
+
+
+class GestureTimeline:
+    """Columnar ring of (offset seconds, gesture flags, posture code) per frame
+
+    flags names the bits of the flag byte and postures maps posture codes
+    to labels (gesture_recognition.GESTURE_FLAGS / POSTURE_LABELS); they
+    are written to the file header so timelines are self-describing.
+    """
+
+    def __init__(self, flags, postures, start_time, capacity=DEFAULT_CAPACITY, path=None):
+        self.flags = tuple(flags)
+        self.postures = dict(postures)
+        self.start_time = start_time
+        self.capacity = capacity
+        self.path = path
+        self.times = np.zeros(capacity, dtype=np.float32)
+        self.flag_bits = np.zeros(capacity, dtype=np.uint8)
+        self.posture_codes = np.zeros(capacity, dtype=np.uint8)
+        self.lock = threading.Lock()
+        self.count = 0        # frames appended in total
+        self.flushed = 0      # frames already written to path
+        self.overwritten = 0  # frames lost because the ring wrapped with no path
+        if path:
+            if os.path.exists(path) and os.path.getsize(path):
+                self._resume(path)
+            else:
+                with open(path, 'wb') as f:
+                    self._write_header(f)
+
+    def _resume(self, path):
+        """Continue an existing file (a reused session id) instead of truncating it
+
+        Offsets stay relative to the file's start time, so frames recorded
+        now follow the earlier ones in one timeline.
+        """
+        meta, records = read_records(path)
+        if tuple(meta['flags']) != self.flags or meta['postures'] != self.postures:
+            raise ValueError(f'{path} holds a timeline with different gesture flags or postures')
+        rows = len(records)
+        del records
+        # Drop a partial record left by an interrupted flush
+        with open(path, 'r+b') as f:
+            meta_length = HEADER.unpack(f.read(HEADER.size))[2]
+            f.truncate(HEADER.size + meta_length + rows * RECORD_DTYPE.itemsize)
+        self.start_time = meta['start_time']
+        self.count = self.flushed = rows
+
+    def append(self, timestamp, flags, posture_code):
+        """Record one frame; timestamp is epoch seconds"""
+        with self.lock:
+            if self.count - self.flushed >= self.capacity:
+                if self.path:
+                    self._flush_locked()
+                else:
+                    self.flushed += 1
+                    self.overwritten += 1
+            slot = self.count % self.capacity
+            self.times[slot] = timestamp - self.start_time
+            self.flag_bits[slot] = flags
+            self.posture_codes[slot] = posture_code
+            self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    def _pending_slots(self):
+        """Ring indices of frames not yet flushed, oldest first"""
+        return np.arange(self.flushed, self.count) % self.capacity
+
+    def _pending_records(self):
+        slots = self._pending_slots()
+        records = np.empty(len(slots), dtype=RECORD_DTYPE)
+        records['t'] = self.times[slots]
+        records['flags'] = self.flag_bits[slots]
+        records['posture'] = self.posture_codes[slots]
+        return records
+
+    def _write_header(self, f):
+        meta = json.dumps({'flags': self.flags, 'postures': self.postures}).encode()
+        f.write(HEADER.pack(MAGIC, VERSION, len(meta), self.start_time))
+        f.write(meta)
+
+    def _flush_locked(self):
+        with open(self.path, 'ab') as f:
+            f.write(self._pending_records().tobytes())
+        self.flushed = self.count
+
+    def flush(self):
+        """Append frames recorded since the last flush to path"""
+        if not self.path:
+            raise ValueError('Timeline has no path to flush to')
+        with self.lock:
+            self._flush_locked()
+
+    def records(self, start=None, end=None):
+        """RECORD_DTYPE rows with start <= t < end (offset seconds), flushed ones included
+
+        Flushed rows are memory-mapped and sliced before copying, so a short
+        range of a long session reads only that range from disk.
+        """
+        with self.lock:
+            parts = []
+            if self.path and self.flushed:
+                parts.append(read_records(self.path)[1])
+            parts.append(self._pending_records())
+
+        selected = []
+        for records in parts:
+            times = records['t']
+            lo = 0 if start is None else np.searchsorted(times, start, side='left')
+            hi = len(records) if end is None else np.searchsorted(times, end, side='left')
+            selected.append(np.asarray(records[lo:hi]))
+        return np.concatenate(selected)
+
+    def mask(self, records, gesture):
+        """Boolean per-record activity of a gesture flag or posture label"""
+        if gesture in self.flags:
+            return (records['flags'] >> self.flags.index(gesture)) & 1 == 1
+        codes = [code for code, label in self.postures.items() if label == gesture]
+        if not codes:
+            raise KeyError(gesture)
+        return records['posture'] == codes[0]
+
+    def query(self, gesture, start=None, end=None):
+        """When a gesture (flag name or posture label) was active in [start, end)
+
+        Returns frames, seconds and segments [(on, off)] in offset seconds;
+        off is the first inactive frame's time, or the last frame's time for
+        a segment still open at the end of the range.
+        """
+        records = self.records(start, end)
+        active = self.mask(records, gesture)
+        times = records['t'].astype(np.float64)
+        if not len(times):
+            return {'gesture': gesture, 'frames': 0, 'seconds': 0.0, 'segments': []}
+
+        # Run boundaries: rising and falling edges of the activity mask
+        edges = np.diff(active.astype(np.int8), prepend=0, append=0)
+        onsets = np.flatnonzero(edges == 1)
+        offsets = np.flatnonzero(edges == -1)
+        ends = np.append(times, times[-1])
+        segments = [(round(float(times[on]), 3), round(float(ends[off]), 3)) for on, off in zip(onsets, offsets)]
+
+        return {
+            'gesture': gesture,
+            'frames': int(active.sum()),
+            'seconds': round(sum(off - on for on, off in segments), 3),
+            'segments': segments
+        }
+
+    def summary(self):
+        with self.lock:
+            return {
+                'frames': self.count,
+                'in_memory': self.count - self.flushed,
+                'flushed': self.flushed - self.overwritten,
+                'overwritten': self.overwritten,
+                'capacity': self.capacity,
+                'path': self.path
+            }
+
+
+def read_records(path):
+    """(header dict, RECORD_DTYPE records) of a timeline file, memory-mapped"""
+    with open(path, 'rb') as f:
+        magic, version, meta_length, start_time = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a gesture timeline')
+        meta = json.loads(f.read(meta_length))
+    offset = HEADER.size + meta_length
+    rows = (os.path.getsize(path) - offset) // RECORD_DTYPE.itemsize
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=offset, shape=(rows,)) \
+        if rows else np.zeros(0, dtype=RECORD_DTYPE)
+    meta['postures'] = {int(code): label for code, label in meta['postures'].items()}
+    meta['start_time'] = start_time
+    return meta, records
+
+
+def load_timeline(path):
+    """Open a flushed timeline file for queries"""
+    meta, records = read_records(path)
+    timeline = GestureTimeline(meta['flags'], meta['postures'], meta['start_time'], capacity=1)
+    timeline.path = path
+    timeline.count = timeline.flushed = len(records)
+    return timeline
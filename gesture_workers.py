@@ -0,0 +1,392 @@
+"""
+Process-Pool Gesture Inference
+Runs GestureRecognizers in worker processes so sessions scale across cores
+instead of sharing one interpreter's GIL with the API threads
+
+Frames are copied once into per-worker shared memory slots; only small
+control messages go through queues, and results come back as packed
+gesture flags (see gesture_recognition.pack_gestures). Each session is
+pinned to one worker, because recognizers keep motion history. Workers
+that die, or stop answering within the request timeout, are restarted and
+their sessions re-opened with fresh state.
+"""
+
+import atexit
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from gesture_imports import lazy_import
+from gesture_recognition import GestureRecognizer, pack_gestures, unpack_gestures
+
+cv2 = lazy_import('cv2')
+
+# Largest frame a slot holds without downscaling (1280x720 BGR)
+SLOT_SHAPE = (720, 1280, 3)
+SLOTS_PER_WORKER = 4
+RESULT_TIMEOUT_SECONDS = 10
+
+
+class WorkerCrashedError(RuntimeError):
+    """Raised for requests that were in flight when their worker died"""
+
+
+def _worker_main(index, shm_name, slot_shape, slots, commands, results):
+    """Worker process: own the recognizers of the sessions pinned here"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    slot_bytes = int(np.prod(slot_shape))
+    recognizers = {}
+    results.put(('ready', index, None, None))
+
+    try:
+        while True:
+            message = commands.get()
+            if message is None:
+                break
+            kind, request_id, session_id, payload = message
+
+            try:
+                reply = _handle(kind, session_id, payload, recognizers, shm, slot_bytes)
+            except Exception as e:
+                # Report the failure instead of taking down every session here
+                if kind == 'frame':
+                    reply = ('error', (payload[0], repr(e)))
+                else:
+                    reply = ('error', (None, repr(e)))
+            results.put((reply[0], index, request_id, reply[1]))
+    finally:
+        for recognizer in recognizers.values():
+            recognizer.release()
+        shm.close()
+
+
+def _handle(kind, session_id, payload, recognizers, shm, slot_bytes):
+    """Execute one command in the worker; returns (reply kind, value)"""
+    if kind == 'open':
+        if session_id not in recognizers:
+            recognizers[session_id] = GestureRecognizer(headless=True, **payload)
+        return 'ok', None
+
+    if kind == 'close':
+        recognizer = recognizers.pop(session_id, None)
+        if recognizer is not None:
+            recognizer.release()
+        return 'ok', None
+
+    if kind == 'frame':
+        slot, height, width = payload
+        frame = np.ndarray((height, width, 3), dtype=np.uint8, buffer=shm.buf, offset=slot * slot_bytes)
+        started = time.perf_counter()
+        _, gestures = recognizers[session_id].process_frame(frame, draw=False)
+        packed = np.array(pack_gestures(gestures), dtype=np.uint8)
+        return 'result', (slot, packed, time.perf_counter() - started)
+
+    if kind == 'stats':
+        return 'ok', recognizers[session_id].get_session_stats()
+
+    raise ValueError(f'Unknown command {kind!r}')
+
+
+class _Worker:
+    """Parent-side handle for one worker process and its frame slots"""
+
+    def __init__(self, index, context, slot_shape, slots, results):
+        self.index = index
+        self.slot_shape = slot_shape
+        self.slot_bytes = int(np.prod(slot_shape))
+        self.shm = shared_memory.SharedMemory(create=True, size=self.slot_bytes * slots)
+        self.slots = slots
+        self.free_slots = list(range(slots))
+        self.slot_cond = threading.Condition()
+        self.sessions = {}  # session_id -> recognizer options
+        self.context = context
+        self.results = results
+        self.commands = None
+        self.process = None
+        self.restarts = 0
+
+    def start(self):
+        self.commands = self.context.Queue()
+        self.spawn()
+
+    def spawn(self):
+        """Start a process reading the current command queue"""
+        self.process = self.context.Process(
+            target=_worker_main,
+            args=(self.index, self.shm.name, self.slot_shape, self.slots, self.commands, self.results),
+            name=f'gesture-inference-{self.index}',
+            daemon=True
+        )
+        self.process.start()
+
+    def slot_view(self, slot):
+        return np.ndarray(self.slot_shape, dtype=np.uint8, buffer=self.shm.buf, offset=slot * self.slot_bytes)
+
+    def acquire_slot(self, timeout):
+        with self.slot_cond:
+            if not self.slot_cond.wait_for(lambda: self.free_slots, timeout):
+                return None
+            return self.free_slots.pop()
+
+    def release_slot(self, slot):
+        with self.slot_cond:
+            if slot not in self.free_slots:
+                self.free_slots.append(slot)
+            self.slot_cond.notify()
+
+
+class _Pending:
+    """A request waiting for its worker's reply
+
+    Whoever removes it from ProcessInferenceBackend.pending (the result
+    collector, a timeout or a restart) frees its frame slot.
+    """
+
+    __slots__ = ('event', 'worker', 'generation', 'slot', 'value', 'error')
+
+    def __init__(self, worker, slot=None):
+        self.event = threading.Event()
+        self.worker = worker
+        self.generation = worker.restarts  # which process the request went to
+        self.slot = slot
+        self.value = None
+        self.error = None
+
+
+class ProcessInferenceBackend:
+    """Pool of inference processes shared by many sessions"""
+
+    def __init__(self, processes=None, slot_shape=SLOT_SHAPE, slots_per_worker=SLOTS_PER_WORKER,
+                 timeout=RESULT_TIMEOUT_SECONDS):
+        self.context = multiprocessing.get_context('spawn')
+        self.slot_shape = tuple(slot_shape)
+        self.timeout = timeout
+        self.results = self.context.Queue()
+        self.workers = [
+            _Worker(i, self.context, self.slot_shape, slots_per_worker, self.results)
+            for i in range(processes or multiprocessing.cpu_count())
+        ]
+        self.session_workers = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._stop = threading.Event()
+
+        for worker in self.workers:
+            worker.start()
+        self._collector = threading.Thread(target=self._collect, name='gesture-results', daemon=True)
+        self._collector.start()
+        self._monitor = threading.Thread(target=self._watch_workers, name='gesture-monitor', daemon=True)
+        self._monitor.start()
+        # Shared memory outlives the process unless unlinked
+        atexit.register(self.shutdown)
+
+    def create_recognizer(self, session_id, **options):
+        """Open a session on the least-loaded worker and return its proxy
+
+        The session is pinned to the worker only once the worker has opened
+        it, so a failed open leaves nothing behind to re-open on restarts.
+        """
+        with self.lock:
+            worker = min(self.workers, key=lambda w: len(w.sessions))
+            generation = worker.restarts
+        self._request(worker, 'open', session_id, options)
+        with self.lock:
+            worker.sessions[session_id] = options
+            self.session_workers[session_id] = worker
+            if worker.restarts != generation:
+                # Restarted after opening it; the restart didn't know to re-open it
+                worker.commands.put(('open', 0, session_id, options))
+        return RemoteRecognizer(self, session_id)
+
+    def _request(self, worker, kind, session_id, payload, slot=None):
+        request_id = next(self._ids)
+        pending = _Pending(worker, slot)
+        # Enqueued under the lock, so a restart either sees this request
+        # (and fails it) or has already swapped in the new queue
+        with self.lock:
+            self.pending[request_id] = pending
+            pending.generation = worker.restarts
+            worker.commands.put((kind, request_id, session_id, payload))
+
+        if not pending.event.wait(self.timeout):
+            with self.lock:
+                timed_out = self.pending.pop(request_id, None) is not None
+            if timed_out:
+                # A hung worker never dies on its own; replace it, which
+                # also frees the slots its requests were holding
+                self._restart_worker(worker, pending.generation, 'did not answer in time',
+                                     extra_slots=[slot] if slot is not None else [])
+                raise TimeoutError(f'Inference worker {worker.index} did not answer')
+            pending.event.wait()  # answered just as the wait timed out
+        if pending.error:
+            raise pending.error
+        return pending.value
+
+    def process(self, session_id, frame):
+        """Run one frame through the session's remote recognizer"""
+        worker = self.session_workers[session_id]
+        slot = worker.acquire_slot(self.timeout)
+        if slot is None:
+            raise TimeoutError(f'No free frame slot on inference worker {worker.index}')
+
+        # The only copy of the frame: straight into shared memory, scaled
+        # down if it doesn't fit the slot
+        height, width = frame.shape[:2]
+        max_height, max_width = self.slot_shape[:2]
+        if height > max_height or width > max_width:
+            scale = min(max_height / height, max_width / width)
+            width, height = max(1, int(width * scale)), max(1, int(height * scale))
+            view = worker.slot_view(slot).reshape(-1)[:height * width * 3].reshape(height, width, 3)
+            cv2.resize(frame, (width, height), dst=view, interpolation=cv2.INTER_AREA)
+        else:
+            view = worker.slot_view(slot).reshape(-1)[:height * width * 3].reshape(height, width, 3)
+            np.copyto(view, frame)
+
+        packed, _ = self._request(worker, 'frame', session_id, (slot, height, width), slot=slot)
+        return unpack_gestures(packed[0], packed[1])
+
+    def session_stats(self, session_id):
+        return self._request(self.session_workers[session_id], 'stats', session_id, None)
+
+    def close_session(self, session_id):
+        with self.lock:
+            worker = self.session_workers.pop(session_id, None)
+            if worker is not None:
+                worker.sessions.pop(session_id, None)
+        if worker is not None and worker.process.is_alive():
+            self._request(worker, 'close', session_id, None)
+
+    def _collect(self):
+        """Resolve pending requests from the shared result queue"""
+        while not self._stop.is_set():
+            try:
+                kind, index, request_id, value = self.results.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            if kind == 'ready':
+                continue
+
+            with self.lock:
+                pending = self.pending.pop(request_id, None)
+            if kind in ('result', 'error'):
+                value = value[1:]
+            if pending is not None:
+                # A reply whose request is no longer pending had its slot
+                # freed by the timeout or restart that dropped it
+                if pending.slot is not None:
+                    pending.worker.release_slot(pending.slot)
+                if kind == 'error':
+                    pending.error = RuntimeError(f'Inference worker {index}: {value[0]}')
+                else:
+                    pending.value = value
+                pending.event.set()
+
+    def _watch_workers(self):
+        """Restart dead workers"""
+        while not self._stop.wait(1.0):
+            for worker in self.workers:
+                if not worker.process.is_alive():
+                    self._restart_worker(worker, worker.restarts, f'exited (code {worker.process.exitcode})')
+
+    def _restart_worker(self, worker, generation, reason, extra_slots=()):
+        """Replace a dead or hung worker process and re-open its sessions
+
+        generation is the worker's restart count the caller saw, so several
+        callers noticing the same failure restart it only once. Requests
+        still pending on the old process fail with WorkerCrashedError.
+        """
+        with self.lock:
+            if worker.restarts != generation or self._stop.is_set():
+                stale = True
+            else:
+                stale = False
+                worker.restarts += 1
+                lost = [(rid, p) for rid, p in self.pending.items() if p.worker is worker]
+                for request_id, _ in lost:
+                    del self.pending[request_id]
+                old_process = worker.process
+                # New requests go to the new queue from here on; sessions
+                # are re-opened first (their recognizer state starts over)
+                worker.commands = self.context.Queue()
+                for session_id, options in worker.sessions.items():
+                    worker.commands.put(('open', 0, session_id, options))
+        if stale:
+            for slot in extra_slots:
+                worker.release_slot(slot)
+            return
+
+        print(f"[WARNING] Inference worker {worker.index} {reason}; restarting")
+        if old_process.is_alive():
+            old_process.terminate()
+            old_process.join(timeout=5)
+        for _, pending in lost:
+            pending.error = WorkerCrashedError(f'Inference worker {worker.index} crashed')
+            pending.event.set()
+        # Only now that the old process is gone can its slots be reused
+        for slot in [p.slot for _, p in lost if p.slot is not None] + list(extra_slots):
+            worker.release_slot(slot)
+        worker.spawn()
+
+    def get_stats(self):
+        return {
+            'processes': len(self.workers),
+            'workers': [
+                {
+                    'index': worker.index,
+                    'pid': worker.process.pid,
+                    'alive': worker.process.is_alive(),
+                    'sessions': len(worker.sessions),
+                    'free_slots': len(worker.free_slots),
+                    'restarts': worker.restarts
+                }
+                for worker in self.workers
+            ]
+        }
+
+    def shutdown(self):
+        """Stop all workers and free the shared memory (also run at exit)"""
+        with self.lock:
+            if self._stop.is_set():
+                return
+            self._stop.set()
+        atexit.unregister(self.shutdown)
+        for worker in self.workers:
+            worker.commands.put(None)
+        for worker in self.workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.shm.close()
+            worker.shm.unlink()
+
+
+class RemoteRecognizer:
+    """GestureRecognizer stand-in whose graphs live in a worker process
+
+    Supports the subset GestureSessionManager uses: process_frame without
+    drawing, get_session_stats and release.
+    """
+
+    def __init__(self, backend, session_id):
+        self.backend = backend
+        self.session_id = session_id
+
+    def process_frame(self, frame, draw=False):
+        return frame, self.backend.process(self.session_id, frame)
+
+    def get_session_stats(self):
+        try:
+            return self.backend.session_stats(self.session_id)
+        except (KeyError, TimeoutError, WorkerCrashedError):
+            return {}
+
+    def release(self):
+        self.backend.close_session(self.session_id)
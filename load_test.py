@@ -0,0 +1,184 @@
+"""
+Interview API Load Test
+Simulates concurrent candidates (register, start an interview, then poll
+questions/metrics and submit answers) and reports latency percentiles and
+the highest concurrency that stays within a p95 latency target.
+
+Usage:
+    python load_test.py --url http://localhost:5000 --ramp 50,100,200
+    python load_test.py --url http://localhost:5000 --url http://localhost:8000 --duration 30
+
+Compare the Flask server (python app.py) with the async one
+(hypercorn asgi_app:app) by passing both URLs.
+"""
+
+import argparse
+import http.cookiejar
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Candidate:
+    """One simulated candidate with its own cookie session"""
+
+    def __init__(self, base_url, results, lock, timeout=10):
+        self.base_url = base_url.rstrip('/')
+        self.results = results
+        self.lock = lock
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar())
+        )
+        self.session_id = None
+
+    def call(self, method, path, payload=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        req = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            method=method,
+            headers={'Content-Type': 'application/json'}
+        )
+        started = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=self.timeout) as response:
+                body = json.loads(response.read() or b'{}')
+                ok = True
+        except urllib.error.HTTPError as e:
+            body = {}
+            ok = e.code < 500
+        except Exception:
+            body = {}
+            ok = False
+        elapsed = time.perf_counter() - started
+
+        with self.lock:
+            self.results['latencies'].append(elapsed)
+            if not ok:
+                self.results['errors'] += 1
+        return body
+
+    def run(self, stop_at, poll_interval):
+        name = f"load_{uuid.uuid4().hex[:12]}"
+        self.call('POST', '/api/register', {
+            'username': name,
+            'email': f'{name}@example.com',
+            'password': 'loadtest123'
+        })
+        started = self.call('POST', '/api/start-interview', {
+            'role': 'Software Engineer',
+            'category': 'Technical',
+            'num_questions': 5
+        })
+        self.session_id = started.get('session_id')
+        if not self.session_id:
+            return
+
+        # Spread candidates out so polls don't arrive in lock-step
+        time.sleep(random.uniform(0, poll_interval))
+
+        polls = 0
+        while time.time() < stop_at:
+            self.call('GET', f'/api/get-question/{self.session_id}')
+            polls += 1
+            if polls % 5 == 0:
+                self.call('POST', f'/api/update-tracking-metrics/{self.session_id}', {
+                    'eye_tracking_score': random.uniform(50, 100),
+                    'focus_percentage': random.uniform(50, 100)
+                })
+            if polls % 15 == 0:
+                self.call('POST', f'/api/submit-answer/{self.session_id}', {
+                    'answer': 'Load test answer ' * 10
+                })
+            time.sleep(poll_interval)
+
+
+def run_level(base_url, candidates, duration, poll_interval):
+    """Run one concurrency level and return its summary"""
+    results = {'latencies': [], 'errors': 0}
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+
+    threads = [
+        threading.Thread(
+            target=Candidate(base_url, results, lock).run,
+            args=(stop_at, poll_interval),
+            daemon=True
+        )
+        for _ in range(candidates)
+    ]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(duration + 30)
+    elapsed = time.time() - started
+
+    latencies = results['latencies']
+    return {
+        'candidates': candidates,
+        'requests': len(latencies),
+        'errors': results['errors'],
+        'throughput': len(latencies) / elapsed if elapsed > 0 else 0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the interview API')
+    parser.add_argument('--url', action='append', required=True,
+                        help='Server base URL (repeat to compare servers)')
+    parser.add_argument('--ramp', default='25,50,100,200',
+                        help='Comma-separated concurrent candidate counts')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds per level')
+    parser.add_argument('--poll-interval', type=float, default=1.0,
+                        help='Seconds between a candidate\'s polls')
+    parser.add_argument('--slo-ms', type=float, default=250,
+                        help='p95 latency target used to report capacity')
+    args = parser.parse_args()
+
+    levels = [int(n) for n in args.ramp.split(',') if n]
+
+    print("=" * 60)
+    print("INTERVIEW API LOAD TEST")
+    print("=" * 60)
+
+    summary = {}
+    for base_url in args.url:
+        print(f"\n{base_url}")
+        print(f"  {'cands':>6} {'reqs':>7} {'err':>5} {'req/s':>8} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8}")
+        capacity = 0
+        for level in levels:
+            result = run_level(base_url, level, args.duration, args.poll_interval)
+            print(f"  {result['candidates']:>6} {result['requests']:>7} {result['errors']:>5} "
+                  f"{result['throughput']:>8.1f} {result['p50_ms']:>8.1f} "
+                  f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+            if result['p95_ms'] <= args.slo_ms and result['errors'] == 0:
+                capacity = level
+        summary[base_url] = capacity
+
+    print("\n" + "=" * 60)
+    print(f"CAPACITY (p95 <= {args.slo_ms:.0f} ms, no errors)")
+    print("=" * 60)
+    for base_url, capacity in summary.items():
+        print(f"  {base_url}: {capacity} concurrent candidates")
+
+
+if __name__ == '__main__':
+    main()
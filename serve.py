@@ -0,0 +1,200 @@
+"""
+Production Server Launcher
+Serves the Flask entry points with a multi-worker WSGI server instead of the
+Werkzeug dev server started by app.run(debug=True)
+
+Usage:
+    python serve.py app --workers 4 --threads 8
+    python serve.py gesture_api
+    python serve.py firebase_app --port 8000 --max-requests 5000
+
+Every option can also be set through the environment (SERVE_WORKERS,
+SERVE_THREADS, SERVE_PORT, SERVE_BIND, SERVE_PRELOAD, SERVE_TIMEOUT,
+SERVE_GRACEFUL_TIMEOUT, SERVE_MAX_REQUESTS, SERVE_PIDFILE).
+
+On Linux/macOS this runs gunicorn: the app module (and its InterviewModel)
+is imported once in the master and shared copy-on-write with the forked
+workers. SIGHUP to the master (see --pidfile) replaces the workers
+gracefully, which picks up configuration changes; with preload the new
+workers fork from the already-imported master, so new application code
+needs a full restart (or --no-preload, where each worker imports it).
+On Windows, where gunicorn is unavailable, it falls back to waitress with a
+single process and --threads worker threads.
+"""
+
+import argparse
+import gc
+import importlib
+import multiprocessing
+import os
+import sys
+
+# Entry point -> default port and the most worker processes it can run with.
+# app_no_auth keeps interview state in process memory and gesture_api owns
+# the camera, so both scale with threads only.
+TARGETS = {
+    'app': {'port': 5000, 'max_workers': None},
+    'auth_app': {'port': 5000, 'max_workers': None},
+    'firebase_app': {'port': 5000, 'max_workers': None},
+    'app_no_auth': {'port': 5000, 'max_workers': 1},
+    'gesture_api': {'port': 5001, 'max_workers': 1}
+}
+
+# Entry points whose interview state can live in SQLite (see app.SESSION_STORE)
+DB_SESSION_TARGETS = {'app', 'auth_app'}
+
+
+def default_workers():
+    """gunicorn's usual starting point: two workers per core plus one"""
+    return multiprocessing.cpu_count() * 2 + 1
+
+
+def _env(name, default, cast=str):
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return default
+    if cast is bool:
+        return value.lower() in ('1', 'true', 'yes', 'on')
+    return cast(value)
+
+
+def build_config(args):
+    """Resolve the server configuration from CLI arguments and environment"""
+    target = TARGETS[args.target]
+
+    workers = args.workers or _env('SERVE_WORKERS', default_workers(), int)
+    if target['max_workers'] is not None and workers > target['max_workers']:
+        print(f"[WARNING] {args.target} keeps per-process state; "
+              f"using {target['max_workers']} worker (scale with --threads)")
+        workers = target['max_workers']
+
+    port = args.port or _env('SERVE_PORT', target['port'], int)
+
+    return {
+        'bind': args.bind or _env('SERVE_BIND', f'0.0.0.0:{port}'),
+        'workers': workers,
+        'threads': args.threads or _env('SERVE_THREADS', 4, int),
+        'preload_app': args.preload if args.preload is not None else _env('SERVE_PRELOAD', True, bool),
+        'timeout': args.timeout or _env('SERVE_TIMEOUT', 120, int),
+        'graceful_timeout': args.graceful_timeout or _env('SERVE_GRACEFUL_TIMEOUT', 30, int),
+        'max_requests': args.max_requests or _env('SERVE_MAX_REQUESTS', 0, int),
+        'max_requests_jitter': 0,
+        'pidfile': args.pidfile or _env('SERVE_PIDFILE', None),
+        'worker_class': 'gthread'
+    }
+
+
+def prepare_environment(target, config):
+    """Set environment the app modules read at import time"""
+    if target in DB_SESSION_TARGETS and config['workers'] > 1:
+        # Any worker may get any candidate's request, so read state from SQLite
+        os.environ.setdefault('INTERVIEW_SESSION_STORE', 'db')
+
+    if config['workers'] > 1 and not config['preload_app'] and not os.environ.get('SECRET_KEY'):
+        # Without preload each worker would generate its own random secret key
+        # and reject session cookies signed by the others
+        print("[WARNING] Set SECRET_KEY when running several workers without preload")
+
+
+def load_app(target):
+    """Import the entry point module and return its WSGI app"""
+    module = importlib.import_module(target)
+    return module.app
+
+
+def start_background_tasks(target):
+    """Start the entry point's background threads in the serving process
+
+    Threads don't survive fork, so with preload they must start in each
+    worker rather than when the master imports the app.
+    """
+    start = getattr(importlib.import_module(target), 'start_background_tasks', None)
+    if start is not None:
+        start()
+
+
+def serve_gunicorn(target, config):
+    from gunicorn.app.base import BaseApplication
+
+    class InterviewServer(BaseApplication):
+        """Embeds gunicorn so the app can be configured from Python"""
+
+        def __init__(self, options):
+            self.options = options
+            self.application = None
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                if value is not None and key in self.cfg.settings:
+                    self.cfg.set(key, value)
+
+        def load(self):
+            if self.application is None:
+                self.application = load_app(target)
+                if self.options['preload_app']:
+                    # Move everything loaded so far (model, vectorizer, graphs)
+                    # out of the GC's reach so collections in the workers don't
+                    # touch, and thereby copy, the shared pages
+                    gc.freeze()
+            return self.application
+
+    if config['max_requests']:
+        config['max_requests_jitter'] = max(1, config['max_requests'] // 10)
+    config['post_worker_init'] = lambda worker: start_background_tasks(target)
+
+    InterviewServer(config).run()
+
+
+def serve_waitress(target, config):
+    from waitress import serve
+
+    if config['workers'] > 1:
+        print("[WARNING] waitress runs a single process; using "
+              f"{config['threads']} threads instead of {config['workers']} workers")
+    application = load_app(target)
+    start_background_tasks(target)
+    serve(application, listen=config['bind'], threads=config['threads'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run an entry point with a production WSGI server')
+    parser.add_argument('target', choices=sorted(TARGETS), help='Entry point module to serve')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: 2 x cores + 1)')
+    parser.add_argument('--threads', type=int, help='Threads per worker (default: 4)')
+    parser.add_argument('--port', type=int, help='Port (default depends on the entry point)')
+    parser.add_argument('--bind', help='Full bind address, e.g. 127.0.0.1:8000')
+    parser.add_argument('--preload', dest='preload', action='store_true', default=None,
+                        help='Import the app before forking workers (default)')
+    parser.add_argument('--no-preload', dest='preload', action='store_false',
+                        help='Import the app separately in every worker')
+    parser.add_argument('--timeout', type=int, help='Seconds before a silent worker is restarted')
+    parser.add_argument('--graceful-timeout', type=int,
+                        help='Seconds workers get to finish requests on reload/shutdown')
+    parser.add_argument('--max-requests', type=int,
+                        help='Recycle each worker after this many requests (0 = never)')
+    parser.add_argument('--pidfile', help='Write the master PID here (for kill -HUP worker restarts)')
+    args = parser.parse_args()
+
+    config = build_config(args)
+    prepare_environment(args.target, config)
+
+    # Entry points import their siblings (train_model, report_generator, ...)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+    print("=" * 60)
+    print(f"PRODUCTION SERVER: {args.target}")
+    print("=" * 60)
+    print(f"   Bind: {config['bind']}")
+    print(f"   Workers: {config['workers']} x {config['threads']} threads")
+    print(f"   Preload: {config['preload_app']}")
+    print("=" * 60 + "\n")
+
+    if os.name == 'nt':
+        serve_waitress(args.target, config)
+    else:
+        serve_gunicorn(args.target, config)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""
+Tests for the hourly/daily analytics rollups
+Run with: python -m pytest tests/test_analytics.py
+"""
+
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from analytics import METRICS, init_rollup_tables, refresh_rollup_tables
+from tracking_schema import EVENT_TYPES, init_tracking_table, insert_event
+
+NOW = datetime.now(timezone.utc).replace(tzinfo=None, minute=30, second=0, microsecond=0)
+RECENT = NOW - timedelta(hours=1)
+OLD = NOW - timedelta(hours=30)
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('''
+        CREATE TABLE interview_sessions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT UNIQUE NOT NULL,
+            role TEXT NOT NULL,
+            category TEXT NOT NULL,
+            difficulty TEXT,
+            completed BOOLEAN DEFAULT 0,
+            terminated BOOLEAN DEFAULT 0,
+            start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    init_tracking_table(conn)
+    init_rollup_tables(conn)
+    yield conn
+    conn.close()
+
+
+def _session(conn, session_id, start, role='Engineer', completed=False, terminated=False, tab_switches=0):
+    conn.execute('''
+        INSERT INTO interview_sessions (session_id, role, category, difficulty, completed, terminated, start_time)
+        VALUES (?, ?, 'technical', NULL, ?, ?, ?)
+    ''', (session_id, role, completed, terminated, start.strftime('%Y-%m-%d %H:%M:%S')))
+    c = conn.cursor()
+    for number in range(1, tab_switches + 1):
+        insert_event(c, session_id, EVENT_TYPES['tab_switch'][0], value_int=number)
+    insert_event(c, session_id, EVENT_TYPES['focus_loss'][0], value_real=1.5)
+    conn.commit()
+
+
+def _rows(conn, table):
+    c = conn.execute(f'SELECT bucket, role, difficulty, {", ".join(METRICS)} FROM {table} ORDER BY bucket, role')
+    return [dict(zip(['bucket', 'role', 'difficulty'] + list(METRICS), row)) for row in c.fetchall()]
+
+
+def _hour(moment):
+    return moment.strftime('%Y-%m-%d %H:00:00')
+
+
+def _day(moment):
+    return moment.strftime('%Y-%m-%d 00:00:00')
+
+
+def test_first_refresh_backfills_hourly_and_daily(conn):
+    _session(conn, 'a', OLD, completed=True)
+    _session(conn, 'b', RECENT, terminated=True, tab_switches=2)
+    _session(conn, 'c', RECENT, tab_switches=0)
+    _session(conn, 'd', RECENT, role='Designer', completed=True)
+
+    assert refresh_rollup_tables(conn) == '0000-00-00 00:00:00'
+
+    hourly = _rows(conn, 'analytics_hourly')
+    assert [(row['bucket'], row['role']) for row in hourly] == [
+        (_hour(OLD), 'Engineer'), (_hour(RECENT), 'Designer'), (_hour(RECENT), 'Engineer')
+    ]
+    engineers = hourly[2]
+    assert engineers['difficulty'] == 'mixed'
+    assert (engineers['sessions_started'], engineers['sessions_completed'], engineers['sessions_terminated']) == (2, 0, 1)
+    assert (engineers['tab_switches'], engineers['sessions_with_tab_switch']) == (2, 1)
+    # Two tab switches and a focus loss for b, a focus loss for c
+    assert engineers['tracking_events'] == 4
+
+
+def test_daily_is_the_sum_of_hourly(conn):
+    for i, start in enumerate([OLD, RECENT, RECENT - timedelta(minutes=10), NOW - timedelta(hours=3)]):
+        _session(conn, f's{i}', start, completed=i % 2 == 0, tab_switches=i)
+    refresh_rollup_tables(conn)
+
+    totals = {}
+    for row in _rows(conn, 'analytics_hourly'):
+        day = totals.setdefault((row['bucket'][:10] + ' 00:00:00', row['role']), dict.fromkeys(METRICS, 0))
+        for metric in METRICS:
+            day[metric] += row[metric]
+    daily = {(row['bucket'], row['role']): {metric: row[metric] for metric in METRICS}
+             for row in _rows(conn, 'analytics_daily')}
+    assert daily == totals
+
+
+def test_later_refresh_only_rebuilds_the_lookback_window(conn):
+    _session(conn, 'a', OLD)
+    _session(conn, 'b', RECENT)
+    refresh_rollup_tables(conn)
+    last_refresh = conn.execute("SELECT value FROM analytics_state WHERE key = 'last_refresh'").fetchone()[0]
+
+    # Late changes: a recent session is completed, and an old row shows up
+    conn.execute("UPDATE interview_sessions SET completed = 1 WHERE session_id = 'b'")
+    _session(conn, 'c', OLD)
+    window_start = refresh_rollup_tables(conn)
+
+    expected = datetime.strptime(last_refresh, '%Y-%m-%d %H:%M:%S') - timedelta(hours=6)
+    assert window_start == _hour(expected)
+    hourly = {row['bucket']: row for row in _rows(conn, 'analytics_hourly')}
+    assert hourly[_hour(RECENT)]['sessions_completed'] == 1
+    # Outside the window: left as the first refresh computed it
+    assert hourly[_hour(OLD)]['sessions_started'] == 1
+    daily = {row['bucket']: row for row in _rows(conn, 'analytics_daily')}
+    assert daily[_day(OLD)]['sessions_started'] == 1
+    assert daily[_day(RECENT)]['sessions_completed'] == sum(
+        row['sessions_completed'] for row in hourly.values() if row['bucket'][:10] == _day(RECENT)[:10]
+    )
+
+
+def test_min_age_skips_a_fresh_refresh(conn):
+    _session(conn, 'a', RECENT)
+    refresh_rollup_tables(conn)
+    _session(conn, 'b', RECENT)
+
+    assert refresh_rollup_tables(conn, min_age=300) is None
+    assert _rows(conn, 'analytics_hourly')[0]['sessions_started'] == 1
+    refresh_rollup_tables(conn)
+    assert _rows(conn, 'analytics_hourly')[0]['sessions_started'] == 2
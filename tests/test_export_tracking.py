@@ -0,0 +1,86 @@
+"""
+Tests for the chunked, day-partitioned columnar export
+Run with: python -m pytest tests/test_export_tracking.py
+"""
+
+import glob
+import os
+import sqlite3
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+import pyarrow.parquet as pq
+
+from export_tracking import export_all
+
+# (session_id, timestamp) in id order; the last row is a straggler for a
+# day whose file was already closed
+ANSWERS = [
+    ('s1', '2024-03-01 09:00:00'),
+    ('s1', '2024-03-01 09:01:00'),
+    ('s2', '2024-03-01 10:00:00'),
+    ('s2', '2024-03-01 10:05:00'),
+    ('s3', '2024-03-01 11:00:00'),
+    ('s3', '2024-03-02 09:00:00'),
+    ('s4', '2024-03-02 09:30:00'),
+    ('s4', '2024-03-02 10:00:00'),
+    ('s1', '2024-03-01 23:59:00')
+]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'interviews.db')
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE answers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            question TEXT NOT NULL,
+            answer TEXT NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.executemany(
+        'INSERT INTO answers (session_id, question, answer, timestamp) VALUES (?, ?, ?, ?)',
+        [(session_id, 'Q', 'A' if index % 3 else '[Skipped]', stamp)
+         for index, (session_id, stamp) in enumerate(ANSWERS)]
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _read(path):
+    if path.endswith('.parquet'):
+        return pq.read_table(path)
+    with pa.ipc.open_file(path) as reader:
+        return reader.read_all()
+
+
+@pytest.mark.parametrize('file_format', ['parquet', 'arrow'])
+def test_days_spanning_several_chunks(db_path, tmp_path, file_format):
+    out = str(tmp_path / 'out')
+    results = export_all(db_path, out, file_format=file_format, chunk_size=2, tables=['answers'])
+    assert results == {'answers': len(ANSWERS)}
+
+    exported = {}
+    for path in sorted(glob.glob(os.path.join(out, 'answers', 'date=*', f'*.{file_format}'))):
+        day = os.path.basename(os.path.dirname(path))[len('date='):]
+        table = _read(path)
+        exported.setdefault(day, []).extend(
+            zip(table.column('id').to_pylist(), table.column('session_id').to_pylist())
+        )
+
+    expected = {}
+    for row_id, (session_id, stamp) in enumerate(ANSWERS, start=1):
+        expected.setdefault(stamp[:10], []).append((row_id, session_id))
+    assert {day: sorted(rows) for day, rows in exported.items()} == expected
+
+
+def test_closed_day_gets_another_file(db_path, tmp_path):
+    out = str(tmp_path / 'out')
+    export_all(db_path, out, chunk_size=2, tables=['answers'])
+    files = sorted(os.listdir(os.path.join(out, 'answers', 'date=2024-03-01')))
+    assert files == ['data-1.parquet', 'data.parquet']
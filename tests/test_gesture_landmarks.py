@@ -0,0 +1,128 @@
+"""
+Tests for the packed landmark format and landmark sessions
+Run with: python -m pytest tests/test_gesture_landmarks.py
+"""
+
+import numpy as np
+import pytest
+
+from gesture_landmarks import (FACE_KEYPOINTS, HAND_KEYPOINTS, HEADER, POSE_KEYPOINTS, LandmarkFormatError,
+                               decode_frames, encode_frame)
+
+# Keypoint rows (FACE_KEYPOINTS order) of a face looking at the camera:
+# nose centered between the eyes, mouth narrower than 3.5x its height
+FACE = np.array([
+    (0.50, 0.50),  # 1 nose tip
+    (0.50, 0.60),  # 13 top lip
+    (0.50, 0.64),  # 14 bottom lip
+    (0.40, 0.45),  # 33 left eye
+    (0.45, 0.62),  # 61 left mouth corner
+    (0.60, 0.45),  # 263 right eye
+    (0.55, 0.62)   # 291 right mouth corner
+])
+
+
+def _close(packed, points):
+    # float16 on the wire
+    return np.allclose(packed.points[:, :points.shape[1]], points, atol=1e-3)
+
+
+def test_round_trip_keypoints():
+    rng = np.random.default_rng(0)
+    pose = rng.random((len(POSE_KEYPOINTS), 2))
+    hands = [(rng.random((len(HAND_KEYPOINTS), 2)), 'Left'), (rng.random((len(HAND_KEYPOINTS), 2)), 'Right')]
+    frame, = decode_frames(encode_frame(1280, 720, face=FACE, hands=hands, pose=pose, time_ms=1234))
+
+    assert (frame.width, frame.height, frame.time_ms) == (1280, 720, 1234)
+    assert _close(frame.face, FACE) and _close(frame.pose, pose)
+    assert [label for _, label in frame.hands] == ['Left', 'Right']
+    assert all(_close(packed, points) for (packed, _), (points, _) in zip(frame.hands, hands))
+    # Keypoint subsets are indexed by their MediaPipe landmark numbers
+    assert frame.face.landmark[263].x == pytest.approx(0.60, abs=1e-3)
+    assert frame.pose.landmark[24].y == pytest.approx(pose[-1, 1], abs=1e-3)
+
+
+def test_round_trip_full_sets_3d():
+    rng = np.random.default_rng(1)
+    face = rng.random((478, 3))
+    frame, = decode_frames(encode_frame(640, 480, face=face, hands=[(rng.random((21, 3)), 'Right')], dims=3))
+    assert len(frame.face) == 478 and _close(frame.face, face)
+    assert frame.face.landmark[477].z == pytest.approx(face[477, 2], abs=1e-3)
+    assert frame.pose is None and len(frame.hands) == 1
+
+
+def test_empty_frame_and_time_wrap():
+    frame, = decode_frames(encode_frame(640, 480, time_ms=(1 << 32) + 5))
+    assert frame.face is None and frame.pose is None and frame.hands == []
+    assert frame.time_ms == 5
+
+
+def test_concatenated_frames():
+    body = b''.join(encode_frame(640, 480, face=FACE, time_ms=i * 33) for i in range(5))
+    frames = decode_frames(body)
+    assert [frame.time_ms for frame in frames] == [0, 33, 66, 99, 132]
+
+
+@pytest.mark.parametrize('mangle, message', [
+    (lambda data: data[:HEADER.size - 1], 'Truncated header'),
+    (lambda data: data[:-1], 'Truncated landmark data'),
+    (lambda data: data + data[:5], 'Truncated header'),
+    (lambda data: b'XX' + data[2:], 'Not a packed landmark frame'),
+    (lambda data: data[:2] + bytes([1]) + data[3:], 'Unsupported landmark format version'),
+    (lambda data: data[:3] + bytes([4]) + data[4:], 'Invalid dimensions'),
+])
+def test_malformed_bodies(mangle, message):
+    data = encode_frame(640, 480, face=FACE)
+    with pytest.raises(LandmarkFormatError, match=message):
+        decode_frames(mangle(data))
+
+
+def test_unsupported_counts_and_handedness():
+    with pytest.raises(LandmarkFormatError, match='Unsupported landmark count'):
+        decode_frames(encode_frame(640, 480, face=FACE[:5]))
+
+    data = bytearray(encode_frame(640, 480, hands=[(np.zeros((len(HAND_KEYPOINTS), 2)), 'Left')]))
+    data[HEADER.size] = 7
+    with pytest.raises(LandmarkFormatError, match='Invalid handedness'):
+        decode_frames(bytes(data))
+
+
+@pytest.fixture
+def manager():
+    recognition = pytest.importorskip('gesture_recognition')
+    from gesture_sessions import GestureSessionManager
+
+    manager = GestureSessionManager(
+        lambda session_id, **options: recognition.GestureRecognizer(profile='landmarks'), workers=1
+    )
+    yield manager
+    manager.shutdown()
+
+
+def test_batched_upload_keeps_capture_times(manager):
+    session = manager.create_session('candidate')
+    body = b''.join(encode_frame(640, 480, face=FACE, time_ms=10000 + i * 100) for i in range(10))
+    gestures = manager.submit_landmarks('candidate', decode_frames(body))
+
+    assert gestures['eye_contact'] is True
+    times = session.recognizer.timeline.records()['t']
+    assert np.allclose(np.diff(times), 0.1, atol=1e-3)
+    # Held for 0.9 s of capture time, longer than eye contact's min_on
+    assert session.recognizer.events.counts['eye_contact'] == 1
+    assert session.get_stats()['frames_processed'] == 10
+
+
+def test_client_clock_reset_moves_forward(manager):
+    session = manager.create_session('candidate')
+    manager.submit_landmarks('candidate', decode_frames(encode_frame(640, 480, face=FACE, time_ms=500000)))
+    # Page reload: the client clock starts over
+    manager.submit_landmarks('candidate', decode_frames(encode_frame(640, 480, face=FACE, time_ms=10)))
+    times = session.recognizer.timeline.records()['t']
+    assert len(times) == 2 and times[1] >= times[0]
+
+
+def test_closed_session_rejects_landmarks(manager):
+    manager.create_session('candidate')
+    manager.close_session('candidate')
+    with pytest.raises(KeyError):
+        manager.submit_landmarks('candidate', decode_frames(encode_frame(640, 480, face=FACE)))
@@ -0,0 +1,49 @@
+"""
+Tests for the CPU budget governor of the live pipeline
+Run with: python -m pytest tests/test_gesture_pipeline.py
+"""
+
+from gesture_pipeline import FrameRateGovernor
+
+
+def _run(governor, cost, seconds):
+    """Feed frames of a fixed processing cost at the governor's target rate"""
+    now = governor.last_started or 0.0
+    if governor.last_started is not None:
+        now += 1 / governor.fps
+    end = now + seconds
+    while now < end:
+        governor.record(cost, started=now)
+        now += max(cost, 1 / governor.fps)
+
+
+def _overloaded(widths=(640, 480)):
+    governor = FrameRateGovernor(budget=1.0, max_fps=30.0, min_fps=5.0, widths=widths)
+    _run(governor, 0.5, 10)
+    assert governor.fps == 5.0
+    assert governor.inference_width == widths[-1]
+    return governor
+
+
+def test_overload_drops_rate_then_width():
+    governor = FrameRateGovernor(budget=1.0, max_fps=30.0, min_fps=5.0, widths=(640, 480))
+    _run(governor, 0.1, 3)
+    assert governor.fps < 30.0
+    assert governor.inference_width is None
+    _overloaded()
+
+
+def test_rate_recovers_at_reduced_width():
+    governor = _overloaded()
+    # Too expensive to widen again (load 0.5 at min_fps), but there is room for more frames
+    _run(governor, 0.1, 5)
+    assert governor.inference_width == 480
+    assert governor.fps > 5.0
+    assert governor.fps * 0.1 <= 1.0
+
+
+def test_width_then_rate_recover_with_headroom():
+    governor = _overloaded()
+    _run(governor, 0.01, 10)
+    assert governor.inference_width is None
+    assert governor.fps == 30.0
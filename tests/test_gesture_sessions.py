@@ -0,0 +1,206 @@
+"""
+Tests for the multi-session manager: id reservation, worker handoff and
+release on close
+Run with: python -m pytest tests/test_gesture_sessions.py
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from gesture_sessions import GestureSessionManager, SessionLimitError
+
+cv2 = pytest.importorskip('cv2')
+
+FRAME = cv2.imencode('.jpg', np.zeros((48, 64, 3), dtype=np.uint8))[1].tobytes()
+
+
+class FakeRecognizer:
+    """Recognizer stand-in that notices overlapping calls"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.active = 0
+        self.overlaps = 0
+        self.frames = 0
+        self.releases = 0
+        self.lock = threading.Lock()
+        self.started = threading.Event()
+        self.proceed = threading.Event()
+        self.proceed.set()
+
+    def process_frame(self, frame, draw=False):
+        with self.lock:
+            self.active += 1
+            self.overlaps += self.active > 1
+        self.started.set()
+        self.proceed.wait(5)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+            self.frames += 1
+        return frame, {'smile': True}
+
+    def get_session_stats(self):
+        return {'frames': self.frames}
+
+    def release(self):
+        self.releases += 1
+
+
+def _manager(factory, **options):
+    options.setdefault('workers', 4)
+    options.setdefault('max_fps', 10000.0)
+    return GestureSessionManager(factory, **options)
+
+
+def _wait(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            return False
+        time.sleep(0.005)
+    return True
+
+
+def test_concurrent_creates_build_one_recognizer():
+    calls = []
+    building = threading.Event()
+
+    def factory(session_id, **options):
+        calls.append(session_id)
+        building.set()
+        time.sleep(0.2)
+        return FakeRecognizer()
+
+    manager = _manager(factory)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(manager.create_session('s1'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    # While the first create builds, the manager lock is free
+    assert building.wait(5)
+    assert manager.get_session('s1') is None
+    for thread in threads:
+        thread.join()
+
+    assert calls == ['s1']
+    assert len(results) == 4 and all(session is results[0] for session in results)
+    manager.shutdown()
+
+
+def test_reservation_counts_toward_limit():
+    release_factory = threading.Event()
+
+    def factory(session_id, **options):
+        release_factory.wait(5)
+        return FakeRecognizer()
+
+    manager = _manager(factory, max_sessions=1)
+    creator = threading.Thread(target=manager.create_session, args=('s1',))
+    creator.start()
+    assert _wait(lambda: 's1' in manager._creating)
+    with pytest.raises(SessionLimitError):
+        manager.create_session('s2')
+    release_factory.set()
+    creator.join()
+    assert manager.get_session('s1') is not None
+    manager.shutdown()
+
+
+def test_failed_create_drops_reservation():
+    attempts = []
+
+    def factory(session_id, **options):
+        attempts.append(session_id)
+        if len(attempts) == 1:
+            time.sleep(0.1)
+            raise RuntimeError('worker unavailable')
+        return FakeRecognizer()
+
+    manager = _manager(factory, max_sessions=1)
+    errors = []
+
+    def create():
+        try:
+            manager.create_session('s1')
+        except RuntimeError as e:
+            errors.append(e)
+
+    first = threading.Thread(target=create)
+    first.start()
+    assert _wait(lambda: 's1' in manager._creating)
+    # Waits for the failed attempt, then builds its own
+    second = manager.create_session('s1')
+    first.join()
+
+    assert len(errors) == 1 and attempts == ['s1', 's1']
+    assert manager.get_session('s1') is second and not manager._creating
+    manager.shutdown()
+
+
+def test_one_worker_per_session():
+    recognizer = FakeRecognizer(delay=0.002)
+    manager = _manager(lambda session_id, **options: recognizer, workers=4)
+    manager.create_session('s1')
+
+    for _ in range(200):
+        manager.submit_frame('s1', FRAME)
+    session = manager.get_session('s1')
+    assert _wait(lambda: not session.scheduled)
+
+    assert recognizer.overlaps == 0 and recognizer.frames > 0
+    stats = session.get_stats()
+    assert stats['frames_received'] == 200
+    # Every frame was either processed, skipped or dropped from the ring
+    assert stats['frames_processed'] + stats['frames_skipped'] + stats['frames_dropped'] == 200
+    assert session.current_gestures == {'smile': True}
+    manager.shutdown()
+
+
+def test_frame_after_idle_is_scheduled_again():
+    recognizer = FakeRecognizer()
+    manager = _manager(lambda session_id, **options: recognizer, workers=2)
+    session = manager.create_session('s1')
+
+    manager.submit_frame('s1', FRAME)
+    assert _wait(lambda: recognizer.frames == 1 and not session.scheduled)
+    manager.submit_frame('s1', FRAME)
+    assert _wait(lambda: recognizer.frames == 2 and not session.scheduled)
+    manager.shutdown()
+
+
+def test_close_idle_session_releases_now():
+    recognizer = FakeRecognizer()
+    manager = _manager(lambda session_id, **options: recognizer)
+    manager.create_session('s1')
+
+    stats = manager.close_session('s1')
+    assert stats['session_id'] == 's1' and recognizer.releases == 1
+    assert manager.close_session('s1') is None
+    with pytest.raises(KeyError):
+        manager.submit_frame('s1', FRAME)
+    manager.shutdown()
+    assert recognizer.releases == 1
+
+
+def test_close_during_inference_releases_after_worker():
+    recognizer = FakeRecognizer()
+    recognizer.proceed.clear()
+    manager = _manager(lambda session_id, **options: recognizer)
+    session = manager.create_session('s1')
+
+    manager.submit_frame('s1', FRAME)
+    assert recognizer.started.wait(5)
+    manager.close_session('s1')
+    # The worker still holds the recognizer, so it isn't released under it
+    assert recognizer.releases == 0 and session.closed
+
+    recognizer.proceed.set()
+    assert _wait(lambda: recognizer.releases == 1)
+    assert not session.scheduled
+    time.sleep(0.05)
+    assert recognizer.releases == 1
+    manager.shutdown()
@@ -0,0 +1,127 @@
+"""
+Tests for gesture timelines: ring spilling, resumed files and queries
+Run with: python -m pytest tests/test_gesture_timeline.py
+"""
+
+import os
+
+import numpy as np
+import pytest
+
+from gesture_timeline import RECORD_DTYPE, GestureTimeline, load_timeline
+
+FLAGS = ('smile', 'eye_contact')
+POSTURES = {0: 'unknown', 1: 'confident', 2: 'slouching'}
+START = 1000.0
+
+
+def _timeline(path=None, capacity=4, start=START, flags=FLAGS):
+    return GestureTimeline(flags, POSTURES, start, capacity=capacity, path=path)
+
+
+def _fill(timeline, flags, start=0, posture=0):
+    """One frame per second from START + start with the given flag bytes"""
+    for i, value in enumerate(flags):
+        timeline.append(START + start + i, value, posture)
+
+
+def test_full_ring_spills_to_file(tmp_path):
+    path = str(tmp_path / 's.timeline')
+    timeline = _timeline(path)
+    _fill(timeline, [1] * 10)
+
+    summary = timeline.summary()
+    assert summary['frames'] == 10
+    assert summary['flushed'] + summary['in_memory'] == 10
+    assert summary['in_memory'] <= 4 and summary['overwritten'] == 0
+    assert timeline.records()['t'].tolist() == list(range(10))
+
+
+def test_without_path_old_frames_are_overwritten():
+    timeline = _timeline()
+    _fill(timeline, [1] * 10)
+    assert timeline.summary()['overwritten'] == 6
+    assert timeline.records()['t'].tolist() == [6, 7, 8, 9]
+    with pytest.raises(ValueError):
+        timeline.flush()
+
+
+def test_records_range_spans_file_and_ring(tmp_path):
+    timeline = _timeline(str(tmp_path / 's.timeline'))
+    _fill(timeline, [0] * 10)
+    assert timeline.records(3, 7)['t'].tolist() == [3, 4, 5, 6]
+    assert timeline.records(20)['t'].tolist() == []
+
+
+def test_query_segments_at_range_edges(tmp_path):
+    timeline = _timeline(str(tmp_path / 's.timeline'))
+    # smile on at 0-1, 4-5 and again from 8 to the end
+    _fill(timeline, [1, 1, 0, 0, 1, 1, 0, 0, 1, 1])
+
+    result = timeline.query('smile')
+    assert result['segments'] == [(0.0, 2.0), (4.0, 6.0), (8.0, 9.0)]
+    assert result['frames'] == 6 and result['seconds'] == 5.0
+    # A segment open at the start of the range starts at the range's first frame
+    assert timeline.query('smile', 5, 9)['segments'] == [(5.0, 6.0), (8.0, 8.0)]
+    assert timeline.query('eye_contact')['frames'] == 0
+    assert timeline.query('smile', 50)['segments'] == []
+
+
+def test_query_posture_labels():
+    timeline = _timeline(capacity=8)
+    _fill(timeline, [0, 0], posture=1)
+    _fill(timeline, [0, 0], start=2, posture=2)
+    assert timeline.query('slouching')['segments'] == [(2.0, 3.0)]
+    with pytest.raises(KeyError):
+        timeline.query('dancing')
+
+
+def test_resume_continues_offsets(tmp_path):
+    path = str(tmp_path / 's.timeline')
+    first = _timeline(path)
+    _fill(first, [1] * 5)
+    first.flush()
+
+    # Same session id later: a new recognizer with a later start time
+    second = _timeline(path, start=START + 500)
+    assert second.start_time == START and len(second) == 5
+    _fill(second, [0] * 3, start=20)
+    second.flush()
+
+    records = load_timeline(path).records()
+    assert records['t'].tolist() == [0, 1, 2, 3, 4, 20, 21, 22]
+
+
+def test_resume_drops_partial_record(tmp_path):
+    path = str(tmp_path / 's.timeline')
+    timeline = _timeline(path)
+    _fill(timeline, [1] * 3)
+    timeline.flush()
+    size = os.path.getsize(path)
+    with open(path, 'ab') as f:
+        f.write(b'\x00' * (RECORD_DTYPE.itemsize - 1))
+
+    resumed = _timeline(path)
+    assert os.path.getsize(path) == size and len(resumed) == 3
+    _fill(resumed, [0], start=3)
+    resumed.flush()
+    assert load_timeline(path).records()['t'].tolist() == [0, 1, 2, 3]
+
+
+def test_resume_rejects_other_layout(tmp_path):
+    path = str(tmp_path / 's.timeline')
+    _timeline(path).flush()
+    with pytest.raises(ValueError, match='different gesture flags'):
+        _timeline(path, flags=('smile',))
+
+
+def test_load_timeline_matches_source(tmp_path):
+    path = str(tmp_path / 's.timeline')
+    timeline = _timeline(path)
+    _fill(timeline, [1, 0, 1, 1, 0, 2, 2])
+    timeline.flush()
+
+    loaded = load_timeline(path)
+    assert loaded.flags == FLAGS and loaded.postures == POSTURES
+    assert np.array_equal(loaded.records(), timeline.records())
+    assert loaded.query('eye_contact') == timeline.query('eye_contact')
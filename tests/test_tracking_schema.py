@@ -0,0 +1,89 @@
+"""
+Tests for tracking event validation and the legacy table migration
+Run with: python -m pytest tests/test_tracking_schema.py
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+from tracking_schema import EVENT_TYPES, EventValidationError, init_tracking_table, parse_event
+
+
+def test_parse_typed_values():
+    assert parse_event({'event_type': 'tab_switch', 'value': 3}) == (1, 3, None, None)
+    assert parse_event({'event_type': 'tab_switch', 'value': 3.0}) == (1, 3, None, None)
+    assert parse_event({'event_type': 'eye_wander', 'value': 2}) == (3, None, 2.0, None)
+    assert parse_event({'event_type': 'focus_loss'}) == (4, None, None, None)
+
+
+def test_parse_payload_and_legacy_details():
+    assert parse_event({'event_type': 'multiple_faces', 'payload': {'faces': 2}})[3] == '{"faces":2}'
+    assert parse_event({'event_type': 'focus_loss', 'details': 'window blur'})[3] == '{"details":"window blur"}'
+
+
+@pytest.mark.parametrize('data', [
+    None,
+    ['tab_switch'],
+    {'event_type': 'other'},
+    {'event_type': 'dancing'},
+    {'event_type': 'tab_switch', 'value': 1.5},
+    {'event_type': 'tab_switch', 'value': True},
+    {'event_type': 'tab_switch', 'value': '3'},
+    {'event_type': 'tab_switch', 'value': float('inf')},
+    {'event_type': 'tab_switch', 'value': float('nan')},
+    {'event_type': 'eye_wander', 'value': float('-inf')},
+    {'event_type': 'eye_wander', 'value': float('nan')},
+    {'event_type': 'focus_loss', 'payload': 'text'},
+    {'event_type': 'focus_loss', 'payload': {'details': 'x' * 2000}},
+])
+def test_parse_rejects(data):
+    with pytest.raises(EventValidationError):
+        parse_event(data)
+
+
+def test_parse_rejects_non_finite_json():
+    # Flask's parser (the stdlib json module) accepts these literals
+    data = json.loads('{"event_type": "tab_switch", "value": Infinity}')
+    with pytest.raises(EventValidationError, match='finite'):
+        parse_event(data)
+
+
+def test_legacy_table_is_rebuilt():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('''
+        CREATE TABLE tracking_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            event_type TEXT NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            details TEXT
+        )
+    ''')
+    conn.executemany('INSERT INTO tracking_events (session_id, event_type, details, timestamp) VALUES (?, ?, ?, ?)', [
+        ('s1', 'tab_switch', 'Tab switch #2', '2024-03-01 09:00:00'),
+        ('s1', 'posture_violation', '', '2024-03-01 09:00:05'),
+        ('s1', 'focus_loss', 'window blur', '2024-03-01 09:00:10'),
+        ('s2', 'screenshot', 'PrintScreen', '2024-03-01 09:01:00')
+    ])
+    conn.commit()
+
+    init_tracking_table(conn)
+
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(tracking_events)')]
+    assert columns == ['id', 'session_id', 'event_code', 'ts', 'value_int', 'value_real', 'payload']
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert 'tracking_events_legacy' not in tables
+
+    rows = conn.execute('SELECT id, session_id, event_code, ts, value_int, payload FROM tracking_events ORDER BY id')
+    assert rows.fetchall() == [
+        (1, 's1', EVENT_TYPES['tab_switch'][0], 1709283600, 2, None),
+        (2, 's1', EVENT_TYPES['posture_violation'][0], 1709283605, None, None),
+        (3, 's1', EVENT_TYPES['focus_loss'][0], 1709283610, None, '{"details":"window blur"}'),
+        (4, 's2', 0, 1709283660, None, '{"event_type":"screenshot","details":"PrintScreen"}')
+    ]
+
+    # Already typed: a second init leaves the rows alone
+    init_tracking_table(conn)
+    assert conn.execute('SELECT COUNT(*) FROM tracking_events').fetchone() == (4,)
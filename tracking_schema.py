@@ -0,0 +1,191 @@
+"""
+Typed Tracking Event Schema
+Stores monitoring events as small integer codes with numeric value columns
+instead of free-text details, so per-session aggregations are plain
+indexed integer scans
+
+Layout of tracking_events:
+    session_id  TEXT     interview session
+    event_code  INTEGER  see EVENT_TYPES
+    ts          INTEGER  unix epoch seconds (UTC)
+    value_int   INTEGER  e.g. tab switch number, face count
+    value_real  REAL     e.g. duration in seconds, score
+    payload     TEXT     optional compact JSON, only when there is extra detail
+
+Run `python tracking_schema.py [db_path]` to migrate an existing database.
+"""
+
+import json
+import math
+import sqlite3
+import sys
+
+# event_type -> (event_code, numeric value column or None)
+EVENT_TYPES = {
+    'other': (0, None),
+    'tab_switch': (1, 'value_int'),
+    'posture_violation': (2, 'value_real'),
+    'eye_wander': (3, 'value_real'),
+    'focus_loss': (4, 'value_real'),
+    'face_not_detected': (5, 'value_real'),
+    'multiple_faces': (6, 'value_int')
+}
+EVENT_NAMES = {code: name for name, (code, _) in EVENT_TYPES.items()}
+
+MAX_PAYLOAD_BYTES = 1024
+
+
+class EventValidationError(ValueError):
+    """Raised when a client-submitted tracking event is malformed"""
+
+
+def init_tracking_table(conn):
+    """Create the typed tracking_events table, migrating the legacy layout if present"""
+    c = conn.cursor()
+    c.execute('PRAGMA table_info(tracking_events)')
+    columns = {row[1] for row in c.fetchall()}
+
+    if columns and 'event_code' not in columns:
+        migrate_legacy_events(conn)
+        return
+
+    _create_typed_table(c)
+    conn.commit()
+
+
+def _create_typed_table(c):
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS tracking_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            event_code INTEGER NOT NULL,
+            ts INTEGER NOT NULL DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+            value_int INTEGER,
+            value_real REAL,
+            payload TEXT,
+            FOREIGN KEY (session_id) REFERENCES interview_sessions(session_id)
+        )
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS idx_tracking_events_session_code
+        ON tracking_events(session_id, event_code)
+    ''')
+
+
+def migrate_legacy_events(conn):
+    """Rewrite free-text tracking_events rows into the typed layout
+
+    Known event types get their code; 'Tab switch #N' details become
+    value_int; any other non-empty details are kept in payload. Unknown
+    event types are stored as 'other' with the original type in payload.
+    Returns the number of migrated rows.
+    """
+    c = conn.cursor()
+    known = [name for name in EVENT_TYPES if name != 'other']
+    placeholders = ', '.join('?' for _ in known)
+    code_case = ' '.join(f"WHEN '{name}' THEN {EVENT_TYPES[name][0]}" for name in known)
+
+    try:
+        c.execute('BEGIN IMMEDIATE')
+        c.execute('ALTER TABLE tracking_events RENAME TO tracking_events_legacy')
+        _create_typed_table(c)
+        c.execute(f'''
+            INSERT INTO tracking_events (id, session_id, event_code, ts, value_int, payload)
+            SELECT id,
+                   session_id,
+                   CASE event_type {code_case} ELSE 0 END,
+                   COALESCE(CAST(strftime('%s', timestamp) AS INTEGER),
+                            CAST(strftime('%s', 'now') AS INTEGER)),
+                   CASE WHEN event_type = 'tab_switch' AND instr(details, '#') > 0
+                        THEN CAST(substr(details, instr(details, '#') + 1) AS INTEGER)
+                   END,
+                   CASE
+                       WHEN event_type NOT IN ({placeholders})
+                           THEN json_object('event_type', event_type, 'details', details)
+                       WHEN event_type != 'tab_switch' AND COALESCE(details, '') != ''
+                           THEN json_object('details', details)
+                   END
+            FROM tracking_events_legacy
+            ORDER BY id
+        ''', known)
+        migrated = c.rowcount
+        c.execute('DROP TABLE tracking_events_legacy')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return migrated
+
+
+def parse_event(data):
+    """Validate a client event submission
+
+    Accepts {'event_type', 'value', 'payload', 'details'} where details is
+    the legacy free-text field. Returns (event_code, value_int, value_real,
+    payload_json).
+    """
+    if not isinstance(data, dict):
+        raise EventValidationError('Event body must be a JSON object')
+
+    event_type = data.get('event_type')
+    if event_type not in EVENT_TYPES or event_type == 'other':
+        raise EventValidationError(
+            f"Unknown event_type '{event_type}'. Expected one of: "
+            + ', '.join(name for name in EVENT_TYPES if name != 'other')
+        )
+    event_code, value_column = EVENT_TYPES[event_type]
+
+    value_int = None
+    value_real = None
+    value = data.get('value')
+    if value is not None:
+        if value_column is None or isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise EventValidationError(f"Invalid value for '{event_type}'")
+        # JSON bodies may carry NaN/Infinity, which int() can't convert
+        if not math.isfinite(value):
+            raise EventValidationError(f"'{event_type}' value must be a finite number")
+        if value_column == 'value_int':
+            if int(value) != value:
+                raise EventValidationError(f"'{event_type}' value must be an integer")
+            value_int = int(value)
+        else:
+            value_real = float(value)
+
+    payload = data.get('payload')
+    details = data.get('details')
+    if payload is None and details:
+        payload = {'details': details}
+    if payload is not None:
+        if not isinstance(payload, dict):
+            raise EventValidationError('payload must be a JSON object')
+        payload = json.dumps(payload, separators=(',', ':'))
+        if len(payload.encode('utf-8')) > MAX_PAYLOAD_BYTES:
+            raise EventValidationError(f'payload exceeds {MAX_PAYLOAD_BYTES} bytes')
+
+    return event_code, value_int, value_real, payload
+
+
+def insert_event(cursor, session_id, event_code, value_int=None, value_real=None, payload=None):
+    """Insert one typed event (caller commits)"""
+    cursor.execute('''
+        INSERT INTO tracking_events (session_id, event_code, value_int, value_real, payload)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (session_id, event_code, value_int, value_real, payload))
+
+
+if __name__ == '__main__':
+    db_path = sys.argv[1] if len(sys.argv) > 1 else 'interview_system.db'
+    conn = sqlite3.connect(db_path)
+    c = conn.cursor()
+    c.execute('PRAGMA table_info(tracking_events)')
+    columns = {row[1] for row in c.fetchall()}
+
+    if columns and 'event_code' not in columns:
+        rows = migrate_legacy_events(conn)
+        print(f"[OK] Migrated {rows} tracking events to the typed layout")
+        conn.execute('VACUUM')
+    else:
+        init_tracking_table(conn)
+        print("[OK] tracking_events already uses the typed layout")
+    conn.close()